@@ -1,5 +1,9 @@
 from fastapi import APIRouter
-from .endpoints import auth , user
+from .endpoints import admin, analytics, auth , export, jobs, user
 route_v1 = APIRouter()
 # route_v1.include_router((auth.router), prefix='/auth', tags=['auth'])
 route_v1.include_router((user.router), prefix='/user', tags=['user'])
+route_v1.include_router((admin.router), prefix='/admin', tags=['admin'])
+route_v1.include_router((jobs.router), prefix='/jobs', tags=['jobs'])
+route_v1.include_router((analytics.router), prefix='/analytics', tags=['analytics'])
+route_v1.include_router((export.router), prefix='/export', tags=['export'])
@@ -0,0 +1,87 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from api.dependencies import validate_secret_key
+from services.analytics import property_analytics
+from services.circuit_breaker import circuits
+from services.hedging import hedger
+from services.parse_executor import parse_executor
+from services.pipeline import address_pipeline
+from services.principal_cache import principal_cache
+from services import retry, revalidation
+from services.property_cache import AUTOCOMPLETE, DETAILS, VALIDATORS, property_cache
+from services.property_store import property_store
+from services.refresher import refresher
+from services.scheduler import scheduler
+from services.stream_extract import stream_stats
+from services.singleflight import singleflight
+from util.canonical import canonical_address, canonical_redfin_url
+
+router = APIRouter(dependencies=[Depends(validate_secret_key)])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Runtime metrics of the scraping subsystems.
+    """
+    return {
+        "scheduler": scheduler.stats(),
+        "lanes": scheduler.lane_stats(),
+        "parse_executor": parse_executor.stats(),
+        "cache": await property_cache.stats(),
+        "singleflight": singleflight.stats(),
+        "pipeline": address_pipeline.stats(),
+        "property_store": property_store.stats(),
+        "refresher": refresher.stats(),
+        "revalidation": revalidation.stats(),
+        "streaming": stream_stats.stats(),
+        "retry": retry.stats.stats(),
+        "circuits": circuits.stats(),
+        "hedging": hedger.stats(),
+        "analytics": property_analytics.stats(),
+        "auth": principal_cache.stats(),
+    }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters and sizes of the property cache tiers.
+    """
+    return await property_cache.stats()
+
+
+@router.delete("/cache")
+async def invalidate_cache(
+    url: Optional[str] = None,
+    prefix: Optional[str] = None,
+    namespace: str = DETAILS,
+):
+    """
+    Drop cached entries by `url` (a detail URL, or an address when
+    namespace=autocomplete) or by a `prefix` of the stored canonical key.
+    Dropping details also drops their revalidation entries, so the next
+    fetch downloads and parses the page in full.
+    """
+    if namespace not in (DETAILS, AUTOCOMPLETE):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown cache namespace."
+        )
+    if url is None and prefix is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Pass url or prefix."
+        )
+    removed = 0
+    if url is not None:
+        if namespace == DETAILS:
+            key = canonical_redfin_url(url)
+        else:
+            key = canonical_address(url)
+        removed += await property_cache.invalidate(namespace, key)
+        if namespace == DETAILS:
+            await property_cache.invalidate(VALIDATORS, key)
+    if prefix is not None:
+        removed += await property_cache.invalidate_prefix(namespace, prefix)
+        if namespace == DETAILS:
+            await property_cache.invalidate_prefix(VALIDATORS, prefix)
+    return {"removed": removed}
@@ -0,0 +1,41 @@
+import logging
+from itertools import islice, takewhile
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, status
+from api.dependencies import validate_secret_key
+from services.analytics import property_analytics
+from services.property_store import property_store
+
+router = APIRouter(dependencies=[Depends(validate_secret_key)])
+
+
+@router.get("/properties")
+async def get_property_analytics(
+    group_by: Literal["state", "city", "zip"] = "zip",
+    limit: int = 100,
+    min_count: int = 1,
+):
+    """
+    Count, median and mean price, sqft and price per sqft, and bed and bath
+    counts for stored properties, per state, city or zip. Groups come
+    largest first; `min_count` drops small ones. Results are precomputed
+    and rebuilt in the background once new properties are stored.
+    """
+    if not property_store.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Property store unavailable."
+        )
+    try:
+        groups = await property_analytics.grouped(group_by)
+    except Exception as e:
+        logging.error(f"Property analytics failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Property store unavailable."
+        )
+    selected = takewhile(lambda group: group["count"] >= min_count, groups)
+    return {
+        "group_by": group_by,
+        "groups": len(groups),
+        "properties": sum(group["count"] for group in groups),
+        "results": list(islice(selected, max(min(limit, 10000), 0))),
+    }
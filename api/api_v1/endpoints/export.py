@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from api.dependencies import validate_secret_key
+from core.config import settings
+from services.columnar_export import MANIFEST, export_properties, load_manifest
+from services.property_store import property_store
+
+router = APIRouter(dependencies=[Depends(validate_secret_key)])
+
+_exporting = asyncio.Lock()
+
+
+@router.post("/properties")
+async def create_property_export():
+    """
+    Append properties changed since the last export to the columnar export
+    and return its manifest.
+    """
+    if not property_store.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Property store unavailable."
+        )
+    async with _exporting:
+        try:
+            return await asyncio.to_thread(export_properties, settings.EXPORT_DIR)
+        except Exception as e:
+            logging.error(f"Property export failed: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Property export failed."
+            )
+
+
+@router.get("/properties")
+def get_property_export():
+    """
+    Manifest of the columnar export: row count, watermark, column files and
+    dtypes, and the city dictionary.
+    """
+    manifest = load_manifest(settings.EXPORT_DIR)
+    if manifest is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No export yet.")
+    return manifest
+
+
+@router.get("/properties/{name}")
+def get_property_export_file(name: str):
+    """
+    One column file, or the manifest. Range requests are supported, so a
+    client that already has N rows can fetch only the bytes after them.
+    """
+    manifest = load_manifest(settings.EXPORT_DIR)
+    files = {column["file"] for column in (manifest or {}).get("columns", {}).values()}
+    if name != MANIFEST and name not in files:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export file not found.")
+    return FileResponse(os.path.join(settings.EXPORT_DIR, name), media_type="application/octet-stream")
@@ -0,0 +1,74 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+import crud
+from api.dependencies import get_db, validate_secret_key
+from models.scrape_job import ADDRESS, DONE, FAILED, PENDING, RUNNING, URL
+from schemas.job import JobCreated, JobResultPage, JobStatus, ScrapeJobCreate
+from schemas.user import AddressRequest, URLRes
+
+router = APIRouter(dependencies=[Depends(validate_secret_key)])
+
+
+@router.post("/addresses", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+def create_address_job(addresses: List[AddressRequest], db: Session = Depends(get_db)):
+    """
+    Queue an address-to-details job. Poll `/jobs/{job_id}` for progress.
+    """
+    job = crud.scrape_job.create(
+        db, obj_in=ScrapeJobCreate(kind=ADDRESS, items=[a.model_dump() for a in addresses])
+    )
+    return JobCreated(job_id=job.id, total_items=job.total_items)
+
+
+@router.post("/urls", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+def create_url_job(urls: List[URLRes], db: Session = Depends(get_db)):
+    """
+    Queue a details-scraping job for Redfin URLs.
+    """
+    job = crud.scrape_job.create(
+        db, obj_in=ScrapeJobCreate(kind=URL, items=[u.model_dump() for u in urls])
+    )
+    return JobCreated(job_id=job.id, total_items=job.total_items)
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = crud.scrape_job.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    counts = crud.scrape_job.count_by_state(db, job_id=job_id)
+    if counts.get(PENDING, 0) + counts.get(RUNNING, 0) == 0:
+        state = DONE
+    elif counts.get(DONE, 0) + counts.get(FAILED, 0) + counts.get(RUNNING, 0) == 0:
+        state = PENDING
+    else:
+        state = RUNNING
+    return JobStatus(
+        id=job.id,
+        kind=job.kind,
+        state=state,
+        total_items=job.total_items,
+        created_date=job.created_date,
+        **counts,
+    )
+
+
+@router.get("/{job_id}/results", response_model=JobResultPage)
+def get_job_results(job_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """
+    Finished items of a job in input order, `limit` at a time.
+    """
+    if not crud.scrape_job.get(db, job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    limit = min(limit, 1000)
+    items = crud.scrape_job.get_results(db, job_id=job_id, skip=skip, limit=limit)
+    return JobResultPage(
+        job_id=job_id,
+        skip=skip,
+        limit=limit,
+        items=[
+            {"position": item.position, "state": item.state, "error": item.error, **(item.result or {})}
+            for item in items
+        ],
+    )
@@ -1,80 +1,96 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional, Union
 import asyncio
+import tempfile
 from bs4 import BeautifulSoup
 import logging
-from cachetools import LRUCache
 import httpx
-from tenacity import retry, wait_exponential, stop_after_attempt
 import json
 from fastapi.security.api_key import APIKeyHeader
-from schemas.user import AddressRequest, AddressResponse, URlResponse
+from fastapi.responses import StreamingResponse
+from schemas.user import AddressRequest, AddressResponse, TypedAddressResponse, URlResponse, URLRes
+from api.dependencies import scrape_lane, validate_secret_key
 from util.user_util import (
+    detail_page_getter,
     fetch_property_details,
-    # fetch_with_retry,
+    fetch_with_retry,
     # search_redfin_property,
     process_address,
     process_in_batches,
 )
 import requests
-import aiohttp
+from core.config import settings
+from core.http_client import upstream, UpstreamError
+from services.scheduler import BULK, scheduler
+from services.circuit_breaker import CircuitOpenError
+from services.parse_executor import parse_executor
+from services.property_cache import AUTOCOMPLETE, DETAILS, property_cache
+from services.property_store import property_store
+from services.refresher import refresher
+from services.extractor import NOT_AVAILABLE
+from services.normalize import PropertyRecord
+from services.retry import TIMEOUT, DeadlineExceeded, scope as retry_scope, timeout_details
+from services.revalidation import CACHED, STORED, changed, shared_fetch_page, shared_settle, verified
+from services.singleflight import singleflight
+from services.pipeline import address_pipeline
+from services.csv_ingest import CHUNK_SIZE, CSVFormatError, enrich_csv, iter_csv_records
+from util.canonical import canonical_address, canonical_redfin_url
+from util.streaming import ndjson_response, wants_ndjson
 
 # Set up the router and cache
 
 router = APIRouter()
-cache = {}  # LRU Cache to store frequently accessed results
 
 
-# Define the static secret key
-STATIC_SECRET_KEY = (
-    "UaD2bKcQ3y-Ldf_jp8R6h6P0vTwJlm9MkT1HrGhHk4M"  # Replace with your actual key
-)
-
-# Create an API key header dependency
-api_key_header = APIKeyHeader(name="X-API-Key", auto_error=True)
-
-
-# Dependency to validate the secret key
-def validate_secret_key(api_key: str = Depends(api_key_header)):
-    if api_key != STATIC_SECRET_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or missing API Key."
+async def fetch_redfin_property(full_address: str) -> str:
+    """
+    Asynchronously fetches the Redfin property URL for a given address.
+    Differently written copies of one address share a single lookup.
+    """
+    key = canonical_address(full_address)
+    try:
+        return await singleflight.do(
+            f"{AUTOCOMPLETE}:{key}", lambda: _fetch_redfin_property(full_address, key)
         )
+    except DeadlineExceeded:
+        return TIMEOUT
 
 
-class URLRes(BaseModel):
-    id: str
-    redfin_url: str
+async def _fetch_redfin_property(full_address: str, key: str) -> str:
+    cached = await property_cache.get(AUTOCOMPLETE, key)
+    if cached is not None:
+        return cached
 
-async def fetch_redfin_property(session, full_address: str) -> str:
-    """
-    Asynchronously fetches the Redfin property URL for a given address.
-    """
     formatted_address = full_address.replace(" ", "%20")
-    search_url = f"https://www.redfin.com/stingray/do/location-autocomplete?location={formatted_address}&v=2"
+    search_url = f"{settings.REDFIN_BASE_URL}/stingray/do/location-autocomplete?location={formatted_address}&v=2"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36"
     }
 
     try:
-        async with session.get(search_url, headers=headers) as response:
-            response.raise_for_status()
-            raw_text = await response.text()
-            prefix = "{}&&"
-            if raw_text.startswith(prefix):
-                json_text = raw_text[len(prefix) :]
-            else:
-                json_text = raw_text
-
-            data = json.loads(json_text)
-
-            if data and "payload" in data and "sections" in data["payload"]:
-                for section in data["payload"]["sections"]:
-                    for item in section["rows"]:
-                        if "url" in item:
-                            return f"https://www.redfin.com{item['url']}"
+        raw_text = await fetch_with_retry(search_url, headers)
+        prefix = "{}&&"
+        if raw_text.startswith(prefix):
+            json_text = raw_text[len(prefix) :]
+        else:
+            json_text = raw_text
+
+        data = json.loads(json_text)
+
+        if data and "payload" in data and "sections" in data["payload"]:
+            for section in data["payload"]["sections"]:
+                for item in section["rows"]:
+                    if "url" in item:
+                        redfin_url = f"{settings.REDFIN_BASE_URL}{item['url']}"
+                        await property_cache.set(AUTOCOMPLETE, key, redfin_url)
+                        return redfin_url
+        await property_cache.set(AUTOCOMPLETE, key, "Not Found", negative=True)
         return "Not Found"
+    except DeadlineExceeded:
+        return TIMEOUT
+    except CircuitOpenError:
+        return "Error"
     except Exception as e:
         print(f"Error fetching data for address {full_address}: {e}")
         return "Not Found"
@@ -84,24 +100,41 @@ async def fetch_all_redfin_urls(addresses: List[AddressRequest]) -> List[dict]:
     """
     Fetch Redfin URLs for a list of addresses asynchronously.
     """
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for entry in addresses:
-            # Access attributes using dot notation
-            full_address = f"{entry.address}, {entry.city}, {entry.state} {entry.zip}"
-            print(f"Fetching URL for: {full_address}")
-            tasks.append(fetch_redfin_property(session, full_address))
+    tasks = []
+    for entry in addresses:
+        # Access attributes using dot notation
+        full_address = f"{entry.address}, {entry.city}, {entry.state} {entry.zip}"
+        print(f"Fetching URL for: {full_address}")
+        tasks.append(fetch_redfin_property(full_address))
+
+    results = await asyncio.gather(*tasks)
+    return results
 
-        results = await asyncio.gather(*tasks)
-        return results
+
+async def _url_response(entry: AddressRequest) -> URlResponse:
+    full_address = f"{entry.address}, {entry.city}, {entry.state} {entry.zip}"
+    return URlResponse(id=entry.id, redfin_url=await fetch_redfin_property(full_address))
 
 
 @router.post("/get-redfin-urls/web", response_model=List[URlResponse])
-async def get_redfin_urls(addresses: List[AddressRequest]):
+async def get_redfin_urls(
+    addresses: List[AddressRequest],
+    request: Request,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+    lane: Optional[str] = Depends(scrape_lane),
+):
     """
     Endpoint to get the Redfin URLs for a list of addresses.
+    With `?stream=true` or `Accept: application/x-ndjson` each result is
+    written as an NDJSON line as soon as it is ready. Lookups still running
+    after `timeout` seconds (SCRAPE_DEADLINE_SECONDS by default) answer "Timeout".
+    `?priority=bulk` queues the lookups behind interactive traffic.
     """
-    results = await fetch_all_redfin_urls(addresses)
+    with scheduler.batch(lane=lane), retry_scope(timeout or settings.SCRAPE_DEADLINE_SECONDS):
+        if wants_ndjson(request, stream):
+            return ndjson_response(_url_response(entry) for entry in addresses)
+        results = await fetch_all_redfin_urls(addresses)
     # Combine the Redfin URLs with their IDs into the response structure
     return [
         {
@@ -117,7 +150,7 @@ def search_redfin_property(full_address: str) -> str:
     This function takes a full address and queries the Redfin autocomplete API to get the property URL.
     """
     formatted_address = full_address.replace(" ", "%20")
-    search_url = f"https://www.redfin.com/stingray/do/location-autocomplete?location={formatted_address}&v=2"
+    search_url = f"{settings.REDFIN_BASE_URL}/stingray/do/location-autocomplete?location={formatted_address}&v=2"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36"
     }
@@ -138,34 +171,28 @@ def search_redfin_property(full_address: str) -> str:
             for section in data["payload"]["sections"]:
                 for item in section["rows"]:
                     if "url" in item:
-                        return f"https://www.redfin.com{item['url']}"
+                        return f"{settings.REDFIN_BASE_URL}{item['url']}"
         return "Not Found"
     except Exception as e:
         print(f"Error fetching data for address {full_address}: {e}")
         return "Not Found"
 
 
-async def fetch_with_retry(url, headers, retries=3):
-    """Fetch URL with retries."""
-    while retries > 0:
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    elif response.status == 202:
-                        print(f"Received 202 from {url}. Retrying...")
-                    else:
-                        print(f"Error: {response.status} from {url}")
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
-        retries -= 1
-        await asyncio.sleep(5)  # Increase delay for retries
-    return None
-
-
 async def scrape_redfin(url):
     """Scrape Redfin property details."""
+    key = canonical_redfin_url(url)
+    try:
+        details = await singleflight.do(f"{DETAILS}:{key}", lambda: _scrape_redfin(url, key))
+    except DeadlineExceeded:
+        details = timeout_details()
+    return {**details, "url": url}
+
+
+async def _scrape_redfin(url, key):
+    cached = await property_cache.get(DETAILS, key)
+    if cached is not None:
+        return {**cached, "freshness": CACHED}
+
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
         "Accept-Language": "en-US,en;q=0.9",
@@ -174,72 +201,169 @@ async def scrape_redfin(url):
         "Upgrade-Insecure-Requests": "1",
     }
 
-    html = await fetch_with_retry(url, headers)
-    if not html:
+    try:
+        page = await shared_fetch_page(key, headers, detail_page_getter(url))
+        details, freshness = await shared_settle(key, page, parse_executor.parse)
+    except DeadlineExceeded:
+        return timeout_details()
+    except UpstreamError:
         print(f"Failed to fetch {url}")
         return {
-            "url": url,
             "price": "Error",
             "beds": "Error",
             "baths": "Error",
             "sqft": "Error",
         }
 
-    soup = BeautifulSoup(html, "html.parser")
-    details = {}
+    if verified(freshness) and NOT_AVAILABLE not in details.values():
+        await property_cache.set(DETAILS, key, details)
+        if changed(freshness):
+            property_store.add(url, details)
+        else:
+            property_store.touch(url)
+    return {**details, "freshness": freshness}
 
-    # Extract details with fallback
-    details["price"] = (
-        soup.find("div", {"data-rf-test-id": "abp-price"})
-        .find("div", {"class": "statsValue"})
-        .text.strip()
-        if soup.find("div", {"data-rf-test-id": "abp-price"})
-        else "Not Available"
-    )
-    details["beds"] = (
-        soup.find("div", {"data-rf-test-id": "abp-beds"})
-        .find("div", {"class": "statsValue"})
-        .text.strip()
-        if soup.find("div", {"data-rf-test-id": "abp-beds"})
-        else "Not Available"
-    )
-    details["baths"] = (
-        soup.find("div", {"data-rf-test-id": "abp-baths"})
-        .find("div", {"class": "statsValue"})
-        .text.strip()
-        if soup.find("div", {"data-rf-test-id": "abp-baths"})
-        else "Not Available"
-    )
-    details["sqft"] = (
-        soup.find("div", {"data-rf-test-id": "abp-sqFt"}).text.strip()
-        if soup.find("div", {"data-rf-test-id": "abp-sqFt"})
-        else "Not Available"
-    )
 
-    details["url"] = url
-    return details
+TYPED = "typed"
+LEGACY = "legacy"
+ResponseFormat = Literal["typed", "legacy"]
+
+
+def _address_response(result: Dict, response_format: str) -> Union[TypedAddressResponse, AddressResponse]:
+    """
+    Typed numbers and a status for `result`, or the display strings as
+    scraped when the caller asked for `format=legacy`.
+    """
+    if response_format == LEGACY:
+        return AddressResponse(**result)
+    return TypedAddressResponse(
+        id=result["id"],
+        redfin_url=result["redfin_url"],
+        freshness=result.get("freshness"),
+        **PropertyRecord.from_details(result).as_dict(),
+    )
 
 
 @router.post(
     "/get-redfin-urls/scraping",
-    response_model=List[AddressResponse],
+    response_model=List[Union[TypedAddressResponse, AddressResponse]],
     dependencies=[Depends(validate_secret_key)],
 )
-async def get_redfin_urls(url: List[URLRes]):
+async def get_redfin_urls(
+    url: List[URLRes],
+    request: Request,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+    lane: Optional[str] = Depends(scrape_lane),
+    response_format: ResponseFormat = Query(TYPED, alias="format"),
+):
+    """
+    Scrape price, beds, baths and sqft for each Redfin URL.
+    With `?stream=true` or `Accept: application/x-ndjson` each result is
+    written as an NDJSON line, carrying its input `id`, as soon as it is ready.
+    Homes scraped within PROPERTY_MAX_AGE_SECONDS are answered from the
+    property table, looked up in one query for the whole request. Pages
+    not scraped within `timeout` seconds answer "Timeout". `?priority=`
+    picks the scheduler lane, as for the web lookup. Results are numbers
+    with a `status` (ok, partial, not_available, not_found, error or
+    timeout); `?format=legacy` returns the display strings instead.
+    """
+    stored = await property_store.get_fresh(i.redfin_url for i in url)
+    with scheduler.batch(lane=lane), retry_scope(timeout or settings.SCRAPE_DEADLINE_SECONDS):
+        if wants_ndjson(request, stream):
+            return ndjson_response(
+                _scrape_response(i, stored.get(i.redfin_url), response_format) for i in url
+            )
+        tasks = [_scrape_response(i, stored.get(i.redfin_url), response_format) for i in url]
+        return await asyncio.gather(*tasks)
+
+
+async def _scrape_response(entry: URLRes, stored: Dict = None, response_format: str = TYPED):
+    if stored is not None:
+        details = {**stored, "freshness": STORED}
+    else:
+        details = await scrape_redfin(entry.redfin_url)
+    refresher.record(entry.redfin_url, details.get("freshness"))
+    result = {
+        "id": entry.id,
+        "redfin_url": entry.redfin_url,
+        "price": details.get("price", "Not Available"),
+        "beds": details.get("beds", "Not Available"),
+        "baths": details.get("baths", "Not Available"),
+        "sqft": details.get("sqft", "Not Available"),
+        "freshness": details.get("freshness"),
+    }
+    return _address_response(result, response_format)
 
-    tasks = [scrape_redfin(i.redfin_url) for i in url]
-    results = await asyncio.gather(*tasks)
 
-    response = [
-        AddressResponse(
-            id=i.id,
-            redfin_url=i.redfin_url,
-            price=details.get("price", "Not Available"),
-            beds=details.get("beds", "Not Available"),
-            baths=details.get("baths", "Not Available"),
-            sqft=details.get("sqft", "Not Available"),
-        )
-        for i, details in zip(url, results)
-    ]
+async def _pipeline_response(entry: AddressRequest, response_format: str = TYPED):
+    return _address_response(await address_pipeline.process(entry), response_format)
 
-    return response
+
+@router.post(
+    "/get-redfin-details",
+    response_model=List[Union[TypedAddressResponse, AddressResponse]],
+    dependencies=[Depends(validate_secret_key)],
+)
+async def get_redfin_details(
+    addresses: List[AddressRequest],
+    request: Request,
+    stream: bool = False,
+    timeout: Optional[float] = None,
+    lane: Optional[str] = Depends(scrape_lane),
+    response_format: ResponseFormat = Query(TYPED, alias="format"),
+):
+    """
+    Look up each address and scrape its details through the staged
+    pipeline. Supports the same NDJSON streaming mode, `timeout`,
+    `priority` and `format` as the scraping endpoint.
+    """
+    with retry_scope(timeout or settings.SCRAPE_DEADLINE_SECONDS), scheduler.batch(lane=lane):
+        if wants_ndjson(request, stream):
+            return ndjson_response(_pipeline_response(entry, response_format) for entry in addresses)
+        results = await process_in_batches(addresses)
+        return [_address_response(result, response_format) for result in results]
+
+
+@router.post(
+    "/get-redfin-details/csv",
+    dependencies=[Depends(validate_secret_key)],
+)
+async def get_redfin_details_csv(request: Request, lane: Optional[str] = Depends(scrape_lane)):
+    """
+    Upload a CSV (request body, Content-Type: text/csv) with Address, City,
+    State and Zip columns; the same rows stream back with the Redfin URL,
+    Price, Beds, Baths and Sqft columns added. Rows run in the bulk lane
+    unless `?priority=interactive` is given.
+    """
+    # Spool the upload (to disk past 1 MB) so the response can stream
+    # while memory stays flat regardless of file size
+    upload = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    upload.seek(0)
+
+    chunks = iter(lambda: upload.read(CHUNK_SIZE), b"")
+    lines = enrich_csv(iter_csv_records(chunks), lane=lane or BULK)
+    try:
+        header = await lines.__anext__()
+    except StopAsyncIteration:
+        upload.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty CSV.")
+    except CSVFormatError as e:
+        upload.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def body():
+        try:
+            yield header
+            async for line in lines:
+                yield line
+        finally:
+            upload.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="redfin_results.csv"'},
+    )
@@ -1,6 +1,18 @@
 
+from typing import Literal, Optional
+
+from core.config import settings
 from db.database import SessionLocal
-from fastapi import Request
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security.api_key import APIKeyHeader
+
+# Define the static secret key
+STATIC_SECRET_KEY = (
+    "UaD2bKcQ3y-Ldf_jp8R6h6P0vTwJlm9MkT1HrGhHk4M"  # Replace with your actual key
+)
+
+# Create an API key header dependency
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=True)
 
 def get_db():
     db = SessionLocal()
@@ -12,3 +24,21 @@ def get_db():
 
 def get_current_user(request: Request):
     return request.state.current_user
+
+
+# Dependency to validate the secret key
+def validate_secret_key(api_key: str = Depends(api_key_header)):
+    if api_key != STATIC_SECRET_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or missing API Key."
+        )
+
+
+# Priority lane of a scrape request: `?priority=`, else the API key's lane
+# from SCRAPE_KEY_LANES; None leaves the endpoint's default
+def scrape_lane(
+    request: Request, priority: Optional[Literal["interactive", "bulk"]] = None
+) -> Optional[str]:
+    if priority is not None:
+        return priority
+    return settings.SCRAPE_KEY_LANES.get(request.headers.get("X-API-Key", ""))
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.dependencies import get_current_user
@@ -5,9 +7,38 @@ from core.config import settings
 from fastapi.staticfiles import StaticFiles
 from api.api_v1 import api_v1
 from middlewares.auth_middleware import AuthMiddleWare
+from core.http_client import upstream
+from services.circuit_breaker import circuits
+from services.parse_executor import parse_executor
+from services.job_worker import JobWorker
+from services.pipeline import address_pipeline
+from services.property_store import property_store
+from services.refresher import refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream.start()
+    parse_executor.start()
+    property_store.start()
+    refresher.start()
+    worker_task = None
+    if settings.JOB_WORKER_IN_APP:
+        app.state.job_worker = JobWorker()
+        worker_task = asyncio.create_task(app.state.job_worker.run())
+    yield
+    if worker_task is not None:
+        app.state.job_worker.stop()
+        await worker_task
+    await refresher.stop()
+    await address_pipeline.stop()
+    await property_store.stop()
+    parse_executor.shutdown()
+    await upstream.close()
+
 
 root_router = APIRouter()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # origins = ['http://localhost:3000','http://localhost:3001']
 
@@ -28,5 +59,17 @@ app = FastAPI()
 #     return {'message': 'Hello World!'}
 
 
+@root_router.get("/health")
+def health():
+    """
+    Liveness plus upstream state. "degraded" while any upstream circuit is
+    open or half-open: scrapes fail fast or are served stale.
+    """
+    return {
+        "status": "ok" if circuits.healthy else "degraded",
+        "circuits": {host: stats["state"] for host, stats in circuits.stats().items()},
+    }
+
+
 app.include_router((api_v1.route_v1))
 app.include_router(root_router)
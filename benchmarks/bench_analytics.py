@@ -0,0 +1,110 @@
+"""
+Property analytics benchmark.
+
+Generates synthetic stored properties (state, city, zip, price, beds, baths,
+sqft, with some fields missing) and times the vectorized PropertyFrame - the
+one-off load into NumPy arrays, then each grouping - against a row-by-row
+Python loop computing the same statistics. The two are checked to agree
+before any timing is reported.
+
+    python -m benchmarks.bench_analytics --rows 2000000
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from services.analytics import GROUPINGS, PropertyFrame, _level
+
+STATES = ("CA", "TX", "NY", "FL", "WA", "IL", "AZ", "CO", "GA", "NC")
+
+
+def synthetic_rows(count: int, zips: int, seed: int = 1) -> List[Tuple]:
+    rng = random.Random(seed)
+    places = []
+    for n in range(zips):
+        state = STATES[n % len(STATES)]
+        places.append((state, f"City {n % (zips // 8 or 1)}", f"{10000 + n:05d}"))
+    rows = []
+    for _ in range(count):
+        state, city, zip_code = places[int(rng.paretovariate(1.2)) % zips]
+        sqft = rng.randint(500, 5000) if rng.random() > 0.05 else None
+        price = round(rng.lognormvariate(13, 0.5), -3) if rng.random() > 0.02 else None
+        beds = float(rng.randint(1, 6)) if rng.random() > 0.03 else None
+        baths = rng.randint(2, 8) / 2 if rng.random() > 0.03 else None
+        rows.append((state, city, zip_code, price, beds, baths, sqft))
+    return rows
+
+
+def _summary(values: List[float]) -> Dict:
+    if not values:
+        return {"median": None, "mean": None}
+    return {"median": round(statistics.median(values), 2), "mean": round(sum(values) / len(values), 2)}
+
+
+def python_aggregate(rows: List[Tuple], by: str) -> List[Dict]:
+    """The notebook version: one pass collecting lists per group, then stats per group."""
+    column = GROUPINGS.index(by)
+    groups = defaultdict(lambda: {"price": [], "sqft": [], "price_per_sqft": [], "beds": Counter(), "baths": Counter(), "count": 0})
+    for state, city, zip_code, price, beds, baths, sqft in rows:
+        key = (state, f"{city}, {state}", zip_code)[column]
+        group = groups[key]
+        group["count"] += 1
+        if price is not None:
+            group["price"].append(price)
+        if sqft is not None:
+            group["sqft"].append(sqft)
+            if price is not None and sqft > 0:
+                group["price_per_sqft"].append(price / sqft)
+        if beds is not None:
+            group["beds"][beds] += 1
+        if baths is not None:
+            group["baths"][baths] += 1
+    results = []
+    for key, group in sorted(groups.items(), key=lambda item: -item[1]["count"]):
+        results.append({
+            by: key,
+            "count": group["count"],
+            **{name: _summary(group[name]) for name in ("price", "sqft", "price_per_sqft")},
+            **{name: {_level(value): n for value, n in sorted(group[name].items())} for name in ("beds", "baths")},
+        })
+    return results
+
+
+def _agree(vectorized: List[Dict], looped: List[Dict], by: str) -> bool:
+    # Ties in group size may come out in either order
+    return {row[by]: row for row in vectorized} == {row[by]: row for row in looped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--zips", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per grouping; the best is reported")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.zips)
+    started = time.perf_counter()
+    frame = PropertyFrame.from_rows(rows)
+    print(f"{args.rows} rows loaded into arrays in {time.perf_counter() - started:.2f}s (once per data change)\n")
+
+    print(f"{'group by':<9} {'groups':>7} {'numpy ms':>10} {'python ms':>10} {'speedup':>8}")
+    for by in GROUPINGS:
+        vectorized_times, looped_times = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            vectorized = frame.aggregate(by)
+            vectorized_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            looped = python_aggregate(rows, by)
+            looped_times.append(time.perf_counter() - started)
+        if not _agree(vectorized, looped, by):
+            raise SystemExit(f"vectorized and looped results differ when grouping by {by}")
+        fast, slow = min(vectorized_times), min(looped_times)
+        print(f"{by:<9} {len(vectorized):>7} {fast * 1000:>10.1f} {slow * 1000:>10.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
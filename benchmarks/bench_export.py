@@ -0,0 +1,114 @@
+"""
+Columnar export benchmark.
+
+Writes synthetic properties to a columnar export in several incremental
+snapshots, then times opening it (memory-mapping every column), the newest
+row per id, and a full-column computation, against parsing the same rows
+as a JSON list of AddressResponse objects. Sizes on disk are reported for
+both.
+
+    python -m benchmarks.bench_export --rows 10000000 --snapshots 4
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from core.config import settings
+from services.columnar_export import ColumnarWriter, latest_rows, open_export
+
+
+def synthetic_rows(start: int, count: int, rng: random.Random):
+    scraped = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for n in range(start, start + count):
+        # Some homes are scraped again in later snapshots
+        home = n if rng.random() > 0.1 else rng.randrange(n + 1)
+        zip_code = f"{90000 + home % 2000:05d}"
+        yield (
+            home,
+            f"https://www.redfin.com/CA/City-{home % 300}/{home}-Main-St-{zip_code}/home/{home}",
+            float(rng.randrange(200, 3000) * 1000),
+            float(rng.randint(1, 6)),
+            rng.randint(2, 8) / 2,
+            float(rng.randint(500, 5000)),
+            "CA",
+            f"City {home % 300}",
+            zip_code,
+            scraped + timedelta(seconds=n),
+        )
+
+
+def _size_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--snapshots", type=int, default=4)
+    parser.add_argument("--json-rows", type=int, default=1_000_000, help="rows in the JSON comparison")
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        per_snapshot = args.rows // args.snapshots
+        started = time.perf_counter()
+        for snapshot in range(args.snapshots):
+            writer = ColumnarWriter(directory)
+            rows = synthetic_rows(snapshot * per_snapshot, per_snapshot, rng)
+            while True:
+                chunk = [row for _, row in zip(range(settings.EXPORT_CHUNK), rows)]
+                if not chunk:
+                    break
+                writer.append(chunk)
+                last = chunk[-1]
+            writer.commit((last[-1], last[0]))
+            writer.close()
+        total = per_snapshot * args.snapshots
+        print(f"wrote {total} rows in {args.snapshots} snapshots in {time.perf_counter() - started:.1f}s, "
+              f"{_size_mb(directory):.0f} MB")
+
+        started = time.perf_counter()
+        columns = open_export(directory)
+        opened = time.perf_counter() - started
+        started = time.perf_counter()
+        latest = latest_rows(columns["id"])
+        deduped = time.perf_counter() - started
+        started = time.perf_counter()
+        price_per_sqft = float(np.nanmedian(columns["price"][latest] / columns["sqft"][latest]))
+        computed = time.perf_counter() - started
+        print(f"columnar: open {opened * 1000:.1f}ms, latest row per id {deduped:.2f}s "
+              f"({len(latest)} homes), median price/sqft {computed:.2f}s (= {price_per_sqft:.1f})")
+
+        rows = [
+            {
+                "id": str(row[0]), "redfin_url": row[1], "price": f"${row[2]:,.0f}",
+                "beds": f"{row[3]:g}", "baths": f"{row[4]:g}", "sqft": f"{row[5]:,.0f} sq ft",
+            }
+            for row in synthetic_rows(0, args.json_rows, rng)
+        ]
+        path = os.path.join(directory, "export.json")
+        with open(path, "w") as f:
+            json.dump(rows, f)
+        json_mb = os.path.getsize(path) / 2**20
+        del rows
+        started = time.perf_counter()
+        with open(path) as f:
+            loaded = json.load(f)
+        parsed = time.perf_counter() - started
+        started = time.perf_counter()
+        np.array([float(row["price"].lstrip("$").replace(",", "")) for row in loaded])
+        converted = time.perf_counter() - started
+        scale = total / args.json_rows
+        print(f"json: {args.json_rows} rows, {json_mb:.0f} MB, parse {parsed:.2f}s + price to numbers "
+              f"{converted:.2f}s; ~{(parsed + converted) * scale:.1f}s and ~{json_mb * scale:.0f} MB "
+              f"at {total} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Property-page extractor benchmark.
+
+Compares the original double-`find` BeautifulSoup code against the soup
+fallback, the single-pass lxml extractor, the structured-data fast path
+(JSON-LD, then inline JSON, then DOM) and the streaming extractor on the
+recorded fixture page, padded to a realistic multi-megabyte size. The
+streaming variant is fed the page in EXTRACTOR_CHUNK_BYTES chunks, as the
+upstream stream would deliver it, and stops once every field is found.
+Each variant runs in its own process so peak RSS is not shared between them.
+
+    python -m benchmarks.bench_extractor --pages 5 --size-mb 2
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from core.config import settings
+from services.extractor import (
+    IncrementalExtractor,
+    extract_property_details,
+    extract_with_lxml,
+    extract_with_soup,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "redfin_property.html")
+
+
+def legacy_extract(html):
+    """Verbatim copy of the pre-extractor scrape_redfin parsing."""
+    soup = BeautifulSoup(html, "html.parser")
+    details = {}
+    details["price"] = (
+        soup.find("div", {"data-rf-test-id": "abp-price"})
+        .find("div", {"class": "statsValue"})
+        .text.strip()
+        if soup.find("div", {"data-rf-test-id": "abp-price"})
+        else "Not Available"
+    )
+    details["beds"] = (
+        soup.find("div", {"data-rf-test-id": "abp-beds"})
+        .find("div", {"class": "statsValue"})
+        .text.strip()
+        if soup.find("div", {"data-rf-test-id": "abp-beds"})
+        else "Not Available"
+    )
+    details["baths"] = (
+        soup.find("div", {"data-rf-test-id": "abp-baths"})
+        .find("div", {"class": "statsValue"})
+        .text.strip()
+        if soup.find("div", {"data-rf-test-id": "abp-baths"})
+        else "Not Available"
+    )
+    details["sqft"] = (
+        soup.find("div", {"data-rf-test-id": "abp-sqFt"}).text.strip()
+        if soup.find("div", {"data-rf-test-id": "abp-sqFt"})
+        else "Not Available"
+    )
+    return details
+
+
+_bytes_read = {}
+
+
+def streaming_extract(page: bytes):
+    """Feed the page chunk by chunk, as the streamed response would."""
+    extractor = IncrementalExtractor()
+    size = settings.EXTRACTOR_CHUNK_BYTES
+    for start in range(0, len(page), size):
+        if extractor.feed(page[start:start + size]):
+            break
+    _bytes_read["lxml-streaming"] = extractor.bytes_fed
+    return extractor.close()
+
+
+VARIANTS = {
+    "legacy-soup": legacy_extract,
+    "soup-fallback": extract_with_soup,
+    "lxml-single-pass": extract_with_lxml,
+    "structured-data": extract_property_details,
+    "lxml-streaming": streaming_extract,
+}
+
+
+def load_page(size_mb: float) -> str:
+    with open(FIXTURE) as f:
+        html = f.read()
+    # Repeat the below-the-fold section until the page reaches the target size
+    head, marker, tail = html.partition("</section>")
+    section = head[head.index('<section id="propertyDetails-collapsible"'):]
+    body = section[section.index(">") + 1:]
+    repeats = max(int(size_mb * 1024 * 1024 / max(len(body), 1)), 1)
+    return head + body * repeats + marker + tail
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(name, html, pages, queue):
+    extract = VARIANTS[name]
+    if name == "lxml-streaming":
+        # Bytes stand in for the socket; they are never buffered as a page
+        html = html.encode("utf-8")
+    rss_before = _max_rss_mb()
+    extract(html)  # warm-up
+    started = time.perf_counter()
+    for _ in range(pages):
+        details = extract(html)
+    elapsed = time.perf_counter() - started
+    rss_growth = _max_rss_mb() - rss_before
+    # tracemalloc slows allocation heavily, so measure it on a separate pass
+    tracemalloc.start()
+    extract(html)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        "variant": name,
+        "ms_per_page": elapsed / pages * 1000,
+        "py_peak_mb": py_peak / 1024 / 1024,
+        "rss_growth_mb": rss_growth,
+        "kb_read": _bytes_read.get(name, len(html)) / 1024,
+        "details": details,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    html = load_page(args.size_mb)
+    print(f"page size: {len(html) / 1024 / 1024:.2f} MB, pages per variant: {args.pages}")
+    print(f"{'variant':<18} {'ms/page':>10} {'py peak MB':>11} {'RSS +MB':>9} {'KB read':>9}")
+
+    ctx = multiprocessing.get_context("spawn")
+    for name in VARIANTS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_variant, args=(name, html, args.pages, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        print(
+            f"{result['variant']:<18} {result['ms_per_page']:>10.1f} "
+            f"{result['py_peak_mb']:>11.1f} {result['rss_growth_mb']:>9.1f} "
+            f"{result['kb_read']:>9.0f}"
+        )
+        assert result["details"]["price"] == "$1,249,000", result["details"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+End-to-end load benchmark of the scraping endpoints.
+
+Starts benchmarks.mock_redfin and the API (uvicorn, pointed at the mock
+through REDFIN_BASE_URL) in their own processes, then drives
+/user/get-redfin-urls/web and /user/get-redfin-urls/scraping at each
+concurrency level. Every item uses a new address or home id so results
+measure scraping, not the cache. Reports requests and items per second,
+p50/p99 latency, failed items and the API process's RSS.
+
+`--save-baseline FILE` records the results; `--baseline FILE` compares
+against them and exits non-zero when throughput drops or p99 grows by
+more than `--tolerance`.
+
+    python -m benchmarks.bench_load --concurrency 1 8 32 --duration 10 --save-baseline load.json
+    python -m benchmarks.bench_load --concurrency 1 8 32 --duration 10 --baseline load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from api.dependencies import STATIC_SECRET_KEY
+from benchmarks import mock_redfin
+
+ENDPOINTS = ("web", "scraping")
+HEADERS = {"X-API-Key": STATIC_SECRET_KEY}
+FAILED = ("Error", "Timeout", "Not Found")
+FAILED_STATUS = ("error", "timeout", "not_found")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> Dict[str, float]:
+    """Current and peak RSS of `pid`, from /proc (Linux only)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return {"rss_mb": values.get("VmRSS", 0.0), "peak_rss_mb": values.get("VmHWM", 0.0)}
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def _payload(endpoint: str, ids, mock_url: str, batch_size: int) -> List[Dict]:
+    items = []
+    for _ in range(batch_size):
+        n = next(ids)
+        if endpoint == "web":
+            items.append({"id": str(n), "address": f"{n} Load Test St", "city": "Irvine", "state": "CA", "zip": "92620"})
+        else:
+            items.append({"id": str(n), "redfin_url": f"{mock_url}/CA/Mock/{n}-Load-Test-St/home/{n}"})
+    return items
+
+
+def _failed(endpoint: str, item: Dict) -> bool:
+    if endpoint == "web":
+        return item.get("redfin_url") in FAILED
+    return item.get("status") in FAILED_STATUS
+
+
+async def run_level(api_url: str, mock_url: str, endpoint: str, concurrency: int, args, ids) -> Dict:
+    latencies: List[float] = []
+    items = failed = errors = 0
+    stop_at = time.monotonic() + args.duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal items, failed, errors
+        while time.monotonic() < stop_at:
+            payload = _payload(endpoint, ids, mock_url, args.batch_size)
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{api_url}/user/get-redfin-urls/{endpoint}", json=payload)
+                response.raise_for_status()
+                results = response.json()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            items += len(results)
+            failed += sum(_failed(endpoint, item) for item in results)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    requests = len(latencies)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "rps": requests / elapsed,
+        "items_per_s": items / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[min(int(requests * 0.99), requests - 1)] * 1000 if latencies else 0.0,
+        "failed_items": failed,
+        "http_errors": errors,
+    }
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> bool:
+    """Print the change against `baseline`; returns whether anything regressed."""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline}
+    regressed = False
+    print(f"\n{'endpoint':<10} {'conc':>5} {'items/s Δ':>10} {'p99 Δ':>9}")
+    for result in results:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        throughput = result["items_per_s"] / before["items_per_s"] - 1 if before["items_per_s"] else 0.0
+        p99 = result["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        flag = throughput < -tolerance or p99 > tolerance
+        regressed |= flag
+        print(
+            f"{result['endpoint']:<10} {result['concurrency']:>5} {throughput:>+10.1%} "
+            f"{p99:>+9.1%}{'  REGRESSION' if flag else ''}"
+        )
+    return regressed
+
+
+async def run(args, api_url: str, mock_url: str, api_pid: int) -> List[Dict]:
+    await _wait_ready(f"{mock_url}/_stats")
+    await _wait_ready(f"{api_url}/health")
+    ids = itertools.count(int(time.time()) % 1_000_000 * 1000)
+    results = []
+    print(
+        f"{'endpoint':<10} {'conc':>5} {'req/s':>8} {'items/s':>9} {'p50 ms':>9} "
+        f"{'p99 ms':>9} {'failed':>7} {'RSS MB':>8} {'peak MB':>8}"
+    )
+    for endpoint in args.endpoints:
+        for concurrency in args.concurrency:
+            result = await run_level(api_url, mock_url, endpoint, concurrency, args, ids)
+            result.update(_rss_mb(api_pid))
+            results.append(result)
+            print(
+                f"{endpoint:<10} {concurrency:>5} {result['rps']:>8.1f} {result['items_per_s']:>9.1f} "
+                f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                f"{result['failed_items'] + result['http_errors']:>7} "
+                f"{result['rss_mb']:>8.1f} {result['peak_rss_mb']:>8.1f}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--batch-size", type=int, default=5, help="items per request")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="extra API settings")
+    parser.add_argument("--save-baseline", metavar="FILE")
+    parser.add_argument("--baseline", metavar="FILE")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    mock_redfin.add_arguments(parser)
+    args = parser.parse_args()
+
+    mock_port, api_port = _free_port(), _free_port()
+    mock_url, api_url = f"http://127.0.0.1:{mock_port}", f"http://127.0.0.1:{api_port}"
+    mock_cmd = [
+        sys.executable, "-m", "benchmarks.mock_redfin", "--port", str(mock_port),
+        "--latency", args.latency, "--error-rate", str(args.error_rate),
+        "--accepted-rate", str(args.accepted_rate), "--size-mb", str(args.size_mb),
+    ]
+    env = {
+        **os.environ,
+        "REDFIN_BASE_URL": mock_url,
+        # Measure scraping, not Postgres or a cache left by an earlier run
+        "PROPERTY_STORE_ENABLED": "false",
+        "CACHE_L2_PATH": "",
+        "JOB_WORKER_IN_APP": "false",
+    }
+    env.update(item.split("=", 1) for item in args.app_env)
+    api_cmd = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(api_port), "--log-level", "warning"]
+
+    mock = subprocess.Popen(mock_cmd)
+    # The endpoints print per item; keep the report readable
+    api = subprocess.Popen(api_cmd, env=env, stdout=subprocess.DEVNULL)
+    try:
+        results = asyncio.run(run(args, api_url, mock_url, api.pid))
+    finally:
+        api.terminate()
+        mock.terminate()
+        api.wait()
+        mock.wait()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nbaseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Local stand-in for the Redfin endpoints the scrape path calls.
+
+Serves the location-autocomplete API (`{}&&`-prefixed JSON pointing at a
+home id derived from the query) and the recorded property page fixture
+for every `/.../home/<id>` URL. Latency, error and 202 rates are
+configurable so throughput can be measured without touching the real
+site. Run the app with REDFIN_BASE_URL set to this server's address.
+
+    python -m benchmarks.mock_redfin --port 8765 --latency lognormal:80 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+from collections import Counter
+from typing import Callable, Dict
+
+from aiohttp import web
+
+from benchmarks.bench_extractor import load_page
+
+
+def latency_sampler(spec: str) -> Callable[[], float]:
+    """
+    Parse a latency distribution into a sampler returning seconds:
+    `fixed:MS`, `uniform:LO-HI`, `exponential:MEAN` or
+    `lognormal:MEDIAN[:SIGMA]`, all in milliseconds. `0` disables latency.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind in ("0", "none"):
+        return lambda: 0.0
+    if kind == "fixed":
+        ms = float(arg)
+        return lambda: ms / 1000
+    if kind == "uniform":
+        low, high = (float(x) for x in arg.split("-"))
+        return lambda: random.uniform(low, high) / 1000
+    if kind == "exponential":
+        mean = float(arg)
+        return lambda: random.expovariate(1 / mean) / 1000
+    if kind == "lognormal":
+        median, _, sigma = arg.partition(":")
+        mu, sigma = math.log(float(median)), float(sigma or 0.5)
+        return lambda: random.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def home_id(location: str) -> int:
+    return int.from_bytes(hashlib.blake2b(location.encode(), digest_size=4).digest(), "big")
+
+
+def autocomplete_body(location: str) -> bytes:
+    slug = "-".join(location.replace(",", " ").split()) or "unknown"
+    payload = {
+        "payload": {
+            "sections": [{"rows": [{"url": f"/CA/Mock/{slug}/home/{home_id(location)}"}]}]
+        }
+    }
+    return b"{}&&" + json.dumps(payload).encode()
+
+
+class MockRedfin:
+    def __init__(self, page: bytes, latency: Callable[[], float], error_rate: float, accepted_rate: float):
+        self.page = page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.accepted_rate = accepted_rate
+        self.requests: Counter = Counter()
+
+    async def _delay_or_fail(self, kind: str):
+        self.requests[kind] += 1
+        await asyncio.sleep(self.latency())
+        roll = random.random()
+        if roll < self.error_rate:
+            self.requests["503"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        if roll < self.error_rate + self.accepted_rate:
+            self.requests["202"] += 1
+            return web.Response(status=202, text="")
+        return None
+
+    async def autocomplete(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail("autocomplete")
+        if failed is not None:
+            return failed
+        body = autocomplete_body(request.query.get("location", ""))
+        return web.Response(body=body, content_type="application/json")
+
+    async def detail(self, request: web.Request) -> web.Response:
+        failed = await self._delay_or_fail("detail")
+        if failed is not None:
+            return failed
+        return web.Response(body=self.page, content_type="text/html")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.requests))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/stingray/do/location-autocomplete", self.autocomplete)
+        app.router.add_get("/_stats", self.stats)
+        app.router.add_get(r"/{path:.*}/home/{id:\d+}", self.detail)
+        return app
+
+
+def build(args) -> MockRedfin:
+    page = load_page(args.size_mb).encode("utf-8")
+    return MockRedfin(page, latency_sampler(args.latency), args.error_rate, args.accepted_rate)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="lognormal:50", help="fixed:MS, uniform:LO-HI, exponential:MEAN or lognormal:MEDIAN[:SIGMA]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--accepted-rate", type=float, default=0.0, help="share of requests answered 202")
+    parser.add_argument("--size-mb", type=float, default=0.5, help="property page size")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build(args).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import os
+import tempfile
+from typing import Dict
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -10,6 +12,138 @@ class Settings(BaseSettings):
     REFRESH_SECRET_KEY: str = os.getenv('REFRESH_SECRET_KEY','1f4cd5d9-504f-443e-9f85-181a1ed230d0')
     ALGORITHM: str = os.getenv('ALGORITHM','HS256')
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Authenticated users cached per process (see services/principal_cache.py);
+    # writes through crud.user evict at once, other processes see them
+    # within AUTH_CACHE_TTL_SECONDS
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_CACHE_MAX: int = 10000
+
+    # Shared upstream HTTP client (see core/http_client.py)
+    UPSTREAM_MAX_CONNECTIONS: int = 200
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST: int = 50
+    UPSTREAM_KEEPALIVE_SECONDS: float = 30.0
+    UPSTREAM_DNS_CACHE_SECONDS: int = 300
+    UPSTREAM_TIMEOUT_SECONDS: float = 15.0
+    UPSTREAM_HTTP2: bool = False
+    # Scheme and host the scrape path talks to; point it at
+    # benchmarks/mock_redfin.py to load test without the real site
+    REDFIN_BASE_URL: str = "https://www.redfin.com"
+
+    # Scrape scheduler (see services/scheduler.py)
+    SCRAPE_MAX_IN_FLIGHT_PER_HOST: int = 8
+    SCRAPE_HOST_LIMITS: Dict[str, int] = {}
+    # Priority lanes: SCRAPE_INTERACTIVE_RESERVED of each host's slots are
+    # kept for interactive requests unless that lane is idle, and freed
+    # slots go to waiting lanes by SCRAPE_LANE_WEIGHTS. API keys listed in
+    # SCRAPE_KEY_LANES default to that lane; `?priority=` overrides it
+    SCRAPE_INTERACTIVE_RESERVED: float = 0.25
+    SCRAPE_LANE_WEIGHTS: Dict[str, int] = {"interactive": 4, "bulk": 1}
+    SCRAPE_KEY_LANES: Dict[str, str] = {}
+
+    # Retries and deadlines for the scrape path (see services/retry.py);
+    # the deadline is per API request, or per row/job item for bulk work
+    RETRY_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 8.0
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN: int = 10
+    SCRAPE_DEADLINE_SECONDS: float = 60.0
+    # Circuit breaker per upstream host (see services/circuit_breaker.py):
+    # opens when CIRCUIT_ERROR_RATE of the calls in the last
+    # CIRCUIT_WINDOW_SECONDS failed, with at least CIRCUIT_MIN_CALLS calls
+    CIRCUIT_ERROR_RATE: float = 0.5
+    CIRCUIT_MIN_CALLS: int = 20
+    CIRCUIT_WINDOW_SECONDS: float = 30.0
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+    # Hedged autocomplete lookups (see services/hedging.py): a second
+    # request once the first has run past HEDGE_PERCENTILE of that
+    # endpoint's recent latency, for at most HEDGE_MAX_RATIO of lookups
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_MAX_RATIO: float = 0.1
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_WINDOW: int = 500
+    HEDGE_MIN_DELAY_SECONDS: float = 0.05
+
+    # Property page extraction: embedded JSON-LD/inline JSON first when
+    # EXTRACTOR_STRUCTURED, then the DOM with "lxml" (single pass) or
+    # "soup". Streaming (lxml only) parses detail pages as they download
+    # and stops reading once every field is found, bypassing the parse pool
+    EXTRACTOR_STRUCTURED: bool = True
+    EXTRACTOR_BACKEND: str = "lxml"
+    EXTRACTOR_STREAMING: bool = False
+    EXTRACTOR_CHUNK_BYTES: int = 8 * 1024
+
+    # Process pool for HTML parsing (see services/parse_executor.py);
+    # 0 workers parses inline, 0 max pending means 4 per worker
+    PARSE_WORKERS: int = 2
+    PARSE_MAX_PENDING: int = 0
+
+    # Property cache (see services/property_cache.py); empty L2 path disables L2
+    CACHE_L1_MAXSIZE: int = 10000
+    CACHE_L1_TTL_SECONDS: int = 300
+    CACHE_TTL_SECONDS: int = 86400
+    CACHE_NEGATIVE_TTL_SECONDS: int = 600
+    CACHE_L2_PATH: str = os.path.join(tempfile.gettempdir(), "hms-property-cache.sqlite3")
+    # ETag/Last-Modified and content hash per detail page (see services/revalidation.py)
+    CACHE_VALIDATOR_TTL_SECONDS: int = 30 * 86400
+
+    # Persisted scrape results (see services/property_store.py)
+    PROPERTY_STORE_ENABLED: bool = True
+    PROPERTY_MAX_AGE_SECONDS: int = 7 * 86400
+    PROPERTY_UPSERT_CHUNK: int = 500
+    PROPERTY_FLUSH_SECONDS: float = 2.0
+    PROPERTY_RETRY_SECONDS: float = 30.0
+
+    # Grouped statistics over the property table (see services/analytics.py)
+    ANALYTICS_CHECK_SECONDS: float = 30.0
+    ANALYTICS_LOAD_CHUNK: int = 100000
+
+    # Columnar property export (see services/columnar_export.py)
+    EXPORT_DIR: str = os.path.join(tempfile.gettempdir(), "hms-property-export")
+    EXPORT_SETTLE_SECONDS: float = 60.0
+    EXPORT_CHUNK: int = 100000
+
+    # Refresh-ahead (see services/refresher.py): details read at least
+    # REFRESH_MIN_HITS times (decaying with a REFRESH_DECAY_SECONDS
+    # half-life) are re-scraped in the last REFRESH_AHEAD_FRACTION of their
+    # cache TTL; during REFRESH_QUIET_HOURS ("start-end", local hours) rows
+    # older than REFRESH_STALE_DAYS are re-scraped too. Both at no more than
+    # REFRESH_RATE_PER_SECOND, in the bulk lane. A failed refresh is retried
+    # after REFRESH_RETRY_SECONDS; a stale row whose re-scrape failed
+    # REFRESH_SWEEP_MAX_FAILURES times is left out of later sweeps
+    REFRESH_ENABLED: bool = True
+    REFRESH_INTERVAL_SECONDS: float = 30.0
+    REFRESH_AHEAD_FRACTION: float = 0.2
+    REFRESH_MIN_HITS: float = 3.0
+    REFRESH_DECAY_SECONDS: float = 3600.0
+    REFRESH_TRACK_MAX: int = 50000
+    REFRESH_RATE_PER_SECOND: float = 2.0
+    REFRESH_RETRY_SECONDS: float = 60.0
+    REFRESH_STALE_DAYS: int = 14
+    REFRESH_SWEEP_CHUNK: int = 100
+    REFRESH_SWEEP_MAX_FAILURES: int = 3
+    REFRESH_QUIET_HOURS: str = "1-5"
+
+    # Durable scrape jobs (see services/job_worker.py)
+    JOB_WORKER_IN_APP: bool = False
+    JOB_WORKER_CONCURRENCY: int = 20
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    # Items whose scrape came back "Error"/"Timeout" are queued again after
+    # JOB_RETRY_DELAY_SECONDS times the attempts used so far
+    JOB_RETRY_DELAY_SECONDS: float = 5.0
+
+    # Address-to-details pipeline (see services/pipeline.py)
+    PIPELINE_LOOKUP_WORKERS: int = 16
+    PIPELINE_FETCH_WORKERS: int = 16
+    PIPELINE_PARSE_WORKERS: int = 4
+    PIPELINE_QUEUE_SIZE: int = 100
+
+    # Rows looked up concurrently by the CSV ingest (see services/csv_ingest.py)
+    CSV_WINDOW: int = 200
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import aiohttp
+import httpx
+
+from core.config import settings
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream request fails or returns a non-2xx status."""
+
+    def __init__(self, url: str, status: Optional[int] = None, message: str = ""):
+        self.url = url
+        self.status = status
+        super().__init__(message or f"Upstream error {status} from {url}")
+
+
+class UpstreamResponse:
+    """Status, headers and raw body of a completed upstream request."""
+
+    __slots__ = ("url", "status", "headers", "content")
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def encoding(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for part in content_type.split(";"):
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip('"')
+        return "utf-8"
+
+    def raise_for_status(self) -> None:
+        if not 200 <= self.status < 300:
+            raise UpstreamError(self.url, self.status)
+
+
+class UpstreamStream(UpstreamResponse):
+    """
+    An upstream response whose body is read chunk by chunk instead of being
+    buffered; `content` stays empty. Leaving the `stream()` block before
+    the body is exhausted closes the connection.
+    """
+
+    __slots__ = ("_chunks", "bytes_read", "complete")
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], chunks: AsyncIterator[bytes]):
+        super().__init__(url, status, headers, b"")
+        self._chunks = chunks
+        self.bytes_read = 0
+        self.complete = False
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+        self.complete = True
+
+
+class UpstreamClient:
+    """
+    Process-wide pooled HTTP client for every upstream (Redfin) request.
+
+    Opened by the FastAPI lifespan in app.py and shared by all handlers so
+    DNS lookups, TCP connects and TLS handshakes are paid once per pooled
+    connection instead of once per request. HTTP/1.1 goes through aiohttp
+    (per-host limits, DNS cache); `UPSTREAM_HTTP2` switches to httpx.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._http2: Optional[httpx.AsyncClient] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None or self._http2 is not None
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.started:
+                return
+            if settings.UPSTREAM_HTTP2:
+                self._http2 = httpx.AsyncClient(
+                    http2=True,
+                    follow_redirects=True,
+                    timeout=settings.UPSTREAM_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(
+                        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST,
+                        keepalive_expiry=settings.UPSTREAM_KEEPALIVE_SECONDS,
+                    ),
+                )
+            else:
+                connector = aiohttp.TCPConnector(
+                    limit=settings.UPSTREAM_MAX_CONNECTIONS,
+                    limit_per_host=settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST,
+                    ttl_dns_cache=settings.UPSTREAM_DNS_CACHE_SECONDS,
+                    keepalive_timeout=settings.UPSTREAM_KEEPALIVE_SECONDS,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=settings.UPSTREAM_TIMEOUT_SECONDS),
+                )
+            logging.info(
+                f"Upstream client started (http2={settings.UPSTREAM_HTTP2})"
+            )
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+            if self._http2 is not None:
+                await self._http2.aclose()
+                self._http2 = None
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> UpstreamResponse:
+        """GET `url` over the shared pool. Transport failures raise UpstreamError."""
+        if not self.started:
+            # Scripts and CLI entry points run without the app lifespan
+            await self.start()
+        try:
+            if self._http2 is not None:
+                response = await self._http2.get(url, headers=headers)
+                return UpstreamResponse(
+                    url, response.status_code, dict(response.headers), response.content
+                )
+            async with self._session.get(url, headers=headers) as response:
+                content = await response.read()
+                return UpstreamResponse(
+                    url,
+                    response.status,
+                    {k.lower(): v for k, v in response.headers.items()},
+                    content,
+                )
+        except (aiohttp.ClientError, httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise UpstreamError(url, message=f"Error fetching {url}: {e!r}") from e
+
+    @asynccontextmanager
+    async def stream(
+        self, url: str, headers: Optional[Dict[str, str]] = None, chunk_size: int = 16 * 1024
+    ) -> AsyncIterator[UpstreamStream]:
+        """
+        GET `url` and yield the response before its body is read, for
+        callers that consume the body incrementally and may stop early.
+        """
+        if not self.started:
+            await self.start()
+        try:
+            if self._http2 is not None:
+                async with self._http2.stream("GET", url, headers=headers) as response:
+                    yield UpstreamStream(
+                        url, response.status_code, dict(response.headers),
+                        response.aiter_bytes(chunk_size),
+                    )
+                return
+            async with self._session.get(url, headers=headers) as response:
+                try:
+                    yield UpstreamStream(
+                        url,
+                        response.status,
+                        {k.lower(): v for k, v in response.headers.items()},
+                        response.content.iter_chunked(chunk_size),
+                    )
+                finally:
+                    if not response.content.at_eof():
+                        # Unread body: drop the connection rather than
+                        # return it to the pool or drain the rest
+                        response.close()
+        except (aiohttp.ClientError, httpx.HTTPError, asyncio.TimeoutError) as e:
+            raise UpstreamError(url, message=f"Error fetching {url}: {e!r}") from e
+
+
+upstream = UpstreamClient()
@@ -43,23 +43,24 @@ def decode_access_token(token):
     return payload
 
 
+# Paths served without an Authorization header
+ALLOW_URLS = frozenset([
+    "/docs",
+    "/openapi.json",
+    "/auth/login",
+    "/auth/register",
+    "/auth/forgot-password",
+    "/auth/verify-forgot-password-token",
+    "/auth/refresh-token",
+])
+
+
+def is_unauthorized_path(path: str) -> bool:
+    return path.startswith("/static") or path in ALLOW_URLS
+
+
 def is_unauthorized_url(request: Request):
-    allow_urls = [
-        "/docs",
-        "/openapi.json",
-        "/auth/login",
-        "/auth/register",
-        "/auth/forgot-password",
-        "/auth/verify-forgot-password-token",
-        "/auth/refresh-token",
-    ]
-    current_url = request.url.path
-    if current_url.startswith("/static"):
-        return True
-
-    if current_url in allow_urls:
-        return True
-    return False
+    return is_unauthorized_path(request.url.path)
 
 
 def get_token(header):
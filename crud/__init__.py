@@ -1 +1,3 @@
-from .crud_user import user
\ No newline at end of file
+from .crud_user import user
+from .crud_scrape_job import scrape_job
+from .crud_property import property
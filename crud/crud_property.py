@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from sqlalchemy import case, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from crud.base import CRUDBase
+from models.property import Property
+from schemas.property import PropertyUpsert
+
+DETAIL_COLUMNS = (
+    "redfin_url", "price", "beds", "baths", "sqft",
+    "price_value", "beds_value", "baths_value", "sqft_value",
+    "state", "city", "zip", "scraped_at",
+)
+ANALYTICS_COLUMNS = (
+    "state", "city", "zip", "price_value", "beds_value", "baths_value", "sqft_value",
+)
+EXPORT_COLUMNS = (
+    "id", "redfin_url", "price_value", "beds_value", "baths_value", "sqft_value",
+    "state", "city", "zip", "scraped_at",
+)
+
+
+class CRUDProperty(CRUDBase[Property, PropertyUpsert, PropertyUpsert]):
+    def get_fresh(self, db: Session, *, ids: Iterable[int], max_age_seconds: int) -> List[Property]:
+        """Rows for `ids` scraped within the last `max_age_seconds`."""
+        ids = list(ids)
+        if not ids:
+            return []
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+        return (
+            db.query(Property)
+            .filter(Property.id.in_(ids), Property.scraped_at >= cutoff)
+            .all()
+        )
+
+    def get_stale(
+        self, db: Session, *, older_than_seconds: int, after_id: int = 0, limit: int = 100
+    ) -> List[Property]:
+        """
+        Up to `limit` rows last scraped more than `older_than_seconds` ago,
+        by id after `after_id`, for walking the table in chunks.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+        return (
+            db.query(Property)
+            .filter(Property.id > after_id, Property.scraped_at < cutoff)
+            .order_by(Property.id)
+            .limit(limit)
+            .all()
+        )
+
+    def data_version(self, db: Session) -> Tuple[int, Any]:
+        """
+        Row count and newest data change. modified_date only moves when a
+        row's details change, not when it is re-scraped unchanged or touched.
+        """
+        count, modified = db.query(
+            func.count(Property.id),
+            func.max(func.coalesce(Property.modified_date, Property.created_date)),
+        ).one()
+        return count, modified
+
+    def iter_analytics_rows(self, db: Session, *, chunk_size: int = 100000) -> Iterator[List[Tuple]]:
+        """
+        ANALYTICS_COLUMNS of every row, `chunk_size` rows at a time, through a
+        server-side cursor so the whole table is never held as ORM objects.
+        """
+        stmt = select(*(getattr(Property, column) for column in ANALYTICS_COLUMNS))
+        result = db.execute(stmt.execution_options(yield_per=chunk_size, stream_results=True))
+        for partition in result.partitions():
+            yield partition
+
+    def get_modified_between(
+        self, db: Session, *, after: Tuple[datetime, int], before: datetime, limit: int = 100000
+    ) -> List[Tuple]:
+        """
+        EXPORT_COLUMNS plus modified_date of up to `limit` rows with
+        (modified_date, id) after `after` and modified_date before `before`,
+        in that order, so the last row is the key for the next page.
+        """
+        return (
+            db.query(*(getattr(Property, column) for column in EXPORT_COLUMNS), Property.modified_date)
+            .filter(
+                tuple_(Property.modified_date, Property.id) > tuple_(*after),
+                Property.modified_date < before,
+            )
+            .order_by(Property.modified_date, Property.id)
+            .limit(limit)
+            .all()
+        )
+
+    def upsert_many(self, db: Session, *, rows: List[Dict[str, Any]], chunk_size: int = 500) -> int:
+        """
+        Insert or refresh properties with one multi-row
+        INSERT ... ON CONFLICT (id) DO UPDATE per `chunk_size` rows, all in a
+        single transaction. A row must not repeat an id within `rows`.
+        modified_date is stamped by the database on insert and whenever the
+        details change; the columnar export pages on it.
+        """
+        data_columns = [column for column in DETAIL_COLUMNS if column != "scraped_at"]
+        for start in range(0, len(rows), chunk_size):
+            chunk = [{**row, "modified_date": func.now()} for row in rows[start:start + chunk_size]]
+            stmt = insert(Property).values(chunk)
+            changed = tuple_(*(getattr(Property, column) for column in data_columns)).is_distinct_from(
+                tuple_(*(stmt.excluded[column] for column in data_columns))
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Property.id],
+                set_={
+                    **{column: stmt.excluded[column] for column in DETAIL_COLUMNS},
+                    "modified_date": case((changed, func.now()), else_=Property.modified_date),
+                },
+            )
+            db.execute(stmt)
+        db.commit()
+        return len(rows)
+
+    def touch_many(self, db: Session, *, ids: List[int], chunk_size: int = 500) -> int:
+        """
+        Mark rows as scraped now without rewriting their details. Setting
+        modified_date to itself keeps its onupdate from firing.
+        """
+        touched = 0
+        for start in range(0, len(ids), chunk_size):
+            touched += db.execute(
+                update(Property)
+                .where(Property.id.in_(ids[start:start + chunk_size]))
+                .values(scraped_at=func.now(), modified_date=Property.modified_date)
+            ).rowcount
+        db.commit()
+        return touched
+
+
+property = CRUDProperty(Property)
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.orm import Session
+from crud.base import CRUDBase
+from models.scrape_job import (
+    DONE,
+    FAILED,
+    PENDING,
+    RUNNING,
+    ScrapeJob,
+    ScrapeJobItem,
+)
+from schemas.job import ScrapeJobCreate
+
+
+class CRUDScrapeJob(CRUDBase[ScrapeJob, ScrapeJobCreate, ScrapeJobCreate]):
+    def create(self, db: Session, *, obj_in: ScrapeJobCreate, created_by=None) -> ScrapeJob:
+        db_obj = ScrapeJob(kind=obj_in.kind, total_items=len(obj_in.items), created_by=created_by)
+        db.add(db_obj)
+        db.flush()
+        if obj_in.items:
+            db.execute(
+                insert(ScrapeJobItem),
+                [
+                    {"job_id": db_obj.id, "position": position, "input": item, "state": PENDING}
+                    for position, item in enumerate(obj_in.items)
+                ],
+            )
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def count_by_state(self, db: Session, *, job_id: int) -> Dict[str, int]:
+        rows = (
+            db.query(ScrapeJobItem.state, func.count(ScrapeJobItem.id))
+            .filter(ScrapeJobItem.job_id == job_id)
+            .group_by(ScrapeJobItem.state)
+            .all()
+        )
+        return {state: count for state, count in rows}
+
+    def get_results(
+        self, db: Session, *, job_id: int, skip: int = 0, limit: int = 100
+    ) -> List[ScrapeJobItem]:
+        return (
+            db.query(ScrapeJobItem)
+            .filter(ScrapeJobItem.job_id == job_id, ScrapeJobItem.state.in_((DONE, FAILED)))
+            .order_by(ScrapeJobItem.position)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def claim_items(
+        self, db: Session, *, worker: str, limit: int, lease_seconds: int, max_attempts: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Claim up to `limit` runnable items for `worker`. Rows locked by other
+        workers are skipped (FOR UPDATE SKIP LOCKED), so any number of
+        workers can poll concurrently. Pending items wait until their
+        `available_at`. Items whose lease expired - their worker crashed -
+        are claimed again, until they have used up `max_attempts`; finished
+        items never are.
+        """
+        now = datetime.now(timezone.utc)
+        rows = (
+            db.query(ScrapeJobItem, ScrapeJob.kind)
+            .join(ScrapeJob, ScrapeJob.id == ScrapeJobItem.job_id)
+            .filter(
+                or_(
+                    (ScrapeJobItem.state == PENDING)
+                    & or_(ScrapeJobItem.available_at.is_(None), ScrapeJobItem.available_at <= now),
+                    (ScrapeJobItem.state == RUNNING)
+                    & (ScrapeJobItem.claimed_at < now - timedelta(seconds=lease_seconds)),
+                )
+            )
+            .order_by(ScrapeJobItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=ScrapeJobItem)
+            .all()
+        )
+        claimed = []
+        for item, kind in rows:
+            if item.attempts >= max_attempts:
+                item.state = FAILED
+                item.claimed_at = None
+                item.error = f"Gave up after {item.attempts} attempts"
+                continue
+            item.state = RUNNING
+            item.claimed_by = worker
+            item.claimed_at = now
+            item.attempts += 1
+            claimed.append(
+                {"id": item.id, "job_id": item.job_id, "kind": kind,
+                 "input": item.input, "attempts": item.attempts}
+            )
+        db.commit()
+        return claimed
+
+    def finish_item(
+        self,
+        db: Session,
+        *,
+        id: int,
+        worker: str,
+        state: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the outcome of a claimed item. Only the current claimant can
+        finish it, so a worker whose lease was taken over cannot overwrite
+        the newer attempt.
+        """
+        updated = db.execute(
+            update(ScrapeJobItem)
+            .where(
+                ScrapeJobItem.id == id,
+                ScrapeJobItem.claimed_by == worker,
+                ScrapeJobItem.state == RUNNING,
+            )
+            .values(state=state, result=result, error=error, claimed_at=None)
+        ).rowcount
+        db.commit()
+        return updated == 1
+
+    def retry_item(
+        self, db: Session, *, id: int, worker: str, error: Optional[str] = None, delay_seconds: float = 0
+    ) -> bool:
+        """
+        Put a claimed item whose attempt failed back in the queue, claimable
+        again after `delay_seconds`. Unlike `release_items` the attempt still
+        counts towards `max_attempts`.
+        """
+        available_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        updated = db.execute(
+            update(ScrapeJobItem)
+            .where(
+                ScrapeJobItem.id == id,
+                ScrapeJobItem.claimed_by == worker,
+                ScrapeJobItem.state == RUNNING,
+            )
+            .values(
+                state=PENDING, claimed_by=None, claimed_at=None, error=error, available_at=available_at
+            )
+        ).rowcount
+        db.commit()
+        return updated == 1
+
+    def release_items(self, db: Session, *, ids: List[int], worker: str) -> None:
+        """Hand unfinished items back to the queue, e.g. on worker shutdown."""
+        if not ids:
+            return
+        db.execute(
+            update(ScrapeJobItem)
+            .where(
+                ScrapeJobItem.id.in_(ids),
+                ScrapeJobItem.claimed_by == worker,
+                ScrapeJobItem.state == RUNNING,
+            )
+            .values(
+                state=PENDING,
+                claimed_by=None,
+                claimed_at=None,
+                attempts=ScrapeJobItem.attempts - 1,
+            )
+        )
+        db.commit()
+
+
+scrape_job = CRUDScrapeJob(ScrapeJob)
@@ -7,10 +7,15 @@ from crud.base import CRUDBase
 from models.user import User
 from db.base_class import Base
 from schemas.user import UserCreate, UserUpdate
+from services.principal_cache import principal_cache
 ModelType = TypeVar("ModelType", bound=Base)
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def _changed(self, id: Any) -> None:
+        # The auth middleware caches users by id
+        principal_cache.evict(id)
+
     def get(self, db: Session, id: Any) -> Optional[User]:
         return db.query(User).filter(User.id == id).first()
 
@@ -33,6 +38,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._changed(db_obj.id)
         return db_obj
 
     def update(
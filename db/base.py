@@ -2,4 +2,6 @@
 # imported by Alembic
 from db.base_class import Base  # noqa
 from db.base_class import BaseDefault  # noqa
-from models.user import User
\ No newline at end of file
+from models.user import User
+from models.scrape_job import ScrapeJob, ScrapeJobItem
+from models.property import Property
@@ -1,53 +1,72 @@
-from core.security import is_unauthorized_url
+import asyncio
+from core.security import is_unauthorized_path
 from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.requests import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 import crud
 from db.database import SessionLocal
+from services.principal_cache import principal_cache
 from services.user_service import decode_access_token, get_user_by_email_active
 
 
-class AuthMiddleWare(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if is_unauthorized_url(request):
-            return await call_next(request)
+def _load_user(user_id):
+    db = SessionLocal()
+    try:
+        user = crud.user.get_by_id(db=db, id=user_id)
+        if user:
+            # Detached, so the cached copy never lazy-loads through a closed session
+            db.expunge(user)
+        return user
+    finally:
+        db.close()
 
-        token = request.headers.get("Authorization", None)
-        print(token)
-        if token == None:
-            return JSONResponse(
-                content={"detail": "Authentication header missing"},
-                status_code=(status.HTTP_401_UNAUTHORIZED),
+
+class AuthMiddleWare:
+    """
+    Resolves the bearer token of every request outside the allow-list
+    (core.security.ALLOW_URLS and /static) to a user, stored as
+    `request.state.current_user`, and answers 401/404 otherwise.
+
+    A plain ASGI middleware: unlike BaseHTTPMiddleware it does not run the
+    app in a separate task or re-wrap the response stream, so streaming
+    responses and background tasks pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, detail: str, status_code: int):
+        response = JSONResponse(content={"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or is_unauthorized_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        token = Headers(scope=scope).get("Authorization")
+        if token is None:
+            await self._reject(
+                scope, receive, send, "Authentication header missing", status.HTTP_401_UNAUTHORIZED
             )
+            return
         claim = decode_access_token(token)
-        if claim == None:
-            return JSONResponse(
-                content={"detail": "Please check authentication token."},
-                status_code=(status.HTTP_401_UNAUTHORIZED),
+        user_id = claim.get("id") if claim is not None else None
+        if user_id is None:
+            await self._reject(
+                scope, receive, send, "Please check authentication token.", status.HTTP_401_UNAUTHORIZED
             )
-        user_id = claim.get("id", None)
-        if user_id == None:
-            return JSONResponse(
-                content={"detail": "Please check authentication token."},
-                status_code=(status.HTTP_401_UNAUTHORIZED),
-            )
-        db = None
-        try:
-            try:
-                db = SessionLocal()
-                user = crud.user.get_by_id(db=db, id=user_id)
-                if not user:
-                    return JSONResponse(
-                        content={"detail": "User not found."},
-                        status_code=(status.HTTP_404_NOT_FOUND),
-                    )
-                request.state.current_user = user
-            except Exception as e:
-                raise e
-
-        finally:
-            if db != None:
-                db.close()
-
-        return await call_next(request)
+            return
+
+        user = principal_cache.get(user_id)
+        if user is None:
+            version = principal_cache.version()
+            user = await asyncio.to_thread(_load_user, user_id)
+            if not user:
+                await self._reject(scope, receive, send, "User not found.", status.HTTP_404_NOT_FOUND)
+                return
+            principal_cache.put(user_id, user, version)
+        # What request.state reads
+        scope.setdefault("state", {})["current_user"] = user
+        await self.app(scope, receive, send)
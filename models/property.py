@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, Integer, String
+from db.base_class import Base
+
+
+class Property(Base):
+    # Redfin home id, the number in ".../home/<id>"
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    redfin_url = Column((String(512)), nullable=False)
+    price = Column((String(32)), nullable=True)
+    beds = Column((String(32)), nullable=True)
+    baths = Column((String(32)), nullable=True)
+    sqft = Column((String(32)), nullable=True)
+    # The same fields as numbers (USD, count, count, square feet)
+    price_value = Column(BigInteger, nullable=True)
+    beds_value = Column(Float, nullable=True)
+    baths_value = Column(Float, nullable=True)
+    sqft_value = Column(Integer, nullable=True)
+    # Location from the Redfin URL path, for grouping in analytics
+    state = Column((String(2)), nullable=True)
+    city = Column((String(128)), nullable=True)
+    zip = Column((String(10)), nullable=True)
+    scraped_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_property_scraped_at", "scraped_at"),
+        # Export watermark (services/columnar_export.py)
+        Index("ix_property_modified_date_id", "modified_date", "id"),
+    )
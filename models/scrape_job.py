@@ -0,0 +1,40 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from db.base_class import Base
+
+# ScrapeJobItem.state values
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# ScrapeJob.kind values
+ADDRESS = "address"
+URL = "url"
+
+
+class ScrapeJob(Base):
+    id = Column(Integer, primary_key=True)
+    kind = Column((String(16)), nullable=False)
+    total_items = Column(Integer, nullable=False)
+    created_by = Column(Integer, nullable=True)
+
+
+class ScrapeJobItem(Base):
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("scrapejob.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    input = Column(JSONB, nullable=False)
+    state = Column((String(16)), nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_by = Column((String(64)), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    # A retried item is not claimed again before this
+    available_at = Column(DateTime(timezone=True), nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column((String(256)), nullable=True)
+
+    __table_args__ = (
+        Index("ix_scrapejobitem_state_id", "state", "id"),
+        Index("ix_scrapejobitem_job_id_position", "job_id", "position"),
+    )
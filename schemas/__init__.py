@@ -1 +1 @@
-from .user import AddressRequest, AddressResponse, PropertyDetailsResponse
+from .user import AddressRequest, AddressResponse, PropertyDetailsResponse, TypedAddressResponse
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class ScrapeJobCreate(BaseModel):
+    kind: str
+    items: List[Dict[str, Any]]
+
+
+class JobCreated(BaseModel):
+    job_id: int
+    total_items: int
+
+
+class JobStatus(BaseModel):
+    id: int
+    kind: str
+    state: str
+    total_items: int
+    pending: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+    created_date: Optional[datetime] = None
+
+
+class JobResultPage(BaseModel):
+    job_id: int
+    skip: int
+    limit: int
+    items: List[Dict[str, Any]]
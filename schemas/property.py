@@ -0,0 +1,33 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+
+class PropertyStatus(str, Enum):
+    OK = "ok"                        # every field scraped
+    PARTIAL = "partial"              # some fields missing from the page
+    NOT_AVAILABLE = "not_available"  # page scraped, no field found
+    NOT_FOUND = "not_found"          # no Redfin listing for the address
+    ERROR = "error"
+    TIMEOUT = "timeout"
+
+
+class PropertyUpsert(BaseModel):
+    id: int
+    redfin_url: str
+    price: Optional[str] = None
+    beds: Optional[str] = None
+    baths: Optional[str] = None
+    sqft: Optional[str] = None
+    price_value: Optional[int] = None
+    beds_value: Optional[float] = None
+    baths_value: Optional[float] = None
+    sqft_value: Optional[int] = None
+    state: Optional[str] = None
+    city: Optional[str] = None
+    zip: Optional[str] = None
+    scraped_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
+from schemas.property import PropertyStatus
+
 
 class UserBase(BaseModel):
     first_name: Optional[str] = None
@@ -73,7 +75,26 @@ class AddressResponse(BaseModel):
     beds: str
     baths: str
     sqft: str
+    # cached, stored, fetched, revalidated, unchanged or refetched
+    freshness: Optional[str] = None
+
+
+class TypedAddressResponse(BaseModel):
+    id: str
+    redfin_url: str
+    status: PropertyStatus
+    price: Optional[int] = None
+    beds: Optional[float] = None
+    baths: Optional[float] = None
+    sqft: Optional[int] = None
+    freshness: Optional[str] = None
+
 
 class URlResponse(BaseModel):
     id: str
-    redfin_url: str
\ No newline at end of file
+    redfin_url: str
+
+
+class URLRes(BaseModel):
+    id: str
+    redfin_url: str
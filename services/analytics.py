@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import crud
+from core.config import settings
+from db.database import SessionLocal
+from services.property_store import property_store
+
+GROUPINGS = ("state", "city", "zip")
+
+
+def factorize(
+    labels: Iterable[Optional[str]], size: int, index: Optional[Dict[str, int]] = None
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Integer code per row and the distinct labels in first-seen order;
+    missing labels get code -1. A dict lookup per row, no sort. Passing the
+    same `index` for successive chunks keeps their codes consistent.
+    """
+    index = {} if index is None else index
+    codes = np.fromiter(
+        (-1 if label is None else index.setdefault(label, len(index)) for label in labels),
+        dtype=np.int32,
+        count=size,
+    )
+    return codes, list(index)
+
+
+class _Metric:
+    """A numeric column (NaN where missing) and the row order that sorts it."""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        present = np.flatnonzero(~np.isnan(values))
+        # Sorted once per load; each grouping then only needs a stable
+        # (radix) sort of its integer codes to get values sorted per group
+        self.order = present[np.argsort(values[present], kind="stable")]
+
+    def grouped(self, codes: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+        rows = self.order[codes[self.order] >= 0]
+        keys = codes[rows]
+        if groups <= 1 << 16:
+            # NumPy radix-sorts 16-bit keys, several times faster than int32
+            keys = keys.astype(np.uint16)
+        rows = rows[np.argsort(keys, kind="stable")]
+        group_of, values = codes[rows], self.values[rows]
+        counts = np.bincount(group_of, minlength=groups)
+        sums = np.bincount(group_of, weights=values, minlength=groups)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        has = counts > 0
+        mean = np.full(groups, np.nan)
+        median = np.full(groups, np.nan)
+        mean[has] = sums[has] / counts[has]
+        low, high = starts[has] + (counts[has] - 1) // 2, starts[has] + counts[has] // 2
+        median[has] = (values[low] + values[high]) / 2
+        return {"count": counts, "mean": mean, "median": median}
+
+
+class _Distribution:
+    """A small-valued column (beds, baths) as a code into its distinct values."""
+
+    def __init__(self, values: np.ndarray):
+        present = ~np.isnan(values)
+        self.levels, inverse = np.unique(values[present], return_inverse=True)
+        self.codes = np.full(len(values), -1, dtype=np.int32)
+        self.codes[present] = inverse
+
+    def grouped(self, codes: np.ndarray, groups: int) -> np.ndarray:
+        """Row count per (group, level), shape (groups, levels)."""
+        levels = len(self.levels)
+        rows = (codes >= 0) & (self.codes >= 0)
+        cells = codes[rows].astype(np.int64) * levels + self.codes[rows]
+        return np.bincount(cells, minlength=groups * levels).reshape(groups, levels)
+
+
+def _level(value: float) -> str:
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _number(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+class PropertyFrame:
+    """
+    The numeric property columns as NumPy arrays, with integer group codes
+    per state, city and zip, for vectorized grouped aggregation.
+    """
+
+    def __init__(
+        self,
+        groups: Dict[str, Tuple[np.ndarray, List[str]]],
+        price: np.ndarray,
+        beds: np.ndarray,
+        baths: np.ndarray,
+        sqft: np.ndarray,
+    ):
+        self.size = len(price)
+        # grouping -> (code per row, labels)
+        self.groups = groups
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_per_sqft = np.where(sqft > 0, price / sqft, np.nan)
+        self.metrics = {
+            "price": _Metric(price),
+            "sqft": _Metric(sqft),
+            "price_per_sqft": _Metric(price_per_sqft),
+        }
+        self.distributions = {"beds": _Distribution(beds), "baths": _Distribution(baths)}
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Sequence[Tuple]]) -> "PropertyFrame":
+        """
+        Build from chunks of (state, city, zip, price, beds, baths, sqft)
+        tuples. Each chunk is turned into arrays before the next is read, so
+        only one chunk is ever held as Python objects.
+        """
+        indexes: Dict[str, Dict[str, int]] = {by: {} for by in GROUPINGS}
+        codes: Dict[str, List[np.ndarray]] = {by: [] for by in GROUPINGS}
+        numeric: List[List[np.ndarray]] = [[] for _ in range(4)]
+        for chunk in chunks:
+            if not chunk:
+                continue
+            state, city, zip_code, *values = zip(*chunk)
+            # City names repeat across states, so cities are grouped with theirs
+            cities = (
+                None if c is None or s is None else f"{c}, {s}" for c, s in zip(city, state)
+            )
+            for by, labels in (("state", state), ("city", cities), ("zip", zip_code)):
+                codes[by].append(factorize(labels, len(chunk), indexes[by])[0])
+            for parts, column in zip(numeric, values):
+                parts.append(np.array(column, dtype=np.float64))
+        def join(parts: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        groups = {by: (join(codes[by], np.int32), list(indexes[by])) for by in GROUPINGS}
+        return cls(groups, *(join(parts, np.float64) for parts in numeric))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "PropertyFrame":
+        """Build from (state, city, zip, price, beds, baths, sqft) tuples."""
+        return cls.from_chunks([rows])
+
+    def aggregate(self, by: str) -> List[Dict[str, Any]]:
+        """Per-group count, price and price/sqft stats and bed/bath counts, largest first."""
+        codes, labels = self.groups[by]
+        groups = len(labels)
+        counts = np.bincount(codes[codes >= 0], minlength=groups)
+        metrics = {name: metric.grouped(codes, groups) for name, metric in self.metrics.items()}
+        distributions = {
+            name: (dist.levels, dist.grouped(codes, groups))
+            for name, dist in self.distributions.items()
+        }
+        results = []
+        for group in np.argsort(-counts, kind="stable"):
+            results.append({
+                by: labels[group],
+                "count": int(counts[group]),
+                **{
+                    name: {
+                        "median": _number(stats["median"][group]),
+                        "mean": _number(stats["mean"][group]),
+                    }
+                    for name, stats in metrics.items()
+                },
+                **{
+                    name: {
+                        _level(levels[level]): int(table[group, level])
+                        for level in np.flatnonzero(table[group])
+                    }
+                    for name, (levels, table) in distributions.items()
+                },
+            })
+        return results
+
+
+class PropertyAnalytics:
+    """
+    Grouped statistics over every stored property.
+
+    The property table is loaded into a PropertyFrame and every grouping is
+    computed off the event loop, so requests are answered from finished
+    results. The table is checked for new data after a write by this
+    process's property store, and otherwise at most every
+    ANALYTICS_CHECK_SECONDS; when its row count or newest data change (see
+    crud.property.data_version; touches and unchanged re-scrapes don't
+    count) has moved the results are rebuilt in the background, and the previous ones are
+    served until the new ones are ready.
+    """
+
+    def __init__(self):
+        self._results: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._version: Any = None
+        self._generation = -1
+        self._checked_at = 0.0
+        self._rebuilding: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.properties = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.errors = 0
+
+    def _load_version(self) -> Any:
+        db = SessionLocal()
+        try:
+            return crud.property.data_version(db)
+        finally:
+            db.close()
+
+    def _build(self) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+        db = SessionLocal()
+        try:
+            frame = PropertyFrame.from_chunks(
+                crud.property.iter_analytics_rows(db, chunk_size=settings.ANALYTICS_LOAD_CHUNK)
+            )
+        finally:
+            db.close()
+        return frame.size, {by: frame.aggregate(by) for by in GROUPINGS}
+
+    async def _rebuild(self, version: Any) -> None:
+        started = time.perf_counter()
+        try:
+            properties, results = await asyncio.to_thread(self._build)
+        except Exception as e:
+            self.errors += 1
+            # Check again on the next request
+            self._checked_at = 0.0
+            logging.error(f"Property analytics rebuild failed: {e}")
+            return
+        self.build_seconds = time.perf_counter() - started
+        self.builds += 1
+        self.properties = properties
+        self._results, self._version = results, version
+        logging.info(f"Analytics over {properties} properties rebuilt in {self.build_seconds:.2f}s")
+
+    async def _check(self) -> None:
+        """Start a rebuild when the table changed since the results were built."""
+        now = time.monotonic()
+        if self._generation == property_store.generation and now - self._checked_at < settings.ANALYTICS_CHECK_SECONDS:
+            return
+        if self._rebuilding is not None and not self._rebuilding.done():
+            return
+        self._generation, self._checked_at = property_store.generation, now
+        version = await asyncio.to_thread(self._load_version)
+        if self._results is None or version != self._version:
+            self._rebuilding = asyncio.create_task(self._rebuild(version))
+
+    async def grouped(self, by: str) -> List[Dict[str, Any]]:
+        """Statistics per `by` group (state, city or zip), largest group first."""
+        async with self._lock:
+            await self._check()
+        if self._results is None and self._rebuilding is not None:
+            # Nothing to serve yet: wait for the first build
+            await asyncio.shield(self._rebuilding)
+        if self._results is None:
+            raise RuntimeError("property analytics are not available")
+        return self._results[by]
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self._results is not None,
+            "rebuilding": self._rebuilding is not None and not self._rebuilding.done(),
+            "properties": self.properties,
+            "builds": self.builds,
+            "build_seconds": self.build_seconds,
+            "errors": self.errors,
+        }
+
+
+property_analytics = PropertyAnalytics()
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Tuple
+from urllib.parse import urlsplit
+
+from core.config import settings
+from core.http_client import UpstreamError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(UpstreamError):
+    """The upstream's circuit is open; the call was not made."""
+
+    def __init__(self, url: str, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(url, None, f"Circuit open for {url}, retrying in {retry_in:.1f}s")
+
+
+def upstream_failure(error: BaseException) -> bool:
+    """
+    Whether `error` says the upstream is unhealthy: transport errors,
+    timeouts, 202, 429 and 5xx. A 404 is a healthy answer.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, UpstreamError):
+        return error.status is None or error.status in (202, 429) or error.status >= 500
+    return isinstance(error, asyncio.TimeoutError)
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one upstream.
+
+    Closed, every call goes through and its outcome is kept for
+    CIRCUIT_WINDOW_SECONDS. Once at least CIRCUIT_MIN_CALLS calls in the
+    window failed at CIRCUIT_ERROR_RATE or worse the circuit opens and
+    calls fail fast with CircuitOpenError for CIRCUIT_OPEN_SECONDS. Then it
+    is half-open: CIRCUIT_HALF_OPEN_PROBES calls are let through, and it
+    closes when they all succeed or opens again on the first failure.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        horizon = now - settings.CIRCUIT_WINDOW_SECONDS
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            _, ok = self._outcomes.popleft()
+            self._failures -= not ok
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.opened += 1
+        logging.warning(f"Circuit for {self.name} opened")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        logging.info(f"Circuit for {self.name} closed")
+
+    def acquire(self, url: str) -> bool:
+        """
+        Admit one call, raising CircuitOpenError if the circuit is open or
+        every half-open probe is taken. Returns whether the call is a probe.
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            retry_in = self._opened_at + settings.CIRCUIT_OPEN_SECONDS - now
+            if retry_in > 0:
+                self.rejected += 1
+                raise CircuitOpenError(url, retry_in)
+            self.state = HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                self.rejected += 1
+                raise CircuitOpenError(url, 0.0)
+            self._probes += 1
+            return True
+        return False
+
+    def record(self, ok: bool, probe: bool) -> None:
+        now = time.monotonic()
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            if not ok:
+                self._open(now)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                self._close()
+            return
+        if self.state != CLOSED:
+            return  # a call admitted before the circuit opened
+        self._outcomes.append((now, ok))
+        self._failures += not ok
+        self._trim(now)
+        calls = len(self._outcomes)
+        if calls >= settings.CIRCUIT_MIN_CALLS and self._failures / calls >= settings.CIRCUIT_ERROR_RATE:
+            self._open(now)
+
+    def release(self, probe: bool) -> None:
+        """Give back a probe slot whose call ended without an outcome (cancelled)."""
+        if probe and self.state == HALF_OPEN:
+            self._probes -= 1
+
+    def stats(self) -> Dict:
+        self._trim(time.monotonic())
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "error_rate": self._failures / calls if calls else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitRegistry:
+    """One CircuitBreaker per upstream host."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc.lower()
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    @asynccontextmanager
+    async def guard(self, url: str):
+        """
+        Run one upstream call through its host's breaker: fail fast while
+        open, and count the call's outcome when it ends.
+        """
+        breaker = self.for_url(url)
+        probe = breaker.acquire(url)
+        try:
+            yield
+        except asyncio.CancelledError:
+            breaker.release(probe)
+            raise
+        except Exception as e:
+            breaker.record(not upstream_failure(e), probe)
+            raise
+        breaker.record(True, probe)
+
+    @property
+    def healthy(self) -> bool:
+        return all(breaker.state == CLOSED for breaker in self._breakers.values())
+
+    def stats(self) -> Dict:
+        return {host: breaker.stats() for host, breaker in self._breakers.items()}
+
+
+circuits = CircuitRegistry()
@@ -0,0 +1,302 @@
+"""
+Columnar export of the property table.
+
+Each column is one file: a 64-byte header (magic, format version, NumPy
+dtype, row count) followed by the raw little-endian array, so a reader
+maps it with `numpy.memmap` and uses it without parsing. Exports are
+incremental: every run appends the rows whose details changed since the
+previous one, paging on the database-stamped (modified_date, id), and
+records the new watermark in manifest.json. A home whose details change
+is appended again - one revalidated unchanged is not - and `latest_rows`
+keeps the newest row per id.
+
+    python -m services.columnar_export --dir /data/property-export
+"""
+import argparse
+import fcntl
+import json
+import logging
+import os
+import struct
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+import crud
+from core.config import settings
+from db.database import SessionLocal
+
+MAGIC = b"HMSC"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+# magic, version, header size, dtype string, rows
+_HEADER = struct.Struct("<4sHH16sQ")
+MANIFEST = "manifest.json"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# (column, dtype). Missing numbers are NaN; city is a code into the
+# manifest's "cities" list (-1 when unknown); redfin_url_end holds the end
+# offset of each row's URL in redfin_url_bytes.
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "<i8"),
+    ("scraped_at", "<i8"),  # microseconds since the epoch, UTC
+    ("price", "<f8"),
+    ("beds", "<f4"),
+    ("baths", "<f4"),
+    ("sqft", "<f4"),
+    ("state", "|S2"),
+    ("zip", "|S5"),
+    ("city", "<i4"),
+    ("redfin_url_end", "<i8"),
+    ("redfin_url_bytes", "|u1"),
+)
+
+
+class ExportFormatError(Exception):
+    pass
+
+
+def column_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.col")
+
+
+def read_header(path: str) -> Tuple[np.dtype, int]:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ExportFormatError(f"{path}: truncated header")
+    magic, version, header_size, dtype, rows = _HEADER.unpack_from(raw)
+    if magic != MAGIC or version != FORMAT_VERSION or header_size != HEADER_SIZE:
+        raise ExportFormatError(f"{path}: not a version {FORMAT_VERSION} column file")
+    return np.dtype(dtype.rstrip(b"\0").decode()), rows
+
+
+def _write_header(f, dtype: str, rows: int) -> None:
+    f.seek(0)
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE, dtype.encode(), rows).ljust(HEADER_SIZE, b"\0"))
+
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class ColumnarWriter:
+    """
+    Appends rows to the column files of one export directory. Nothing is
+    visible to readers until `commit`, which rewrites the headers and then
+    the manifest; a crash before that leaves the previous export intact,
+    and the next writer cuts off whatever was half-written.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = load_manifest(directory) or {
+            "format": FORMAT_VERSION,
+            "rows": 0,
+            "watermark": None,
+            "cities": [],
+            "columns": {name: {"file": f"{name}.col", "dtype": dtype} for name, dtype in COLUMNS},
+            "snapshots": [],
+        }
+        self._cities = {city: code for code, city in enumerate(self.manifest["cities"])}
+        self._rows = self.manifest["rows"]
+        self._url_bytes = 0
+        self._files = {}
+        for name, dtype in COLUMNS:
+            path = column_path(directory, name)
+            f = open(path, "r+b" if os.path.exists(path) else "w+b")
+            committed = self._committed_length(name)
+            if not os.path.getsize(path):
+                _write_header(f, dtype, 0)
+            # Drop anything appended after the last commit
+            f.truncate(HEADER_SIZE + committed * np.dtype(dtype).itemsize)
+            f.seek(0, os.SEEK_END)
+            self._files[name] = f
+            if name == "redfin_url_bytes":
+                self._url_bytes = committed
+
+    def _committed_length(self, name: str) -> int:
+        if name != "redfin_url_bytes":
+            return self.manifest["rows"]
+        if not self.manifest["rows"]:
+            return 0
+        ends = open_column(self.directory, "redfin_url_end", self.manifest["rows"])
+        return int(ends[-1])
+
+    def _city_code(self, city: Optional[str]) -> int:
+        if city is None:
+            return -1
+        code = self._cities.get(city)
+        if code is None:
+            code = self._cities[city] = len(self._cities)
+            self.manifest["cities"].append(city)
+        return code
+
+    def append(self, rows: Sequence[Tuple]) -> None:
+        """
+        Append (id, redfin_url, price, beds, baths, sqft, state, city, zip,
+        scraped_at) tuples.
+        """
+        if not rows:
+            return
+        ids, urls, price, beds, baths, sqft, state, city, zip_code, scraped_at = zip(*rows)
+        encoded = [url.encode() for url in urls]
+        ends = self._url_bytes + np.cumsum([len(url) for url in encoded], dtype=np.int64)
+        columns = {
+            "id": np.array(ids, dtype="<i8"),
+            "scraped_at": np.array([_micros(value) for value in scraped_at], dtype="<i8"),
+            "price": np.array(price, dtype="<f8"),
+            "beds": np.array(beds, dtype="<f4"),
+            "baths": np.array(baths, dtype="<f4"),
+            "sqft": np.array(sqft, dtype="<f4"),
+            "state": np.array([value or "" for value in state], dtype="|S2"),
+            "zip": np.array([value or "" for value in zip_code], dtype="|S5"),
+            "city": np.array([self._city_code(value) for value in city], dtype="<i4"),
+            "redfin_url_end": ends,
+        }
+        for name, values in columns.items():
+            self._files[name].write(values.tobytes())
+        self._files["redfin_url_bytes"].write(b"".join(encoded))
+        self._rows += len(rows)
+        self._url_bytes = int(ends[-1])
+
+    def commit(self, watermark: Optional[Tuple[datetime, int]]) -> Dict[str, Any]:
+        """Publish the appended rows; `watermark` is the last exported (modified_date, id)."""
+        added = self._rows - self.manifest["rows"]
+        for name, dtype in COLUMNS:
+            f = self._files[name]
+            _write_header(f, dtype, self._url_bytes if name == "redfin_url_bytes" else self._rows)
+            f.flush()
+            os.fsync(f.fileno())
+        if added:
+            self.manifest["snapshots"].append({
+                "created": datetime.now(timezone.utc).isoformat(),
+                "first_row": self.manifest["rows"],
+                "rows": added,
+            })
+        self.manifest["rows"] = self._rows
+        if watermark is not None:
+            self.manifest["watermark"] = {"modified": watermark[0].isoformat(), "id": watermark[1]}
+        tmp = os.path.join(self.directory, f"{MANIFEST}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directory, MANIFEST))
+        return self.manifest
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def open_column(directory: str, name: str, rows: Optional[int] = None) -> np.ndarray:
+    """Memory-map one column, read-only; `rows` limits it to a committed length."""
+    path = column_path(directory, name)
+    dtype, length = read_header(path)
+    length = length if rows is None else min(rows, length)
+    if not length:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(length,))
+
+
+def open_export(directory: str) -> Dict[str, np.ndarray]:
+    """Every column of an export, memory-mapped, as of its manifest."""
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise ExportFormatError(f"{directory}: no {MANIFEST}")
+    columns = {name: open_column(directory, name, manifest["rows"]) for name, _ in COLUMNS if name != "redfin_url_bytes"}
+    ends = columns["redfin_url_end"]
+    columns["redfin_url_bytes"] = open_column(directory, "redfin_url_bytes", int(ends[-1]) if len(ends) else 0)
+    return columns
+
+
+def latest_rows(ids: np.ndarray) -> np.ndarray:
+    """Index of the last row for every id, in row order."""
+    reversed_ids = ids[::-1]
+    _, first = np.unique(reversed_ids, return_index=True)
+    return np.sort(len(ids) - 1 - first)
+
+
+def _watermark(manifest: Dict[str, Any]) -> Optional[Tuple[datetime, int]]:
+    watermark = manifest["watermark"]
+    if watermark is None:
+        return None
+    # Exports written before paging on modified_date kept scraped_at, which
+    # is never earlier than the modified_date of the same write
+    stamp = watermark.get("modified") or watermark["scraped_at"]
+    return datetime.fromisoformat(stamp), watermark["id"]
+
+
+def _iter_new_rows(since: Optional[Tuple[datetime, int]]):
+    db = SessionLocal()
+    try:
+        # Database clock, like modified_date itself
+        before = db.scalar(select(func.now())) - timedelta(seconds=settings.EXPORT_SETTLE_SECONDS)
+        after = since or (EPOCH, 0)
+        while True:
+            rows = crud.property.get_modified_between(
+                db, after=after, before=before, limit=settings.EXPORT_CHUNK
+            )
+            if not rows:
+                return
+            yield rows
+            after = (rows[-1].modified_date, rows[-1].id)
+    finally:
+        db.close()
+
+
+def export_properties(directory: str) -> Dict[str, Any]:
+    """
+    Append rows changed since the last export to `directory` and return
+    the new manifest. Rows modified less than EXPORT_SETTLE_SECONDS ago
+    wait for the next run, since a flush that started before them may not
+    have committed yet.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        # One writer per directory, across processes
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        writer = ColumnarWriter(directory)
+        try:
+            last = None
+            for rows in _iter_new_rows(_watermark(writer.manifest)):
+                # The trailing modified_date is only the paging key
+                writer.append([tuple(row)[:-1] for row in rows])
+                last = (rows[-1].modified_date, rows[-1].id)
+            return writer.commit(last)
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append changed properties to a columnar export.")
+    parser.add_argument("--dir", default=settings.EXPORT_DIR, help="export directory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    before = (load_manifest(args.dir) or {}).get("rows", 0)
+    try:
+        manifest = export_properties(args.dir)
+    except ExportFormatError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Done! {manifest['rows'] - before} rows appended, {manifest['rows']} in '{args.dir}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
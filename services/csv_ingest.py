@@ -0,0 +1,170 @@
+"""
+Bulk CSV address lookup.
+
+Reads a CSV with the Address, City, State, Zip columns (the layout the old
+util/redifinProperty.py script used), runs each row through the
+address-to-details pipeline and writes the same rows back with the Redfin
+URL and detail columns added. Rows are parsed and written as a stream with
+a bounded window in flight, so memory stays flat for any file size.
+
+    python -m services.csv_ingest addresses.csv -o redfin_results.csv
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import io
+import logging
+import sys
+import uuid
+from collections import deque
+from typing import AsyncIterator, Iterable, Iterator, List
+
+from core.config import settings
+from core.http_client import upstream
+from schemas.user import AddressRequest
+from services.parse_executor import parse_executor
+from services.pipeline import address_pipeline
+from services.property_store import property_store
+from services.retry import RetryBudget, scope as retry_scope
+from services.scheduler import BULK, scheduler
+
+INPUT_COLUMNS = ["Address", "City", "State", "Zip"]
+ADDED_COLUMNS = ["Redfin URL", "Price", "Beds", "Baths", "Sqft"]
+CHUNK_SIZE = 64 * 1024
+
+
+class CSVFormatError(ValueError):
+    pass
+
+
+def iter_csv_records(chunks: Iterable[bytes]) -> Iterator[List[str]]:
+    """
+    Incrementally decode byte chunks into CSV records. A record is complete
+    once its quote count is even, so quoted fields may contain newlines.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    record: List[str] = []
+    quotes = 0
+
+    def take(line: str):
+        nonlocal quotes
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            return None
+        text = "\n".join(record)
+        record.clear()
+        quotes = 0
+        if not text.strip():
+            return None
+        return next(csv.reader([text]))
+
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            row = take(line.rstrip("\r"))
+            if row is not None:
+                yield row
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        row = take(buffer.rstrip("\r"))
+        if row is not None:
+            yield row
+    if record:
+        # Unterminated quote: parse what is left rather than dropping it
+        yield next(csv.reader(["\n".join(record)]))
+
+
+def _format_row(row: List[str]) -> str:
+    out = io.StringIO()
+    csv.writer(out).writerow(row)
+    return out.getvalue()
+
+
+async def enrich_csv(
+    records: Iterator[List[str]], window: int = None, lane: str = BULK
+) -> AsyncIterator[str]:
+    """
+    Yield the output CSV, header first, one line per input row and in input
+    order. At most `window` rows are being looked up at any time, all in
+    one scheduler batch in `lane`. Rows share one retry budget, and each row gets
+    SCRAPE_DEADLINE_SECONDS from when its lookup starts.
+    """
+    window = window or settings.CSV_WINDOW
+    batch = f"csv-{uuid.uuid4().hex[:8]}"
+    budget = RetryBudget()
+    header = next(records, None)
+    if header is None:
+        return
+    lowered = [name.strip().lower() for name in header]
+    try:
+        indexes = [lowered.index(name.lower()) for name in INPUT_COLUMNS]
+    except ValueError:
+        raise CSVFormatError(f"CSV header must contain {', '.join(INPUT_COLUMNS)}")
+    added = [lowered.index(name.lower()) if name.lower() in lowered else None for name in ADDED_COLUMNS]
+    out_header = header + [name for name, index in zip(ADDED_COLUMNS, added) if index is None]
+    yield _format_row(out_header)
+
+    def merge(row: List[str], result: dict) -> List[str]:
+        values = [result["redfin_url"], result["price"], result["beds"], result["baths"], result["sqft"]]
+        row = row + [""] * (len(header) - len(row))
+        for index, value in zip(added, values):
+            if index is not None:
+                row[index] = value
+        return row + [value for index, value in zip(added, values) if index is None]
+
+    pending = deque()
+    try:
+        for number, row in enumerate(records, start=1):
+            fields = [row[i].strip() if i < len(row) else "" for i in indexes]
+            address = AddressRequest(id=str(number), address=fields[0], city=fields[1], state=fields[2], zip=fields[3])
+            with scheduler.batch(batch, lane=lane), retry_scope(settings.SCRAPE_DEADLINE_SECONDS, budget=budget):
+                task = asyncio.ensure_future(address_pipeline.process(address))
+            pending.append((row, task))
+            if len(pending) >= window:
+                row, task = pending.popleft()
+                yield _format_row(merge(row, await task))
+        while pending:
+            row, task = pending.popleft()
+            yield _format_row(merge(row, await task))
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+async def _run_file(source: str, destination: str) -> int:
+    rows = 0
+    try:
+        with open(source, "rb") as infile, open(destination, "w", newline="") as outfile:
+            chunks = iter(lambda: infile.read(CHUNK_SIZE), b"")
+            async for line in enrich_csv(iter_csv_records(chunks)):
+                outfile.write(line)
+                rows += 1
+    finally:
+        await address_pipeline.stop()
+        await property_store.stop()
+        parse_executor.shutdown()
+        await upstream.close()
+    return max(rows - 1, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add Redfin URLs and details to an address CSV.")
+    parser.add_argument("input", help="CSV with Address, City, State, Zip columns")
+    parser.add_argument("-o", "--output", default="redfin_results.csv")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        rows = asyncio.run(_run_file(args.input, args.output))
+    except CSVFormatError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Done! {rows} rows saved to '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup
+
+from core.config import settings
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional, soup is the fallback
+    etree = None
+
+NOT_AVAILABLE = "Not Available"
+
+# field name -> data-rf-test-id of the stat block on a property page
+STAT_FIELDS = {
+    "price": "abp-price",
+    "beds": "abp-beds",
+    "baths": "abp-baths",
+    "sqft": "abp-sqFt",
+}
+# Fields whose value lives in a nested `div.statsValue`; the rest use the
+# whole text of the stat block
+STATS_VALUE_FIELDS = {"price", "beds", "baths"}
+# Bytes after the last stat marker that still belong to the stats region
+REGION_TAIL = 512
+
+# Which path produced a page's details; mixed when more than one of them
+# supplied the fields served
+SOURCE_JSON_LD = "json_ld"
+SOURCE_INLINE_JSON = "inline_json"
+SOURCE_DOM = "dom"
+SOURCE_MIXED = "mixed"
+
+# field -> schema.org key paths tried in order, on any object of the JSON-LD
+JSON_LD_PATHS = {
+    "price": (("offers", "price"), ("price",)),
+    "beds": (("numberOfBedrooms",),),
+    "baths": (("numberOfBathroomsTotal",), ("numberOfBathrooms",)),
+    "sqft": (("floorSize", "value"),),
+}
+# field -> key path inside the page's inline "addressSectionInfo" state
+INLINE_JSON_PATHS = {
+    "price": ("priceInfo", "amount"),
+    "beds": ("beds",),
+    "baths": ("baths",),
+    "sqft": ("sqFt", "value"),
+}
+_JSON_LD_SCRIPT = re.compile(
+    rb"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", re.S | re.I
+)
+_INLINE_STATE_KEY = b'"addressSectionInfo":'
+# Upper bound on the inline state object decoded, in bytes
+_INLINE_STATE_WINDOW = 64 * 1024
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").replace("$", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def format_field(field: str, value: Any) -> Optional[str]:
+    """Render a structured-data value the way the page shows it in the DOM."""
+    number = _number(value)
+    if number is None or number < 0:
+        return None
+    if field == "price":
+        return f"${number:,.0f}"
+    if field == "sqft":
+        return f"{number:,.0f} sq ft"
+    return f"{number:g}"
+
+
+def _lookup(data: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def fields_from_json_ld(data: Any, found: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Collect the stat fields from a decoded JSON-LD document, depth first."""
+    found = {} if found is None else found
+    stack = [data]
+    while stack and len(found) < len(JSON_LD_PATHS):
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            for field, paths in JSON_LD_PATHS.items():
+                if field in found:
+                    continue
+                for path in paths:
+                    value = format_field(field, _lookup(node, path))
+                    if value is not None:
+                        found[field] = value
+                        break
+            stack.extend(reversed([v for v in node.values() if isinstance(v, (dict, list))]))
+    return found
+
+
+def _fields_from_inline_state(html: bytes) -> Dict[str, str]:
+    start = html.find(_INLINE_STATE_KEY)
+    if start < 0:
+        return {}
+    start += len(_INLINE_STATE_KEY)
+    window = html[start:start + _INLINE_STATE_WINDOW].decode("utf-8", errors="replace")
+    try:
+        state, _ = json.JSONDecoder().raw_decode(window.lstrip())
+    except ValueError:
+        return {}
+    found = {}
+    for field, path in INLINE_JSON_PATHS.items():
+        value = format_field(field, _lookup(state, path))
+        if value is not None:
+            found[field] = value
+    return found
+
+
+def extract_structured(html: Union[str, bytes]) -> Tuple[Dict[str, str], str]:
+    """
+    Stat fields from the page's embedded structured data - JSON-LD first,
+    then the inline app state - without parsing the DOM. Returns the fields
+    found (possibly not all of them) and which source supplied them: json_ld,
+    inline_json, mixed for both, or "" for none.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    found: Dict[str, str] = {}
+    sources = []
+    for match in _JSON_LD_SCRIPT.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        before = len(found)
+        fields_from_json_ld(data, found)
+        if len(found) > before and SOURCE_JSON_LD not in sources:
+            sources.append(SOURCE_JSON_LD)
+        if len(found) == len(STAT_FIELDS):
+            return found, SOURCE_JSON_LD
+    for field, value in _fields_from_inline_state(html).items():
+        if field not in found:
+            found[field] = value
+            if SOURCE_INLINE_JSON not in sources:
+                sources.append(SOURCE_INLINE_JSON)
+    if len(sources) > 1:
+        return found, SOURCE_MIXED
+    return found, sources[0] if sources else ""
+
+
+def merge_fields(dom: Dict[str, str], structured: Dict[str, str]) -> Dict[str, str]:
+    """DOM details with any field the DOM lacked taken from structured data."""
+    return {
+        field: structured.get(field, value) if value == NOT_AVAILABLE else value
+        for field, value in dom.items()
+    }
+
+
+def dom_source(dom: Dict[str, str], structured: Dict[str, str]) -> str:
+    """SOURCE_MIXED when `merge_fields` takes any field from structured data, else SOURCE_DOM."""
+    if any(value == NOT_AVAILABLE and field in structured for field, value in dom.items()):
+        return SOURCE_MIXED
+    return SOURCE_DOM
+
+
+class _Capture:
+    __slots__ = ("field", "depth", "value_depth", "parts")
+
+    def __init__(self, field: str, depth: int):
+        self.field = field
+        self.depth = depth
+        self.value_depth: Optional[int] = None
+        self.parts = []
+
+
+class StatsTarget:
+    """
+    lxml parser target that collects every stat field in one pass over the
+    parse events, without building a document tree.
+
+    Unless `structured` is false, JSON-LD scripts are decoded as they
+    close; when they carry every field the DOM blocks are not needed, and
+    otherwise they fill the fields the DOM lacks. `done` turns true as soon as
+    every requested field has been captured either way, which lets
+    incremental callers stop feeding the parser early.
+    """
+
+    def __init__(self, fields=STAT_FIELDS, structured: bool = True):
+        self.wanted = {test_id: field for field, test_id in fields.items()}
+        self._read_json_ld = structured
+        self.results: Dict[str, str] = {}
+        self.structured: Dict[str, str] = {}
+        self._json_ld: Optional[list] = None
+        self._open = []
+        self._depth = 0
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) == len(self.wanted) or len(self.structured) == len(self.wanted)
+
+    @property
+    def source(self) -> str:
+        if len(self.structured) == len(self.wanted):
+            return SOURCE_JSON_LD
+        return dom_source(self._dom(), self.structured)
+
+    def start(self, tag, attrib):
+        self._depth += 1
+        if (
+            tag == "script"
+            and self._read_json_ld
+            and attrib.get("type", "").lower() == "application/ld+json"
+        ):
+            self._json_ld = []
+            return
+        if tag != "div":
+            return
+        for capture in self._open:
+            if (
+                capture.field in STATS_VALUE_FIELDS
+                and capture.value_depth is None
+                and "statsValue" in attrib.get("class", "").split()
+            ):
+                capture.value_depth = self._depth
+        field = self.wanted.get(attrib.get("data-rf-test-id"))
+        if field and field not in self.results and all(c.field != field for c in self._open):
+            self._open.append(_Capture(field, self._depth))
+
+    def end(self, tag):
+        if tag == "script" and self._json_ld is not None:
+            try:
+                fields_from_json_ld(json.loads("".join(self._json_ld)), self.structured)
+            except ValueError:
+                pass
+            self._json_ld = None
+        for capture in list(self._open):
+            if capture.value_depth == self._depth:
+                self._finish(capture, "".join(capture.parts).strip())
+            elif capture.depth == self._depth:
+                if capture.field in STATS_VALUE_FIELDS:
+                    self._finish(capture, NOT_AVAILABLE)
+                else:
+                    self._finish(capture, "".join(capture.parts).strip())
+        self._depth -= 1
+
+    def data(self, text):
+        if self._json_ld is not None:
+            self._json_ld.append(text)
+            return
+        for capture in self._open:
+            if capture.field not in STATS_VALUE_FIELDS or capture.value_depth is not None:
+                capture.parts.append(text)
+
+    def close(self) -> Dict[str, str]:
+        if self.source == SOURCE_JSON_LD:
+            return {field: self.structured[field] for field in self.wanted.values()}
+        return merge_fields(self._dom(), self.structured)
+
+    def _dom(self) -> Dict[str, str]:
+        return {field: self.results.get(field, NOT_AVAILABLE) for field in self.wanted.values()}
+
+    def _finish(self, capture: _Capture, value: str):
+        self._open.remove(capture)
+        self.results[capture.field] = value
+
+
+def new_stats_parser(target: StatsTarget):
+    return etree.HTMLParser(target=target, recover=True, no_network=True)
+
+
+def extract_with_lxml(html: Union[str, bytes], structured: bool = True) -> Dict[str, str]:
+    parser = new_stats_parser(StatsTarget(structured=structured))
+    parser.feed(html)
+    return parser.close()
+
+
+class IncrementalExtractor:
+    """
+    Feeds a page to the single-pass stats parser chunk by chunk as it
+    arrives. Chunks are not kept, and `feed` reports when every field has
+    been captured so the caller can stop reading the body.
+    """
+
+    def __init__(self):
+        self.target = StatsTarget()
+        self._parser = new_stats_parser(self.target)
+        self.bytes_fed = 0
+        self.peak_chunk = 0
+
+    @property
+    def done(self) -> bool:
+        return self.target.done
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_fed += len(chunk)
+        self.peak_chunk = max(self.peak_chunk, len(chunk))
+        self._parser.feed(chunk)
+        return self.target.done
+
+    @property
+    def source(self) -> str:
+        return self.target.source
+
+    def close(self) -> Dict[str, str]:
+        return self._parser.close()
+
+
+def streaming_enabled() -> bool:
+    return settings.EXTRACTOR_STREAMING and etree is not None and settings.EXTRACTOR_BACKEND == "lxml"
+
+
+def extract_with_soup(html: Union[str, bytes]) -> Dict[str, str]:
+    """The original BeautifulSoup lookup, with one `find` per field."""
+    soup = BeautifulSoup(html, "html.parser")
+    details = {}
+    for field, test_id in STAT_FIELDS.items():
+        block = soup.find("div", {"data-rf-test-id": test_id})
+        if block is None:
+            details[field] = NOT_AVAILABLE
+        elif field in STATS_VALUE_FIELDS:
+            value = block.find("div", {"class": "statsValue"})
+            details[field] = value.text.strip() if value else NOT_AVAILABLE
+        else:
+            details[field] = block.text.strip()
+    return details
+
+
+def stats_region_hash(html: Union[str, bytes]) -> Optional[str]:
+    """
+    Digest of the raw bytes around the stat blocks, from the tag holding
+    the first marker to REGION_TAIL bytes past the last one. Equal digests
+    mean the extracted fields cannot have changed, so the page need not be
+    parsed again. None when a marker is missing.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    positions = [html.find(test_id.encode()) for test_id in STAT_FIELDS.values()]
+    if min(positions) < 0:
+        return None
+    start = html.rfind(b"<", 0, min(positions))
+    region = html[max(start, 0):max(positions) + REGION_TAIL]
+    return hashlib.blake2b(region, digest_size=16).hexdigest()
+
+
+def extract_from_dom(html: Union[str, bytes]) -> Dict[str, str]:
+    """
+    The `data-rf-test-id` DOM path alone; structured data is merged in by
+    `extract_with_source`. Uses the single-pass lxml extractor and falls
+    back to BeautifulSoup when lxml is unavailable, disabled via
+    EXTRACTOR_BACKEND, or fails on the page.
+    """
+    if etree is not None and settings.EXTRACTOR_BACKEND == "lxml":
+        try:
+            return extract_with_lxml(html, structured=False)
+        except Exception as e:
+            logging.warning(f"lxml extraction failed, falling back to soup: {e}")
+    return extract_with_soup(html)
+
+
+def extract_with_source(html: Union[str, bytes]) -> Tuple[Dict[str, str], str]:
+    """
+    Extract price, beds, baths and sqft from a Redfin property page, and
+    name the path that produced them (json_ld, inline_json, dom, or mixed
+    when several did). The embedded structured data is tried first; the DOM
+    is only parsed when it lacks a field, and then fills in whatever the DOM
+    could not find.
+    """
+    structured: Dict[str, str] = {}
+    if settings.EXTRACTOR_STRUCTURED:
+        try:
+            structured, source = extract_structured(html)
+        except Exception as e:
+            logging.warning(f"Structured data extraction failed: {e}")
+            structured, source = {}, ""
+        if len(structured) == len(STAT_FIELDS):
+            return {field: structured[field] for field in STAT_FIELDS}, source
+    dom = extract_from_dom(html)
+    return merge_fields(dom, structured), dom_source(dom, structured)
+
+
+def extract_property_details(html: Union[str, bytes]) -> Dict[str, str]:
+    """Extract price, beds, baths and sqft from a Redfin property page."""
+    return extract_with_source(html)[0]
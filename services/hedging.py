@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+from core.config import settings
+from services.scheduler import scheduler
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Latency of the last HEDGE_WINDOW successful calls to one endpoint."""
+
+    def __init__(self):
+        self._samples: Deque[float] = deque(maxlen=settings.HEDGE_WINDOW)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        # Hedges skipped because the host had no free slot or had waiters
+        self.busy = 0
+        # Hedges earned: HEDGE_MAX_RATIO per request, capped at one window's worth
+        self.tokens = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self._samples) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+    def earn(self) -> None:
+        self.requests += 1
+        cap = settings.HEDGE_MAX_RATIO * settings.HEDGE_WINDOW
+        self.tokens = min(self.tokens + settings.HEDGE_MAX_RATIO, max(cap, 1.0))
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        self.hedged += 1
+        return True
+
+    def stats(self) -> Dict:
+        p50 = self.percentile(0.5)
+        delay = self.percentile(settings.HEDGE_PERCENTILE)
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "busy": self.busy,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "hedge_after_ms": delay * 1000 if delay is not None else None,
+        }
+
+
+class Hedger:
+    """
+    Request hedging for short idempotent upstream calls.
+
+    Once a call has run longer than HEDGE_PERCENTILE of its endpoint's
+    recent latency, a second identical call is started and the first to
+    succeed wins; the other is cancelled. Endpoints are keyed by host and
+    path, each with its own latency estimate, and hedges are rationed to
+    HEDGE_MAX_RATIO of calls so a slow upstream never sees double the load.
+
+    `fn` should be the upstream call alone: the caller holds the scheduler
+    slot and circuit guard around `run`, so queueing for them never counts
+    as latency. A hedge takes a second slot on the host with
+    scheduler.try_acquire and is skipped when none is free or other
+    requests are waiting for one.
+    """
+
+    def __init__(self):
+        self._trackers: Dict[str, LatencyTracker] = {}
+
+    def tracker(self, url: str) -> LatencyTracker:
+        parts = urlsplit(url)
+        endpoint = f"{parts.netloc.lower()}{parts.path}"
+        tracker = self._trackers.get(endpoint)
+        if tracker is None:
+            tracker = self._trackers[endpoint] = LatencyTracker()
+        return tracker
+
+    async def _timed(self, tracker: LatencyTracker, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await fn()
+        tracker.record(time.perf_counter() - started)
+        return result
+
+    async def _hedge(
+        self, tracker: LatencyTracker, host: str, lane: str, fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        try:
+            return await self._timed(tracker, fn)
+        finally:
+            scheduler.release(host, lane)
+
+    async def run(self, url: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, hedging it with a second `fn()` if it runs long."""
+        tracker = self.tracker(url)
+        if not settings.HEDGE_ENABLED:
+            # Keep the estimate current so enabling hedging takes effect at once
+            return await self._timed(tracker, fn)
+        tracker.earn()
+        delay = tracker.percentile(settings.HEDGE_PERCENTILE)
+        primary = asyncio.ensure_future(self._timed(tracker, fn))
+        tasks = {primary}
+        try:
+            if delay is None:
+                # Not enough samples yet to tell slow from normal
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, settings.HEDGE_MIN_DELAY_SECONDS))
+            if done:
+                return await primary
+            host = urlsplit(url).hostname or ""
+            lane = scheduler.try_acquire(host)
+            if lane is None:
+                tracker.busy += 1
+                return await primary
+            if not tracker.try_spend():
+                scheduler.release(host, lane)
+                return await primary
+            logging.debug(f"Hedging {url} after {delay * 1000:.0f}ms")
+            hedge = asyncio.ensure_future(self._hedge(tracker, host, lane, fn))
+            tasks.add(hedge)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        tracker.hedge_wins += task is hedge
+                        return task.result()
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            for task in (primary, *tasks):
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict:
+        return {endpoint: tracker.stats() for endpoint, tracker in self._trackers.items()}
+
+
+hedger = Hedger()
@@ -0,0 +1,207 @@
+"""
+Worker for durable scrape jobs.
+
+Any number of these can run, in the API process (JOB_WORKER_IN_APP) or as
+standalone processes on any node:
+
+    python -m services.job_worker
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from cachetools import TTLCache
+
+import crud
+from core.config import settings
+from db.database import SessionLocal
+from models.scrape_job import ADDRESS, DONE, FAILED
+from schemas.property import PropertyStatus
+from schemas.user import AddressRequest
+from services.retry import TIMEOUT, RetryBudget, scope as retry_scope
+from services.scheduler import BULK, scheduler
+from util.user_util import fetch_property_details, process_address
+
+# Field values and statuses of a scrape that should be tried again
+RETRY_VALUES = ("Error", TIMEOUT)
+RETRY_STATUSES = (PropertyStatus.ERROR, PropertyStatus.TIMEOUT)
+
+
+def retry_reason(result: Dict[str, Any]) -> Optional[str]:
+    """Why `result` is a failed scrape rather than an answer, or None."""
+    if result.get("status") in RETRY_STATUSES:
+        return f"Scrape returned {PropertyStatus(result['status']).value}"
+    for field in ("redfin_url", "price", "beds", "baths", "sqft"):
+        if result.get(field) in RETRY_VALUES:
+            return f"Scrape returned {result[field]}"
+    return None
+
+
+class JobWorker:
+    """
+    Claims job items from Postgres and scrapes them with up to
+    JOB_WORKER_CONCURRENCY items in flight. Database calls run in a thread
+    so the event loop keeps serving scrapes while it waits on Postgres.
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._tasks: Set[asyncio.Task] = set()
+        self._claimed: Dict[asyncio.Task, int] = {}
+        self._stop = asyncio.Event()
+        # One retry budget per job, so a job of dead URLs stops retrying
+        self._budgets: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+        self.processed = 0
+        self.retried = 0
+
+    def _claim(self, limit: int):
+        db = SessionLocal()
+        try:
+            return crud.scrape_job.claim_items(
+                db,
+                worker=self.name,
+                limit=limit,
+                lease_seconds=settings.JOB_LEASE_SECONDS,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+            )
+        finally:
+            db.close()
+
+    def _finish(self, item_id: int, state: str, result=None, error=None):
+        db = SessionLocal()
+        try:
+            crud.scrape_job.finish_item(
+                db, id=item_id, worker=self.name, state=state, result=result, error=error
+            )
+        finally:
+            db.close()
+
+    def _retry(self, item_id: int, error: str, delay: float):
+        db = SessionLocal()
+        try:
+            crud.scrape_job.retry_item(
+                db, id=item_id, worker=self.name, error=error, delay_seconds=delay
+            )
+        finally:
+            db.close()
+
+    def _release(self, ids):
+        db = SessionLocal()
+        try:
+            crud.scrape_job.release_items(db, ids=ids, worker=self.name)
+        finally:
+            db.close()
+
+    async def _scrape(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if item["kind"] == ADDRESS:
+            return await process_address(AddressRequest(**item["input"]))
+        details = await fetch_property_details(item["input"]["redfin_url"])
+        return {**item["input"], **details}
+
+    async def _run_item(self, item: Dict[str, Any]) -> None:
+        try:
+            result = await self._scrape(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Job item {item['id']} failed: {e}")
+            await asyncio.to_thread(self._finish, item["id"], FAILED, None, str(e)[:256])
+            return
+        reason = retry_reason(result)
+        if reason is None:
+            await asyncio.to_thread(self._finish, item["id"], DONE, result)
+            self.processed += 1
+        elif item["attempts"] < settings.JOB_MAX_ATTEMPTS:
+            # Upstream outage or open circuit: try again later, not never.
+            # The item goes back to the queue at once, so the backoff does
+            # not hold one of this worker's slots
+            logging.warning(f"Job item {item['id']} attempt {item['attempts']}: {reason}")
+            delay = settings.JOB_RETRY_DELAY_SECONDS * item["attempts"]
+            await asyncio.to_thread(self._retry, item["id"], reason, delay)
+            self.retried += 1
+        else:
+            await asyncio.to_thread(self._finish, item["id"], FAILED, result, reason)
+
+    def _spawn(self, item: Dict[str, Any]) -> None:
+        # All items of a job share one scheduler batch in the bulk lane, so
+        # a big job never holds the slots reserved for interactive requests
+        budget = self._budgets.get(item["job_id"])
+        if budget is None:
+            budget = self._budgets[item["job_id"]] = RetryBudget()
+        with scheduler.batch(f"job-{item['job_id']}", lane=BULK), retry_scope(
+            settings.SCRAPE_DEADLINE_SECONDS, budget=budget
+        ):
+            task = asyncio.ensure_future(self._run_item(item))
+        self._tasks.add(task)
+        self._claimed[task] = item["id"]
+
+        def forget(done):
+            self._tasks.discard(done)
+            self._claimed.pop(done, None)
+
+        task.add_done_callback(forget)
+
+    async def run(self) -> None:
+        logging.info(f"Job worker {self.name} started")
+        poll = settings.JOB_POLL_SECONDS
+        try:
+            while not self._stop.is_set():
+                free = settings.JOB_WORKER_CONCURRENCY - len(self._tasks)
+                items = []
+                if free > 0:
+                    try:
+                        items = await asyncio.to_thread(self._claim, free)
+                    except Exception as e:
+                        logging.error(f"Job worker {self.name} could not claim items: {e}")
+                for item in items:
+                    self._spawn(item)
+                if self._tasks:
+                    await asyncio.wait(
+                        self._tasks, timeout=poll, return_when=asyncio.FIRST_COMPLETED
+                    )
+                elif not items:
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), timeout=poll)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            unfinished = list(self._claimed.values())
+            for task in list(self._tasks):
+                task.cancel()
+            if unfinished:
+                await asyncio.to_thread(self._release, unfinished)
+            logging.info(f"Job worker {self.name} stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "in_flight": len(self._tasks),
+            "processed": self.processed,
+            "retried": self.retried,
+        }
+
+
+async def main():
+    from core.http_client import upstream
+    from services.parse_executor import parse_executor
+    from services.property_store import property_store
+
+    worker = JobWorker()
+    property_store.start()
+    try:
+        await worker.run()
+    finally:
+        await property_store.stop()
+        parse_executor.shutdown()
+        await upstream.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
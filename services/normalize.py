@@ -0,0 +1,160 @@
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from schemas.property import PropertyStatus
+from services.extractor import NOT_AVAILABLE, format_field
+
+FIELDS = ("price", "beds", "baths", "sqft")
+
+# Field value -> status when a whole result is one of the sentinel strings
+SENTINELS = {
+    "Error": PropertyStatus.ERROR,
+    "Not Found": PropertyStatus.NOT_FOUND,
+    "Timeout": PropertyStatus.TIMEOUT,
+}
+_SENTINEL_TEXT = {status: text for text, status in SENTINELS.items()}
+
+# First number in a display string: "$1,249,000", "2.5", "1,820 sq ft", "$1.25M"
+_NUMBER = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([KkMmBb](?![a-z]))?")
+_SCALE = {"k": 1e3, "m": 1e6, "b": 1e9}
+
+Number = Union[int, float]
+
+
+def parse_field(field: str, text: Any) -> Optional[Number]:
+    """
+    Number shown in a display string, or None when it has none: dollars
+    and square feet as int, beds and baths as float.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        value = float(text)
+    else:
+        match = _NUMBER.search(text)
+        if match is None:
+            return None
+        value = float(match.group(1).replace(",", ""))
+        if match.group(2):
+            value *= _SCALE[match.group(2).lower()]
+    if field in ("price", "sqft"):
+        return int(round(value))
+    return value
+
+
+class PropertyRecord:
+    """
+    Typed property details: numbers instead of display strings, plus a
+    status that says why fields are missing. Packs to a five-item list for
+    the cache and unpacks to the legacy string fields on demand.
+    """
+
+    __slots__ = ("price", "beds", "baths", "sqft", "status")
+
+    def __init__(
+        self,
+        price: Optional[int] = None,
+        beds: Optional[float] = None,
+        baths: Optional[float] = None,
+        sqft: Optional[int] = None,
+        status: PropertyStatus = PropertyStatus.OK,
+    ):
+        self.price = price
+        self.beds = beds
+        self.baths = baths
+        self.sqft = sqft
+        self.status = status
+
+    @classmethod
+    def from_details(cls, details: Dict[str, Any]) -> "PropertyRecord":
+        """Normalize a legacy details dict (display strings or sentinels)."""
+        values = [details.get(field) for field in FIELDS]
+        for value in values:
+            if value in SENTINELS:
+                return cls(status=SENTINELS[value])
+        numbers = [parse_field(field, value) for field, value in zip(FIELDS, values)]
+        found = sum(number is not None for number in numbers)
+        if found == len(FIELDS):
+            status = PropertyStatus.OK
+        elif found:
+            status = PropertyStatus.PARTIAL
+        else:
+            status = PropertyStatus.NOT_AVAILABLE
+        return cls(*numbers, status=status)
+
+    def to_details(self) -> Dict[str, str]:
+        """The legacy display strings, as the scraper used to return them."""
+        sentinel = _SENTINEL_TEXT.get(self.status)
+        if sentinel is not None:
+            return {field: sentinel for field in FIELDS}
+        return {
+            field: NOT_AVAILABLE if value is None else format_field(field, value)
+            for field, value in zip(FIELDS, (self.price, self.beds, self.baths, self.sqft))
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "price": self.price,
+            "beds": self.beds,
+            "baths": self.baths,
+            "sqft": self.sqft,
+        }
+
+    def columns(self) -> Dict[str, Optional[Number]]:
+        """Values for the numeric columns of the property table."""
+        return {
+            "price_value": self.price,
+            "beds_value": self.beds,
+            "baths_value": self.baths,
+            "sqft_value": self.sqft,
+        }
+
+    def pack(self) -> List[Any]:
+        return [self.price, self.beds, self.baths, self.sqft, self.status.value]
+
+    @classmethod
+    def unpack(cls, packed: List[Any]) -> "PropertyRecord":
+        price, beds, baths, sqft, status = packed
+        return cls(price, beds, baths, sqft, PropertyStatus(status))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, PropertyRecord):
+            return NotImplemented
+        return self.pack() == other.pack()
+
+    def __repr__(self) -> str:
+        return (
+            f"PropertyRecord(price={self.price!r}, beds={self.beds!r}, baths={self.baths!r}, "
+            f"sqft={self.sqft!r}, status={self.status.value!r})"
+        )
+
+
+def pack_details(details: Dict[str, Any]) -> List[Any]:
+    """
+    Cache form of a details dict: the packed record, plus the display
+    strings that `to_details` would not rebuild exactly ("Studio",
+    "$1.25M", "1,820" without "sq ft"), so legacy output is the same
+    whether it comes from the cache or a fresh scrape.
+    """
+    record = PropertyRecord.from_details(details)
+    rebuilt = record.to_details()
+    verbatim = {
+        field: details[field]
+        for field in FIELDS
+        if field in details and details[field] != rebuilt[field]
+    }
+    packed = record.pack()
+    if verbatim:
+        packed.append(verbatim)
+    return packed
+
+
+def unpack_details(packed: Union[List[Any], Dict[str, str]]) -> Dict[str, str]:
+    """Details dict from its cache form; entries cached as dicts pass through."""
+    if isinstance(packed, dict):
+        return packed
+    details = PropertyRecord.unpack(packed[:5]).to_details()
+    if len(packed) > 5:
+        details.update(packed[5])
+    return details
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from core.config import settings
+from services.extractor import extract_with_source
+from services.retry import check_deadline, within_deadline
+
+
+def _parse_in_worker(html: Union[str, bytes]) -> Tuple[Dict[str, str], str, float]:
+    started = time.perf_counter()
+    details, source = extract_with_source(html)
+    return details, source, time.perf_counter() - started
+
+
+class ParseExecutor:
+    """
+    Runs property-page extraction in a process pool so CPU-bound parsing
+    never blocks the event loop and can use more than one core.
+
+    At most PARSE_MAX_PENDING pages are submitted at once; further callers
+    wait for a slot, which pushes back on the fetchers instead of queueing
+    unbounded HTML in memory. PARSE_WORKERS=0 parses inline on the loop.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.parsed = 0
+        self.failed = 0
+        self.waiting = 0
+        self.queue_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        # Pages by the extraction path that served them (json_ld, inline_json, dom or mixed)
+        self.sources: Counter = Counter()
+
+    def start(self) -> None:
+        if self._pool is not None or settings.PARSE_WORKERS <= 0:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=settings.PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Spawn the workers now rather than on the first request
+        self._pool.submit(_parse_in_worker, "")
+        logging.info(f"Parse executor started with {settings.PARSE_WORKERS} workers")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _max_pending(self) -> int:
+        return settings.PARSE_MAX_PENDING or max(settings.PARSE_WORKERS, 1) * 4
+
+    async def parse(self, html: Union[str, bytes]) -> Dict[str, str]:
+        """
+        Extract the property details dict from raw page HTML. Raises
+        DeadlineExceeded rather than wait for a slot past the deadline.
+        """
+        check_deadline()
+        if settings.PARSE_WORKERS <= 0:
+            details, source = extract_with_source(html)
+            self.sources[source] += 1
+            return details
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_pending())
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await within_deadline(self._slots.acquire())
+        finally:
+            self.waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            details, source, parse_seconds = await loop.run_in_executor(
+                self._pool, _parse_in_worker, html
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._slots.release()
+        total = time.perf_counter() - queued_at
+        queue_seconds = max(total - parse_seconds, 0.0)
+        self.parsed += 1
+        self.sources[source] += 1
+        self.parse_seconds += parse_seconds
+        self.queue_seconds += queue_seconds
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+        return details
+
+    def stats(self) -> Dict:
+        parsed = self.parsed or 1
+        return {
+            "workers": settings.PARSE_WORKERS,
+            "max_pending": self._max_pending(),
+            "waiting": self.waiting,
+            "parsed": self.parsed,
+            "failed": self.failed,
+            "avg_queue_ms": self.queue_seconds / parsed * 1000,
+            "max_queue_ms": self.max_queue_seconds * 1000,
+            "avg_parse_ms": self.parse_seconds / parsed * 1000,
+            "sources": dict(self.sources),
+        }
+
+
+parse_executor = ParseExecutor()
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+from services import retry
+from services.parse_executor import parse_executor
+from services.property_cache import DETAILS, property_cache
+from services.property_store import property_store
+from services.refresher import refresher
+from services.revalidation import CACHED, STORED, PageFetch, changed, shared_fetch_page, shared_settle, verified
+from services.scheduler import INTERACTIVE, LANES, current_batch, current_lane, scheduler
+from util.canonical import canonical_redfin_url
+from util.user_util import (
+    DETAIL_HEADERS,
+    detail_page_getter,
+    is_data_available,
+    search_redfin_property,
+)
+
+FIELDS = ("price", "beds", "baths", "sqft")
+
+
+class _Item:
+    __slots__ = ("address", "batch", "lane", "deadline", "budget", "future", "url", "key", "page")
+
+    def __init__(self, address, batch: str, future: asyncio.Future):
+        self.address = address
+        self.batch = batch
+        self.lane: str = current_lane.get()
+        # The caller's deadline and retry budget, carried across the queues
+        self.deadline: Optional[float] = retry.current_deadline.get()
+        self.budget: Optional[retry.RetryBudget] = retry.current_budget.get()
+        self.future = future
+        self.url: Optional[str] = None
+        self.key: Optional[str] = None
+        self.page: Optional[PageFetch] = None
+
+    def resolve(self, redfin_url: str, details: Dict, freshness: Optional[str] = None) -> None:
+        if not self.future.done():
+            refresher.record(redfin_url, freshness)
+            self.future.set_result({
+                "id": self.address.id,
+                "redfin_url": redfin_url,
+                **{field: details.get(field, "Not Available") for field in FIELDS},
+                "freshness": freshness,
+            })
+
+
+class Stage:
+    """
+    Bounded queues, one per priority lane, drained by a fixed number of
+    workers that always take interactive items first.
+    """
+
+    def __init__(self, name: str, workers: int, handler: Callable[[_Item], Awaitable[Optional["Stage"]]]):
+        self.name = name
+        self.workers = workers
+        self.handler = handler
+        self.queues: Dict[str, asyncio.Queue] = {
+            lane: asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE) for lane in LANES
+        }
+        # One permit per queued item, whichever lane it is in
+        self._ready = asyncio.Semaphore(0)
+        self.busy = 0
+        self.processed = 0
+        self.service_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    async def put(self, item: _Item) -> None:
+        await self.queues.get(item.lane, self.queues[INTERACTIVE]).put(item)
+        self._ready.release()
+
+    async def get(self) -> _Item:
+        await self._ready.acquire()
+        for queue in self.queues.values():
+            if not queue.empty():
+                return queue.get_nowait()
+        raise RuntimeError("Stage queue permit without an item")
+
+    def stats(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        processed = self.processed or 1
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queue_depth": {lane: queue.qsize() for lane, queue in self.queues.items()},
+            "queue_size": settings.PIPELINE_QUEUE_SIZE,
+            "processed": self.processed,
+            "throughput_per_s": self.processed / elapsed,
+            "avg_service_ms": self.service_seconds / processed * 1000,
+        }
+
+
+class AddressPipeline:
+    """
+    Address-to-details as three stages - autocomplete lookup, detail fetch
+    and parse - each with its own worker pool, joined by bounded queues.
+    Pages that revalidate, come back unchanged or were parsed while
+    streaming skip the parse stage.
+    Fetching and parsing overlap continuously, a slow address only holds
+    one worker, and a full downstream queue pushes back on the stage
+    feeding it. Per-stage depth and throughput show where the bottleneck is.
+    """
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.lookup = Stage("lookup", settings.PIPELINE_LOOKUP_WORKERS, self._lookup)
+        self.fetch = Stage("fetch", settings.PIPELINE_FETCH_WORKERS, self._fetch)
+        self.parse = Stage("parse", settings.PIPELINE_PARSE_WORKERS, self._parse)
+        self.stages = [self.lookup, self.fetch, self.parse]
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._work(stage)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def process(self, address) -> Dict:
+        """Run one AddressRequest through the pipeline and return its result dict."""
+        self.start()
+        item = _Item(address, current_batch.get(), asyncio.get_running_loop().create_future())
+        await self.lookup.put(item)
+        return await item.future
+
+    async def _work(self, stage: Stage) -> None:
+        while True:
+            item = await stage.get()
+            next_stage = None
+            if not item.future.done():
+                stage.busy += 1
+                started = time.perf_counter()
+                try:
+                    with scheduler.batch(item.batch, item.lane), retry.scope(deadline=item.deadline, budget=item.budget):
+                        retry.check_deadline()
+                        next_stage = await stage.handler(item)
+                except retry.DeadlineExceeded:
+                    logging.warning(f"Pipeline stage {stage.name} timed out for {item.address.id}")
+                    item.resolve(item.url or retry.TIMEOUT, retry.timeout_details())
+                except Exception as e:
+                    logging.error(f"Pipeline stage {stage.name} failed for {item.address.id}: {e}")
+                    item.resolve("Error", {field: "Error" for field in FIELDS})
+                finally:
+                    stage.busy -= 1
+                    stage.processed += 1
+                    stage.service_seconds += time.perf_counter() - started
+            if next_stage is not None:
+                await next_stage.put(item)
+
+    async def _lookup(self, item: _Item) -> Optional[Stage]:
+        address = item.address
+        full_address = f"{address.address}, {address.city}, {address.state} {address.zip}"
+        redfin_url = await search_redfin_property(full_address)
+        if redfin_url == "Not Found":
+            item.resolve(redfin_url, {field: "Not Found" for field in FIELDS})
+            return None
+        item.url = redfin_url
+        item.key = canonical_redfin_url(redfin_url)
+        return self.fetch
+
+    async def _fetch(self, item: _Item) -> Optional[Stage]:
+        cached = await property_cache.get(DETAILS, item.key)
+        if cached is not None:
+            item.resolve(item.url, cached, CACHED)
+            return None
+        stored = await property_store.get_fresh_one(item.url)
+        if stored is not None:
+            await property_cache.set(DETAILS, item.key, stored)
+            item.resolve(item.url, stored, STORED)
+            return None
+        # Shared with the detail endpoints and other items for the same home
+        page = await shared_fetch_page(item.key, DETAIL_HEADERS, detail_page_getter(item.url))
+        item.page = page
+        if page.needs_parse:
+            return self.parse
+        # Revalidated, unchanged or parsed while streaming: no parse stage
+        return await self._parse(item)
+
+    async def _parse(self, item: _Item) -> Optional[Stage]:
+        page, item.page = item.page, None
+        details, freshness = await shared_settle(item.key, page, parse_executor.parse)
+        if verified(freshness) and is_data_available(details):
+            await property_cache.set(DETAILS, item.key, details)
+            if changed(freshness):
+                property_store.add(item.url, details)
+            else:
+                property_store.touch(item.url)
+        item.resolve(item.url, details, freshness)
+        return None
+
+    def stats(self) -> Dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+
+address_pipeline = AddressPipeline()
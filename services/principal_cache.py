@@ -0,0 +1,71 @@
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from core.config import settings
+
+
+class PrincipalCache:
+    """
+    Authenticated users by id, so the auth middleware does not query the
+    user table on every request.
+
+    Entries live for AUTH_CACHE_TTL_SECONDS, at most AUTH_CACHE_MAX of them.
+    User writes through crud.user and services.user_service evict the user
+    at once. A lookup that was already reading the database when an
+    eviction happened is not cached, so it cannot put the old row back.
+    """
+
+    def __init__(self):
+        self._users: TTLCache = TTLCache(
+            maxsize=settings.AUTH_CACHE_MAX, ttl=settings.AUTH_CACHE_TTL_SECONDS
+        )
+        # User writes may run in the threadpool (sync endpoints)
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get(self, user_id: Any) -> Optional[Any]:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return user
+
+    def version(self) -> int:
+        """Token to pass to `put` for a user about to be read from the database."""
+        return self._evictions
+
+    def put(self, user_id: Any, user: Any, version: int) -> None:
+        with self._lock:
+            if version == self._evictions:
+                self._users[user_id] = user
+
+    def evict(self, user_id: Any) -> None:
+        with self._lock:
+            self._evictions += 1
+            if self._users.pop(user_id, None) is not None:
+                self.evicted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._evictions += 1
+            self._users.clear()
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evicted": self.evicted,
+        }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TLRUCache
+
+from core.config import settings
+from services.normalize import pack_details, unpack_details
+
+DETAILS = "details"
+AUTOCOMPLETE = "autocomplete"
+VALIDATORS = "validators"
+
+# Namespaces stored in a compact form: (encode, decode). Details are kept
+# as packed PropertyRecords, [price, beds, baths, sqft, status], plus any
+# display strings the record does not reproduce (see normalize.pack_details)
+_CODECS = {DETAILS: (pack_details, unpack_details)}
+
+
+class _SqliteStore:
+    """
+    Node-local L2 shared by every worker process through one SQLite file.
+    WAL mode lets the workers read concurrently while one of them writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " negative INTEGER NOT NULL DEFAULT 0,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, negative, expires_at FROM cache_entry WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), bool(row[1]), row[2]
+
+    def set(self, key: str, value: Any, negative: bool, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entry (key, value, negative, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), int(negative), expires_at),
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    conn.execute("DELETE FROM cache_entry WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,)).rowcount
+
+    def delete_prefix(self, prefix: str) -> int:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(
+                    "DELETE FROM cache_entry WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",)
+                ).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM cache_entry WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+
+class PropertyCache:
+    """
+    Two-tier cache for property details and autocomplete lookups.
+
+    L1 is an in-process LRU whose entries expire at their own deadline;
+    L2 is the SQLite store shared by all workers on the node, so a restart
+    or a sibling worker does not start cold. "Not Found" results are
+    cached as negative entries with a shorter TTL. L1 copies live at most
+    CACHE_L1_TTL_SECONDS, which bounds how long another worker can serve
+    an entry that was invalidated elsewhere.
+    """
+
+    def __init__(self):
+        self._l1 = TLRUCache(
+            maxsize=settings.CACHE_L1_MAXSIZE,
+            ttu=lambda key, entry, now: entry[2],
+            timer=time.time,
+        )
+        self._l2 = _SqliteStore(settings.CACHE_L2_PATH) if settings.CACHE_L2_PATH else None
+        self.counters = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "sets": 0,
+            "l2_errors": 0,
+        }
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        full_key = self._key(namespace, key)
+        entry = self._l1.get(full_key)
+        if entry is not None:
+            self.counters["l1_hits"] += 1
+        elif self._l2 is not None:
+            try:
+                found = await asyncio.to_thread(self._l2.get, full_key)
+            except sqlite3.Error as e:
+                self.counters["l2_errors"] += 1
+                logging.warning(f"L2 cache read failed for {full_key}: {e}")
+                found = None
+            if found is not None:
+                value, negative, expires_at = found
+                entry = (value, negative, min(expires_at, time.time() + settings.CACHE_L1_TTL_SECONDS))
+                self._l1[full_key] = entry
+                self.counters["l2_hits"] += 1
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        if entry[1]:
+            self.counters["negative_hits"] += 1
+        codec = _CODECS.get(namespace)
+        return codec[1](entry[0]) if codec else entry[0]
+
+    async def set(
+        self, namespace: str, key: str, value: Any, negative: bool = False, ttl: Optional[float] = None
+    ) -> None:
+        if ttl is None:
+            ttl = settings.CACHE_NEGATIVE_TTL_SECONDS if negative else settings.CACHE_TTL_SECONDS
+        expires_at = time.time() + ttl
+        full_key = self._key(namespace, key)
+        codec = _CODECS.get(namespace)
+        if codec and not negative:
+            value = codec[0](value)
+        self._l1[full_key] = (
+            value,
+            negative,
+            min(expires_at, time.time() + settings.CACHE_L1_TTL_SECONDS),
+        )
+        self.counters["sets"] += 1
+        if self._l2 is not None:
+            try:
+                await asyncio.to_thread(self._l2.set, full_key, value, negative, expires_at)
+            except sqlite3.Error as e:
+                self.counters["l2_errors"] += 1
+                logging.warning(f"L2 cache write failed for {full_key}: {e}")
+
+    async def invalidate(self, namespace: str, key: str) -> int:
+        full_key = self._key(namespace, key)
+        removed = 1 if self._l1.pop(full_key, None) is not None else 0
+        if self._l2 is not None:
+            removed = max(removed, await asyncio.to_thread(self._l2.delete, full_key))
+        return removed
+
+    async def invalidate_prefix(self, namespace: str, prefix: str) -> int:
+        full_prefix = self._key(namespace, prefix)
+        keys = [key for key in list(self._l1.keys()) if key.startswith(full_prefix)]
+        for key in keys:
+            self._l1.pop(key, None)
+        removed = len(keys)
+        if self._l2 is not None:
+            removed = max(removed, await asyncio.to_thread(self._l2.delete_prefix, full_prefix))
+        return removed
+
+    async def stats(self) -> Dict:
+        lookups = self.counters["l1_hits"] + self.counters["l2_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        stats = {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "l1_size": len(self._l1),
+            "l1_maxsize": self._l1.maxsize,
+            "l2_path": self._l2.path if self._l2 else None,
+        }
+        if self._l2 is not None:
+            stats["l2_size"] = await asyncio.to_thread(self._l2.count)
+        return stats
+
+
+property_cache = PropertyCache()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+import crud
+from core.config import settings
+from db.database import SessionLocal
+from services.normalize import PropertyRecord
+from util.canonical import redfin_home_id, redfin_location
+
+FIELDS = ("price", "beds", "baths", "sqft")
+INCOMPLETE = ("Not Available", "Error", "", None)
+
+
+class PropertyStore:
+    """
+    Scraped details persisted in the `property` table, keyed by Redfin
+    home id.
+
+    Reads return rows younger than PROPERTY_MAX_AGE_SECONDS so a home is not
+    scraped again every day. Writes are buffered and flushed as chunked
+    multi-row upserts - every PROPERTY_FLUSH_SECONDS or once a chunk is
+    full - instead of one commit per row. Postgres being unreachable never
+    fails a scrape: the store backs off for PROPERTY_RETRY_SECONDS and the
+    request carries on as a miss.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, Dict] = {}
+        self._touched: Set[int] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.touched = 0
+        self.errors = 0
+        # Bumped after every write that reached the table
+        self.generation = 0
+
+    @property
+    def available(self) -> bool:
+        return settings.PROPERTY_STORE_ENABLED and time.monotonic() >= self._down_until
+
+    def _failed(self, action: str, error: Exception) -> None:
+        self.errors += 1
+        self._down_until = time.monotonic() + settings.PROPERTY_RETRY_SECONDS
+        logging.error(f"Property store {action} failed: {error}")
+
+    def _read(self, ids) -> Dict[int, Dict]:
+        db = SessionLocal()
+        try:
+            rows = crud.property.get_fresh(
+                db, ids=ids, max_age_seconds=settings.PROPERTY_MAX_AGE_SECONDS
+            )
+            return {row.id: {field: getattr(row, field) for field in FIELDS} for row in rows}
+        finally:
+            db.close()
+
+    def _write(self, rows, touched) -> int:
+        db = SessionLocal()
+        try:
+            written = crud.property.upsert_many(
+                db, rows=rows, chunk_size=settings.PROPERTY_UPSERT_CHUNK
+            )
+            if touched:
+                crud.property.touch_many(
+                    db, ids=touched, chunk_size=settings.PROPERTY_UPSERT_CHUNK
+                )
+            return written
+        finally:
+            db.close()
+
+    async def get_fresh(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """Stored details for each of `urls` that has a fresh row, in one query."""
+        by_id = {}
+        for url in urls:
+            home_id = redfin_home_id(url)
+            if home_id is not None:
+                by_id.setdefault(home_id, []).append(url)
+        if not by_id or not self.available:
+            return {}
+        try:
+            rows = await asyncio.to_thread(self._read, list(by_id))
+        except Exception as e:
+            self._failed("read", e)
+            return {}
+        self.hits += len(rows)
+        self.misses += len(by_id) - len(rows)
+        return {url: details for home_id, details in rows.items() for url in by_id[home_id]}
+
+    async def get_fresh_one(self, url: str) -> Optional[Dict]:
+        return (await self.get_fresh([url])).get(url)
+
+    def add(self, url: str, details: Dict) -> None:
+        """
+        Queue scraped details for the next flush. Like the cache, only
+        complete results are kept, so a stored row is always servable.
+        """
+        home_id = redfin_home_id(url)
+        if home_id is None or not settings.PROPERTY_STORE_ENABLED:
+            return
+        if any(details.get(field) in INCOMPLETE for field in FIELDS):
+            return
+        state, city, zip_code = redfin_location(url) or (None, None, None)
+        self._pending[home_id] = {
+            "id": home_id,
+            "redfin_url": url,
+            **{field: details.get(field) for field in FIELDS},
+            **PropertyRecord.from_details(details).columns(),
+            "state": state,
+            "city": city,
+            "zip": zip_code,
+            "scraped_at": datetime.now(timezone.utc),
+        }
+        self._touched.discard(home_id)
+        if len(self._pending) >= settings.PROPERTY_UPSERT_CHUNK:
+            self._flush_soon()
+
+    def touch(self, url: str) -> None:
+        """
+        Queue a freshness bump for a home whose page was revalidated or
+        found unchanged; its stored details are not rewritten.
+        """
+        home_id = redfin_home_id(url)
+        if home_id is None or not settings.PROPERTY_STORE_ENABLED or home_id in self._pending:
+            return
+        self._touched.add(home_id)
+        if len(self._touched) >= settings.PROPERTY_UPSERT_CHUNK:
+            self._flush_soon()
+
+    def _flush_soon(self) -> None:
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written."""
+        # One flush at a time, so an older write never lands after a newer one
+        async with self._lock:
+            if not (self._pending or self._touched) or not self.available:
+                return 0
+            # Keyed by home id, so a chunk never upserts the same row twice
+            rows, self._pending = list(self._pending.values()), {}
+            touched, self._touched = list(self._touched), set()
+            try:
+                written = await asyncio.to_thread(self._write, rows, touched)
+            except Exception as e:
+                self._failed("write", e)
+                # Keep the newest details for the next attempt
+                for row in rows:
+                    self._pending.setdefault(row["id"], row)
+                self._touched.update(home_id for home_id in touched if home_id not in self._pending)
+                return 0
+            self.written += written
+            self.touched += len(touched)
+            self.generation += bool(written)
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PROPERTY_FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._flusher is None and settings.PROPERTY_STORE_ENABLED:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": settings.PROPERTY_STORE_ENABLED,
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending_writes": len(self._pending),
+            "pending_touches": len(self._touched),
+            "written": self.written,
+            "touched": self.touched,
+            "errors": self.errors,
+        }
+
+
+property_store = PropertyStore()
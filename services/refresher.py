@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+import crud
+from core.config import settings
+from db.database import SessionLocal
+from services import retry
+from services.property_store import property_store
+from services.revalidation import CACHED, STALE
+from services.scheduler import BULK, scheduler
+from util.canonical import canonical_redfin_url, redfin_home_id
+
+INCOMPLETE = ("Not Available", "Error", "Timeout", "", None)
+
+
+class _Access:
+    __slots__ = ("url", "score", "seen_at", "refreshed_at", "retry_at")
+
+    def __init__(self, url: str, now: float):
+        self.url = url
+        self.score = 0.0
+        self.seen_at = now
+        # Unknown cache age on first sight; assume it was just filled
+        self.refreshed_at = now
+        # Set after a failed refresh; the key is not retried before then
+        self.retry_at = 0.0
+
+
+def quiet_now(spec: str, hour: Optional[int] = None) -> bool:
+    """Whether the local hour is inside `spec` ("start-end", may wrap midnight)."""
+    if not spec:
+        return False
+    start, _, end = spec.partition("-")
+    start, end = int(start), int(end or start)
+    hour = datetime.now().hour if hour is None else hour
+    if start <= end:
+        return start <= hour <= end
+    return hour >= start or hour <= end
+
+
+class Refresher:
+    """
+    Refresh-ahead for property details.
+
+    Every details read is counted per home with an exponentially decaying
+    score. Homes read at least REFRESH_MIN_HITS times are re-scraped once
+    their cache entry is in the last REFRESH_AHEAD_FRACTION of its TTL, so
+    hot addresses are refreshed in the background instead of missing on the
+    request path. During REFRESH_QUIET_HOURS the property table is also
+    walked in REFRESH_SWEEP_CHUNK rows, re-scraping rows older than
+    REFRESH_STALE_DAYS. All refreshes run in the bulk scheduler lane at no
+    more than REFRESH_RATE_PER_SECOND and revalidate, so an unchanged page
+    usually costs a 304. A hot key whose refresh failed stays due and is
+    tried again after REFRESH_RETRY_SECONDS. A stale row keeps its old
+    scraped_at when its re-scrape fails, so failures are counted per row and
+    a row that failed REFRESH_SWEEP_MAX_FAILURES times is skipped by later
+    sweeps instead of using up every quiet window.
+    """
+
+    def __init__(self):
+        self._keys: LRUCache = LRUCache(maxsize=settings.REFRESH_TRACK_MAX)
+        self._task: Optional[asyncio.Task] = None
+        self._sweep_after = 0
+        # Row id -> failed sweep re-scrapes
+        self._sweep_failures: LRUCache = LRUCache(maxsize=settings.REFRESH_TRACK_MAX)
+        self._next_slot = 0.0
+        self.refreshed = 0
+        self.swept = 0
+        self.failed = 0
+
+    def record(self, url: str, freshness: Optional[str] = None) -> None:
+        """
+        Count one read of the details of `url`. Any `freshness` other than
+        cached or stale means the cache entry was just filled.
+        """
+        if not settings.REFRESH_ENABLED or url in INCOMPLETE or redfin_home_id(url) is None:
+            return
+        key = canonical_redfin_url(url)
+        now = time.monotonic()
+        access = self._keys.get(key)
+        if access is None:
+            access = self._keys[key] = _Access(url, now)
+        else:
+            access.score *= 0.5 ** ((now - access.seen_at) / settings.REFRESH_DECAY_SECONDS)
+        access.score += 1
+        access.seen_at = now
+        if freshness is not None and freshness not in (CACHED, STALE):
+            access.refreshed_at = now
+
+    def due(self, now: float = None) -> List[Tuple[str, _Access]]:
+        """Hot keys whose cache entry is close to expiring, hottest first."""
+        now = time.monotonic() if now is None else now
+        refresh_after = settings.CACHE_TTL_SECONDS * (1 - settings.REFRESH_AHEAD_FRACTION)
+        due = []
+        for key, access in list(self._keys.items()):
+            score = access.score * 0.5 ** ((now - access.seen_at) / settings.REFRESH_DECAY_SECONDS)
+            if (
+                score >= settings.REFRESH_MIN_HITS
+                and now - access.refreshed_at >= refresh_after
+                and now >= access.retry_at
+            ):
+                due.append((score, key, access))
+        due.sort(key=lambda item: item[0], reverse=True)
+        return [(key, access) for _, key, access in due]
+
+    async def _paced(self) -> None:
+        # Space refreshes at least 1 / REFRESH_RATE_PER_SECOND apart
+        now = time.monotonic()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + 1 / settings.REFRESH_RATE_PER_SECOND
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _refresh(self, url: str) -> bool:
+        from util.user_util import refresh_property_details
+
+        await self._paced()
+        with scheduler.batch("refresh-ahead", lane=BULK), retry.scope(settings.SCRAPE_DEADLINE_SECONDS):
+            try:
+                details = await refresh_property_details(url)
+            except Exception as e:
+                logging.error(f"Refresh of {url} failed: {e}")
+                details = {}
+        ok = all(details.get(field) not in INCOMPLETE for field in ("price", "beds", "baths", "sqft"))
+        self.failed += not ok
+        return ok
+
+    async def refresh_hot(self) -> int:
+        refreshed = 0
+        for key, access in self.due():
+            if await self._refresh(access.url):
+                access.refreshed_at = time.monotonic()
+                refreshed += 1
+            else:
+                # Still due: retry soon, well before the entry expires
+                access.retry_at = time.monotonic() + settings.REFRESH_RETRY_SECONDS
+        self.refreshed += refreshed
+        return refreshed
+
+    def _stale_rows(self) -> List[Tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            rows = crud.property.get_stale(
+                db,
+                older_than_seconds=settings.REFRESH_STALE_DAYS * 86400,
+                after_id=self._sweep_after,
+                limit=settings.REFRESH_SWEEP_CHUNK,
+            )
+            return [(row.id, row.redfin_url) for row in rows]
+        finally:
+            db.close()
+
+    async def sweep_stale(self) -> int:
+        """Re-scrape the next chunk of stale stored rows; wraps around at the end."""
+        if not property_store.available:
+            return 0
+        try:
+            rows = await asyncio.to_thread(self._stale_rows)
+        except Exception as e:
+            logging.error(f"Stale property sweep failed: {e}")
+            return 0
+        if not rows:
+            self._sweep_after = 0
+            return 0
+        swept = 0
+        for row_id, url in rows:
+            if not quiet_now(settings.REFRESH_QUIET_HOURS):
+                # Resume from this row in the next quiet window
+                break
+            failures = self._sweep_failures.get(row_id, 0)
+            if failures < settings.REFRESH_SWEEP_MAX_FAILURES:
+                if await self._refresh(url):
+                    self._sweep_failures.pop(row_id, None)
+                    swept += 1
+                else:
+                    self._sweep_failures[row_id] = failures + 1
+            self._sweep_after = row_id
+        self.swept += swept
+        return swept
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REFRESH_INTERVAL_SECONDS)
+            try:
+                await self.refresh_hot()
+                if quiet_now(settings.REFRESH_QUIET_HOURS):
+                    await self.sweep_stale()
+            except Exception as e:
+                logging.error(f"Refresh-ahead round failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None and settings.REFRESH_ENABLED:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": settings.REFRESH_ENABLED,
+            "tracked": len(self._keys),
+            "due": len(self.due()),
+            "refreshed": self.refreshed,
+            "swept": self.swept,
+            "failed": self.failed,
+            "quiet_hours": quiet_now(settings.REFRESH_QUIET_HOURS),
+        }
+
+
+refresher = Refresher()
@@ -0,0 +1,176 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from core.config import settings
+from services.circuit_breaker import upstream_failure
+
+T = TypeVar("T")
+
+# Field value of an item whose deadline passed before it finished
+TIMEOUT = "Timeout"
+
+# Absolute time.monotonic() deadline of the current request, if any
+current_deadline: contextvars.ContextVar = contextvars.ContextVar("scrape_deadline", default=None)
+current_budget: contextvars.ContextVar = contextvars.ContextVar("retry_budget", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed; the work was abandoned."""
+
+
+class RetryBudget:
+    """
+    Retries allowed for one batch: RETRY_BUDGET_MIN up front plus
+    RETRY_BUDGET_RATIO per first attempt, so a batch full of failing URLs
+    stops retrying instead of multiplying its upstream load.
+    """
+
+    def __init__(self, ratio: float = None, minimum: int = None):
+        self.ratio = settings.RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.tokens = float(settings.RETRY_BUDGET_MIN if minimum is None else minimum)
+        self.attempts = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_attempt(self) -> None:
+        self.attempts += 1
+        self.tokens += self.ratio
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        stats.deadline_exceeded += 1
+        raise DeadlineExceeded()
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it when the current deadline passes."""
+    try:
+        check_deadline()
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            # Never started; closing it avoids a "never awaited" warning
+            awaitable.close()
+        raise
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        if remaining() > 0:
+            raise  # a timeout of the work itself, not of the deadline
+        stats.deadline_exceeded += 1
+        raise DeadlineExceeded() from None
+
+
+@contextmanager
+def scope(timeout: Optional[float] = None, *, deadline: Optional[float] = None, budget: RetryBudget = None):
+    """
+    Run the block with a deadline `timeout` seconds from now (or at the
+    monotonic `deadline`), never later than the enclosing one, and with
+    `budget`, the enclosing budget, or a new one. Tasks created inside
+    inherit both, like the scheduler batch.
+    """
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+    enclosing = current_deadline.get()
+    if deadline is None or (enclosing is not None and enclosing < deadline):
+        deadline = enclosing
+    budget = budget or current_budget.get() or RetryBudget()
+    deadline_token = current_deadline.set(deadline)
+    budget_token = current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        current_budget.reset(budget_token)
+        current_deadline.reset(deadline_token)
+
+
+class RetryPolicy:
+    """
+    The one retry policy of the scrape path: up to `attempts` tries with
+    full-jitter exponential backoff, retrying transport errors, 202, 429
+    and 5xx only; an open circuit fails at once. Each retry is paid from the current batch's budget, and
+    no attempt or backoff sleep runs past the current deadline.
+    """
+
+    def __init__(self, attempts: int = None, base_delay: float = None, max_delay: float = None):
+        self.attempts = attempts or settings.RETRY_ATTEMPTS
+        self.base_delay = settings.RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+        self.max_delay = settings.RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        return upstream_failure(error)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` until it succeeds, is not retryable, or runs out of tries, budget or time."""
+        budget = current_budget.get()
+        for attempt in range(1, self.attempts + 1):
+            if attempt == 1 and budget is not None:
+                budget.record_attempt()
+            try:
+                return await within_deadline(fn())
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if attempt == self.attempts or not self.retryable(e):
+                    raise
+                if budget is not None and not budget.try_spend():
+                    stats.budget_exhausted += 1
+                    logging.warning(f"Retry budget exhausted, giving up: {e}")
+                    raise
+                delay = self.backoff(attempt)
+                left = remaining()
+                if left is not None and left <= delay:
+                    stats.deadline_exceeded += 1
+                    raise DeadlineExceeded() from e
+                stats.retries += 1
+                logging.warning(f"Retry {attempt}/{self.attempts - 1} in {delay:.2f}s after: {e}")
+                await asyncio.sleep(delay)
+
+
+class RetryStats:
+    def __init__(self):
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.deadline_exceeded = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
+
+
+stats = RetryStats()
+retry_policy = RetryPolicy()
+
+
+def timeout_details() -> Dict[str, str]:
+    return {"price": TIMEOUT, "beds": TIMEOUT, "baths": TIMEOUT, "sqft": TIMEOUT}
@@ -0,0 +1,183 @@
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from core.config import settings
+from core.http_client import UpstreamResponse
+from services.circuit_breaker import CircuitOpenError
+from services.extractor import NOT_AVAILABLE, stats_region_hash
+from services.property_cache import VALIDATORS, property_cache
+from services.singleflight import singleflight
+
+# How a detail result was obtained, reported as `freshness`
+CACHED = "cached"            # served from the property cache
+STORED = "stored"            # served from the property table
+FETCHED = "fetched"          # first download of the page
+REVALIDATED = "revalidated"  # upstream answered 304 Not Modified
+UNCHANGED = "unchanged"      # downloaded, but the stats are the same as before
+REFETCHED = "refetched"      # downloaded and the stats changed
+STALE = "stale"              # circuit open; the last known details, not re-cached
+
+FIELDS = ("price", "beds", "baths", "sqft")
+
+# Detail page fetches by freshness outcome, for /admin/metrics
+outcomes: Counter = Counter()
+
+
+class PageFetch:
+    """Outcome of a conditional detail page fetch."""
+
+    __slots__ = ("previous", "response", "digest", "parsed", "details", "freshness", "settled")
+
+    def __init__(self, previous: Optional[Dict], response: Optional[UpstreamResponse], parsed: Optional[Dict]):
+        self.previous = previous
+        self.response = response
+        self.digest: Optional[str] = None
+        # Details already extracted while the body streamed in
+        self.parsed = parsed
+        self.details: Optional[Dict] = None
+        self.freshness: Optional[str] = None
+        # (details, freshness) once `shared_settle` has parsed the page
+        self.settled: Optional[Tuple[Dict, str]] = None
+
+    @property
+    def needs_parse(self) -> bool:
+        return self.details is None and self.parsed is None
+
+    @property
+    def revalidated(self) -> bool:
+        """Served from the stored details: 304, or an unchanged stats region."""
+        return self.details is not None
+
+
+def _complete(details: Dict) -> bool:
+    return all(details.get(field) not in (NOT_AVAILABLE, "Error", "", None) for field in FIELDS)
+
+
+def conditional_headers(headers: Dict, previous: Optional[Dict]) -> Dict:
+    if not previous:
+        return headers
+    headers = dict(headers)
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+async def fetch_page(
+    key: str,
+    headers: Dict,
+    get: Callable[[Dict], Awaitable[Union[UpstreamResponse, Tuple[UpstreamResponse, Optional[Dict]]]]],
+) -> PageFetch:
+    """
+    Fetch a detail page with the validators stored for `key`. `get`
+    returns the response, or (response, details) when it extracted the
+    details while streaming the body. A 304, or a page whose stats region
+    hashes the same as last time, is answered from the stored details;
+    otherwise `settle` parses the page if needed and stores the validators.
+    While the upstream's circuit is open the last known details are served
+    as STALE, if there are any.
+    """
+    previous = await property_cache.get(VALIDATORS, key)
+    try:
+        fetched = await get(conditional_headers(headers, previous))
+    except CircuitOpenError:
+        if not previous:
+            raise
+        outcomes[STALE] += 1
+        page = PageFetch(previous, None, None)
+        page.details, page.freshness = previous["details"], STALE
+        return page
+    response, parsed = fetched if isinstance(fetched, tuple) else (fetched, None)
+    page = PageFetch(previous, response, parsed)
+    if response.status == 304 and previous:
+        page.details, page.freshness = previous["details"], REVALIDATED
+    else:
+        response.raise_for_status()
+        # Streamed pages are not buffered, so there is nothing to hash;
+        # their freshly parsed details are compared in `remember`
+        page.digest = stats_region_hash(response.content) if parsed is None else None
+        if previous and page.digest and page.digest == previous.get("hash"):
+            page.details, page.freshness = previous["details"], UNCHANGED
+    if page.revalidated:
+        outcomes[page.freshness] += 1
+        await _save(key, page, page.details)
+    return page
+
+
+async def settle(
+    key: str, page: PageFetch, parse: Callable[[bytes], Awaitable[Dict]]
+) -> Tuple[Dict, str]:
+    """Details and freshness of a fetched page, parsing it only if still needed."""
+    if page.revalidated:
+        return page.details, page.freshness
+    details = page.parsed if page.parsed is not None else await parse(page.response.content)
+    return await remember(key, page, details)
+
+
+async def shared_fetch_page(
+    key: str,
+    headers: Dict,
+    get: Callable[[Dict], Awaitable[Union[UpstreamResponse, Tuple[UpstreamResponse, Optional[Dict]]]]],
+) -> PageFetch:
+    """
+    `fetch_page`, shared with every concurrent fetch of the same page -
+    from the detail endpoints, the refresher or the address pipeline.
+    """
+    return await singleflight.do(f"page:{key}", lambda: fetch_page(key, headers, get))
+
+
+async def shared_settle(
+    key: str, page: PageFetch, parse: Callable[[bytes], Awaitable[Dict]]
+) -> Tuple[Dict, str]:
+    """`settle`, parsing a page shared by several callers only once."""
+    if not page.needs_parse:
+        return await settle(key, page, parse)
+    if page.settled is None:
+        page.settled = await singleflight.do(f"settle:{key}", lambda: settle(key, page, parse))
+    return page.settled
+
+
+async def remember(key: str, page: PageFetch, details: Dict) -> Tuple[Dict, str]:
+    """Store the validators for freshly parsed details; returns (details, freshness)."""
+    if page.previous and details == page.previous.get("details"):
+        freshness = UNCHANGED
+    elif page.previous:
+        freshness = REFETCHED
+    else:
+        freshness = FETCHED
+    outcomes[freshness] += 1
+    if _complete(details):
+        await _save(key, page, details)
+    return details, freshness
+
+
+def changed(freshness: str) -> bool:
+    """Whether a fetch produced details that differ from the stored ones."""
+    return freshness in (FETCHED, REFETCHED)
+
+
+def verified(freshness: str) -> bool:
+    """Whether the details were confirmed upstream, and so may be cached."""
+    return freshness != STALE
+
+
+def stats() -> Dict:
+    return {outcome: outcomes[outcome] for outcome in (FETCHED, REVALIDATED, UNCHANGED, REFETCHED, STALE)}
+
+
+async def _save(key: str, page: PageFetch, details: Dict) -> None:
+    previous = page.previous or {}
+    headers = page.response.headers
+    await property_cache.set(
+        VALIDATORS,
+        key,
+        {
+            # A 304 may omit unchanged validators, so keep the old ones
+            "etag": headers.get("etag") or previous.get("etag"),
+            "last_modified": headers.get("last-modified") or previous.get("last_modified"),
+            "hash": page.digest or previous.get("hash"),
+            "details": details,
+        },
+        ttl=settings.CACHE_VALIDATOR_TTL_SECONDS,
+    )
@@ -0,0 +1,297 @@
+import asyncio
+import contextvars
+import itertools
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+from core.config import settings
+
+DEFAULT_BATCH = "default"
+
+# Priority lanes: a user waiting on a response vs. CSV imports and jobs
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_batch_ids = itertools.count(1)
+current_batch: contextvars.ContextVar = contextvars.ContextVar(
+    "scrape_batch", default=DEFAULT_BATCH
+)
+current_lane: contextvars.ContextVar = contextvars.ContextVar(
+    "scrape_lane", default=INTERACTIVE
+)
+
+
+class LaneTicket:
+    """
+    Lane of a fetch shared by several callers (services/singleflight.py).
+    Set in `current_ticket`, it overrides `current_lane`, and `promote`
+    raises it when a higher-priority caller joins, moving any request of
+    the fetch already queued for a slot.
+    """
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        # Queued future -> [host, batch, lane it waits in]
+        self.queued: Dict[asyncio.Future, list] = {}
+
+
+current_ticket: contextvars.ContextVar = contextvars.ContextVar(
+    "scrape_lane_ticket", default=None
+)
+
+
+class _LaneStats:
+    """Slot grants and the time spent waiting for them, for one lane."""
+
+    def __init__(self):
+        self.granted = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.granted += 1
+        if seconds > 0:
+            self.waited += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self) -> Dict:
+        granted = self.granted or 1
+        return {
+            "granted": self.granted,
+            "waited": self.waited,
+            "avg_wait_ms": self.wait_seconds / granted * 1000,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+class _HostQueue:
+    """In-flight counters and per-lane, per-batch waiters for a single upstream host."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # Bulk always keeps at least one slot
+        self.reserved = min(math.ceil(limit * settings.SCRAPE_INTERACTIVE_RESERVED), limit - 1)
+        self.in_flight: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.waiters: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            lane: OrderedDict() for lane in LANES
+        }
+        # Smooth weighted round-robin between lanes that both have waiters
+        self._credit: Dict[str, int] = {lane: 0 for lane in LANES}
+
+    @property
+    def total_in_flight(self) -> int:
+        return sum(self.in_flight.values())
+
+    def has_waiters(self, lane: str) -> bool:
+        return any(self.waiters[lane].values())
+
+    def admissible(self, lane: str) -> bool:
+        """Whether `lane` may take a free slot now."""
+        if self.total_in_flight >= self.limit:
+            return False
+        if lane == INTERACTIVE:
+            return True
+        # Bulk borrows the reserved slots only while interactive is idle
+        idle = not self.in_flight[INTERACTIVE] and not self.has_waiters(INTERACTIVE)
+        return idle or self.in_flight[BULK] < self.limit - self.reserved
+
+    def pick_lane(self) -> Optional[str]:
+        ready = [lane for lane in LANES if self.has_waiters(lane) and self.admissible(lane)]
+        if len(ready) <= 1:
+            return ready[0] if ready else None
+        weights = {lane: max(settings.SCRAPE_LANE_WEIGHTS.get(lane, 1), 1) for lane in ready}
+        for lane in ready:
+            self._credit[lane] += weights[lane]
+        lane = max(ready, key=lambda name: self._credit[name])
+        self._credit[lane] -= sum(weights.values())
+        return lane
+
+    def next_waiter(self, lane: str):
+        # Round-robin within the lane: take the head of the first batch,
+        # then move that batch to the back so every request gets a turn.
+        waiters = self.waiters[lane]
+        while waiters:
+            batch, queue = next(iter(waiters.items()))
+            waiters.move_to_end(batch)
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    if not queue:
+                        del waiters[batch]
+                    return fut
+            del waiters[batch]
+        return None
+
+
+def effective_lane() -> str:
+    """The lane fetches made here are charged to: a shared fetch's ticket, else `current_lane`."""
+    ticket = current_ticket.get()
+    lane = ticket.lane if ticket is not None else current_lane.get()
+    return lane if lane in LANES else INTERACTIVE
+
+
+class ScrapeScheduler:
+    """
+    Process-wide gate for upstream scrape requests.
+
+    Caps in-flight requests per host and hands freed slots to waiting API
+    requests (batches) in round-robin order, so a large batch cannot starve
+    a small one. Batches belong to a priority lane: SCRAPE_INTERACTIVE_RESERVED
+    of each host's slots are held back from bulk work unless the
+    interactive lane is idle, and when both lanes wait, freed slots are
+    shared by SCRAPE_LANE_WEIGHTS. The batch and lane are carried in context
+    variables, so tasks spawned inside `with scheduler.batch():` are
+    attributed automatically.
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, _HostQueue] = {}
+        self._lanes: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+
+    def _host_limit(self, host: str) -> int:
+        return settings.SCRAPE_HOST_LIMITS.get(host, settings.SCRAPE_MAX_IN_FLIGHT_PER_HOST)
+
+    def _queue(self, host: str) -> _HostQueue:
+        queue = self._hosts.get(host)
+        if queue is None:
+            queue = self._hosts[host] = _HostQueue(self._host_limit(host))
+        return queue
+
+    @contextmanager
+    def batch(self, name: Optional[str] = None, lane: Optional[str] = None):
+        """
+        Attribute every fetch made inside this block to batch `name`, or to
+        a new anonymous batch, in `lane` or the enclosing lane.
+        """
+        token = current_batch.set(name or f"batch-{next(_batch_ids)}")
+        lane_token = current_lane.set(lane or current_lane.get())
+        try:
+            yield current_batch.get()
+        finally:
+            current_lane.reset(lane_token)
+            current_batch.reset(token)
+
+    def _dispatch(self, queue: _HostQueue) -> None:
+        """Hand free slots to waiters while any lane may take one."""
+        while True:
+            lane = queue.pick_lane()
+            if lane is None:
+                return
+            fut = queue.next_waiter(lane)
+            if fut is None:
+                continue
+            queue.in_flight[lane] += 1
+            fut.set_result(None)
+
+    async def acquire(self, host: str) -> str:
+        """Wait for a slot on `host`; returns the lane it was charged to."""
+        queue = self._queue(host)
+        lane = effective_lane()
+        if not queue.has_waiters(lane) and queue.admissible(lane):
+            queue.in_flight[lane] += 1
+            self._lanes[lane].record(0.0)
+            return lane
+        fut = asyncio.get_running_loop().create_future()
+        batch = current_batch.get()
+        queue.waiters[lane].setdefault(batch, deque()).append(fut)
+        entry = [host, batch, lane]
+        ticket = current_ticket.get()
+        if ticket is not None:
+            ticket.queued[fut] = entry
+        queued_at = time.perf_counter()
+        # Clears waiters left by cancelled callers and grants a free slot at once
+        self._dispatch(queue)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over just as we were cancelled
+                self.release(host, entry[2])
+            raise
+        finally:
+            if ticket is not None:
+                ticket.queued.pop(fut, None)
+        # The lane may have been raised while queued
+        lane = entry[2]
+        self._lanes[lane].record(time.perf_counter() - queued_at)
+        return lane
+
+    def promote(self, ticket: LaneTicket, lane: str) -> None:
+        """Raise a shared fetch to `lane` if that is a higher priority than its own."""
+        if lane not in LANES or LANES.index(lane) >= LANES.index(ticket.lane):
+            return
+        ticket.lane = lane
+        for fut, entry in ticket.queued.items():
+            host, batch, queued_lane = entry
+            if fut.done():
+                continue
+            queue = self._hosts[host]
+            waiting = queue.waiters[queued_lane].get(batch)
+            if waiting is None or fut not in waiting:
+                continue
+            waiting.remove(fut)
+            if not waiting:
+                del queue.waiters[queued_lane][batch]
+            queue.waiters[lane].setdefault(batch, deque()).append(fut)
+            entry[2] = lane
+            self._dispatch(queue)
+
+    def try_acquire(self, host: str) -> Optional[str]:
+        """
+        Take a slot on `host` only if one is free and nobody in any lane is
+        waiting; returns the lane it was charged to, or None.
+        """
+        queue = self._queue(host)
+        lane = effective_lane()
+        if any(queue.has_waiters(name) for name in LANES) or not queue.admissible(lane):
+            return None
+        queue.in_flight[lane] += 1
+        self._lanes[lane].record(0.0)
+        return lane
+
+    def release(self, host: str, lane: str = INTERACTIVE) -> None:
+        queue = self._hosts[host]
+        queue.in_flight[lane] -= 1
+        self._dispatch(queue)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one in-flight slot for the host of `url`."""
+        host = urlsplit(url).hostname or ""
+        lane = await self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host, lane)
+
+    def stats(self) -> Dict:
+        return {
+            host: {
+                "limit": queue.limit,
+                "reserved": queue.reserved,
+                "in_flight": queue.total_in_flight,
+                "lanes": {
+                    lane: {
+                        "in_flight": queue.in_flight[lane],
+                        "waiting": {
+                            batch: len(waiters) for batch, waiters in queue.waiters[lane].items()
+                        },
+                    }
+                    for lane in LANES
+                },
+            }
+            for host, queue in self._hosts.items()
+        }
+
+    def lane_stats(self) -> Dict:
+        return {lane: stats.stats() for lane, stats in self._lanes.items()}
+
+
+scheduler = ScrapeScheduler()
@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from services import retry
+from services.scheduler import LaneTicket, current_ticket, effective_lane, scheduler
+
+
+class SingleFlight:
+    """
+    In-flight de-duplication: concurrent calls for the same key share one
+    execution of `fn`, whether they come from one batch or from separate
+    API requests. The shared call runs as its own task, so one caller
+    being cancelled does not cancel it for the others.
+
+    The task keeps the first caller's batch but none of its deadline or
+    retry budget; each caller waits under its own deadline instead, so a
+    caller with a short one times out alone. It runs in the highest-priority
+    lane among the callers waiting on it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Tuple[asyncio.Task, LaneTicket]] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        retry.check_deadline()
+        lane = effective_lane()
+        call = self._calls.get(key)
+        if call is None:
+            ticket = LaneTicket(lane)
+            context = contextvars.copy_context()
+            context.run(current_ticket.set, ticket)
+            context.run(retry.current_deadline.set, None)
+            context.run(retry.current_budget.set, None)
+            task = asyncio.get_running_loop().create_task(fn(), context=context)
+            call = self._calls[key] = (task, ticket)
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executed += 1
+        else:
+            self.shared += 1
+            scheduler.promote(call[1], lane)
+        return await retry.within_deadline(asyncio.shield(call[0]))
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "shared": self.shared,
+        }
+
+
+singleflight = SingleFlight()
@@ -0,0 +1,83 @@
+import logging
+import time
+from collections import Counter
+from typing import Dict
+
+from core.http_client import UpstreamStream
+from services.extractor import IncrementalExtractor
+
+
+class StreamStats:
+    """Totals over every page extracted while streaming, for /admin/metrics."""
+
+    def __init__(self):
+        self.pages = 0
+        self.early_exits = 0
+        self.bytes_read = 0
+        self.bytes_skipped = 0
+        self.peak_buffer_bytes = 0
+        self.seconds = 0.0
+        self.sources: Counter = Counter()
+
+    def record(self, report: Dict) -> None:
+        self.pages += 1
+        self.early_exits += report["early_exit"]
+        self.bytes_read += report["bytes_read"]
+        if report["content_length"] is not None:
+            self.bytes_skipped += max(report["content_length"] - report["bytes_read"], 0)
+        self.peak_buffer_bytes = max(self.peak_buffer_bytes, report["peak_buffer_bytes"])
+        self.seconds += report["seconds"]
+        self.sources[report["source"]] += 1
+
+    def stats(self) -> Dict:
+        pages = self.pages or 1
+        return {
+            "pages": self.pages,
+            "early_exits": self.early_exits,
+            "avg_bytes_read": self.bytes_read / pages,
+            "bytes_skipped": self.bytes_skipped,
+            "peak_buffer_bytes": self.peak_buffer_bytes,
+            "avg_ms": self.seconds / pages * 1000,
+            "sources": dict(self.sources),
+        }
+
+
+stream_stats = StreamStats()
+
+
+async def extract_streaming(response: UpstreamStream) -> Dict[str, str]:
+    """
+    Extract the property details from a streamed page, reading only until
+    every field has been found. The rest of the body is never downloaded;
+    leaving the stream block closes the connection.
+    """
+    started = time.perf_counter()
+    extractor = IncrementalExtractor()
+    early_exit = False
+    async for chunk in response.iter_chunks():
+        if extractor.feed(chunk):
+            early_exit = not response.complete
+            break
+    details = extractor.close()
+
+    length = response.headers.get("content-length")
+    if response.headers.get("content-encoding", "identity") != "identity":
+        # Compressed length; not comparable with the decoded bytes read
+        length = None
+    report = {
+        "bytes_read": response.bytes_read,
+        "content_length": int(length) if length and length.isdigit() else None,
+        "early_exit": early_exit,
+        # Only the current chunk is ever held; the parser keeps no tree
+        "peak_buffer_bytes": extractor.peak_chunk,
+        "seconds": time.perf_counter() - started,
+        "source": extractor.source,
+    }
+    stream_stats.record(report)
+    logging.debug(
+        f"Streamed {response.url}: read {report['bytes_read']} of "
+        f"{report['content_length'] or '?'} bytes, peak buffer "
+        f"{report['peak_buffer_bytes']} bytes, early exit {early_exit}, "
+        f"source {report['source']}"
+    )
+    return details
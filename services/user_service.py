@@ -4,6 +4,7 @@ from core.config import settings
 
 from models.user import User
 from schemas.auth import RegisterSchema
+from services.principal_cache import principal_cache
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from jose import jwt
@@ -30,6 +31,7 @@ def create_user(db: Session, register_schema: RegisterSchema):
     db.add(user)
     db.commit()
     db.refresh(user)
+    principal_cache.evict(user.id)
     return user
 
 
@@ -53,7 +55,6 @@ def decode_access_token(token):
     payload = None
     try:
         auth_token = get_token(token)
-        print(auth_token)
         payload = jwt.decode(auth_token, settings.SECRET_KEY, settings.ALGORITHM)
     except Exception as e:
         try:
@@ -0,0 +1,28 @@
+from services.analytics import GROUPINGS, PropertyFrame
+
+ROWS = [
+    ("CA", "San Jose", "95112", 900000.0, 3.0, 2.0, 1500.0),
+    ("CA", "Oakland", "94601", 700000.0, 2.0, 1.0, 1000.0),
+    ("OR", "Portland", "97201", None, 4.0, 3.0, 2200.0),
+    ("CA", "San Jose", "95112", 1100000.0, 4.0, 2.5, None),
+    (None, None, None, 500000.0, None, None, 800.0),
+    ("WA", "Portland", "98601", 400000.0, 3.0, 2.0, 1600.0),
+    ("OR", "Portland", "97201", 600000.0, 3.0, 2.0, 1400.0),
+]
+
+
+def test_chunked_load_matches_single_load():
+    whole = PropertyFrame.from_rows(ROWS)
+    chunked = PropertyFrame.from_chunks([ROWS[:2], [], ROWS[2:5], ROWS[5:]])
+
+    assert chunked.size == whole.size == len(ROWS)
+    for by in GROUPINGS:
+        assert chunked.aggregate(by) == whole.aggregate(by)
+    # Same city name in two states stays two groups
+    assert {"Portland, OR", "Portland, WA"} <= set(chunked.groups["city"][1])
+
+
+def test_empty_load():
+    frame = PropertyFrame.from_chunks([])
+    assert frame.size == 0
+    assert all(frame.aggregate(by) == [] for by in GROUPINGS)
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from core.http_client import UpstreamError
+from services import circuit_breaker
+from services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitRegistry,
+    upstream_failure,
+)
+
+URL = "https://www.redfin.com/home/1"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_CALLS", 4)
+    monkeypatch.setattr(settings, "CIRCUIT_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "CIRCUIT_OPEN_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "CIRCUIT_HALF_OPEN_PROBES", 2)
+    return clock
+
+
+def _opened(clock):
+    breaker = CircuitBreaker("redfin")
+    for ok in (True, False, True, False):
+        breaker.record(ok, breaker.acquire(URL))
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_opens_at_error_rate_and_fails_fast(clock):
+    breaker = _opened(clock)
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.acquire(URL)
+    assert excinfo.value.retry_in == pytest.approx(30.0)
+    assert breaker.rejected == 1
+
+
+def test_half_open_admits_only_the_probes(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    assert breaker.acquire(URL) is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.acquire(URL) is True
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire(URL)
+
+
+def test_closes_when_every_probe_succeeds(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    probes = [breaker.acquire(URL), breaker.acquire(URL)]
+    breaker.record(True, probes[0])
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, probes[1])
+    assert breaker.state == CLOSED
+    assert breaker.acquire(URL) is False
+
+
+def test_failed_probe_reopens(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    breaker.record(False, breaker.acquire(URL))
+    assert breaker.state == OPEN and breaker.opened == 2
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire(URL)
+
+
+def test_late_outcome_of_pre_open_call_is_ignored(clock):
+    breaker = _opened(clock)
+    clock.now += 30
+    breaker.acquire(URL)
+    breaker.record(False, False)
+    assert breaker.state == HALF_OPEN
+
+
+def test_cancelled_probe_gives_its_slot_back(clock):
+    registry = CircuitRegistry()
+    breaker = registry.for_url(URL)
+    for ok in (True, False, True, False):
+        breaker.record(ok, breaker.acquire(URL))
+    clock.now += 30
+
+    async def cancelled_call():
+        async with registry.guard(URL):
+            raise asyncio.CancelledError
+
+    for _ in range(3):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(cancelled_call())
+    assert breaker.acquire(URL) is True
+
+
+def test_only_upstream_trouble_counts_as_failure():
+    assert upstream_failure(UpstreamError(URL, None, "reset"))
+    assert upstream_failure(UpstreamError(URL, 503, "unavailable"))
+    assert upstream_failure(UpstreamError(URL, 429, "slow down"))
+    assert upstream_failure(asyncio.TimeoutError())
+    assert not upstream_failure(UpstreamError(URL, 404, "not found"))
+    assert not upstream_failure(CircuitOpenError(URL, 1.0))
@@ -0,0 +1,141 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from core.config import settings
+from services.columnar_export import (
+    HEADER_SIZE,
+    ColumnarWriter,
+    ExportFormatError,
+    column_path,
+    export_properties,
+    latest_rows,
+    load_manifest,
+    open_export,
+)
+
+SCRAPED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _rows(ids, price=100000.0):
+    return [
+        (
+            home, f"https://www.redfin.com/CA/San-Jose/{home}-Main-St-95112/home/{home}",
+            price + home, 3.0, 2.0, 1500.0, "CA", "San Jose", "95112", SCRAPED + timedelta(seconds=home),
+        )
+        for home in ids
+    ]
+
+
+def _export(directory, *snapshots):
+    for rows in snapshots:
+        writer = ColumnarWriter(directory)
+        writer.append(rows)
+        writer.commit((rows[-1][-1], rows[-1][0]))
+        writer.close()
+
+
+def _urls(columns):
+    ends = columns["redfin_url_end"]
+    starts = np.concatenate(([0], ends[:-1]))
+    data = columns["redfin_url_bytes"].tobytes()
+    return [data[start:end].decode() for start, end in zip(starts, ends)]
+
+
+def test_incremental_snapshots_append(tmp_path):
+    _export(str(tmp_path), _rows([1, 2]), _rows([3]))
+    columns = open_export(str(tmp_path))
+    assert columns["id"].tolist() == [1, 2, 3]
+    assert columns["price"].tolist() == [100001.0, 100002.0, 100003.0]
+    assert _urls(columns)[2].endswith("/home/3")
+    manifest = load_manifest(str(tmp_path))
+    assert [snapshot["rows"] for snapshot in manifest["snapshots"]] == [2, 1]
+    assert manifest["watermark"]["id"] == 3
+    assert manifest["cities"] == ["San Jose"]
+
+
+def test_uncommitted_rows_are_cut_off_by_the_next_writer(tmp_path):
+    directory = str(tmp_path)
+    _export(directory, _rows([1, 2]))
+    crashed = ColumnarWriter(directory)
+    crashed.append(_rows([7, 8, 9]))
+    crashed.close()
+    # Readers only see the committed rows
+    assert open_export(directory)["id"].tolist() == [1, 2]
+
+    writer = ColumnarWriter(directory)
+    assert os.path.getsize(column_path(directory, "id")) == HEADER_SIZE + 2 * 8
+    writer.append(_rows([3]))
+    writer.commit(None)
+    writer.close()
+    columns = open_export(directory)
+    assert columns["id"].tolist() == [1, 2, 3]
+    assert [url.rsplit("/", 1)[1] for url in _urls(columns)] == ["1", "2", "3"]
+
+
+def test_latest_rows_keeps_the_newest_row_per_id():
+    ids = np.array([5, 3, 5, 9, 3, 5])
+    assert latest_rows(ids).tolist() == [3, 4, 5]
+    assert latest_rows(np.array([], dtype=np.int64)).tolist() == []
+
+
+def test_open_export_needs_a_manifest(tmp_path):
+    with pytest.raises(ExportFormatError):
+        open_export(str(tmp_path))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from models.property import Property
+    from services import columnar_export
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Property.__table__.create(engine)
+    session_local = sessionmaker(bind=engine)
+    monkeypatch.setattr(columnar_export, "SessionLocal", session_local)
+    monkeypatch.setattr(settings, "EXPORT_SETTLE_SECONDS", 0)
+    session = session_local()
+    yield session
+    session.close()
+
+
+def _store(db, home, modified):
+    from models.property import Property
+
+    db.add(Property(
+        id=home, redfin_url=f"https://www.redfin.com/CA/San-Jose/{home}-Main-St-95112/home/{home}",
+        price_value=100000 + home, scraped_at=SCRAPED, modified_date=modified,
+    ))
+    db.commit()
+
+
+def test_export_pages_on_modified_date_not_scraped_at(db, tmp_path):
+    import crud
+
+    directory = str(tmp_path)
+    _store(db, 1, SCRAPED)
+    _store(db, 2, SCRAPED + timedelta(seconds=1))
+    assert export_properties(directory)["rows"] == 2
+
+    # A revalidation that found the page unchanged only touches the row
+    crud.property.touch_many(db, ids=[1, 2])
+    assert export_properties(directory)["rows"] == 2
+
+    _store(db, 3, SCRAPED + timedelta(seconds=2))
+    manifest = export_properties(directory)
+    assert manifest["rows"] == 3
+    assert open_export(directory)["id"].tolist() == [1, 2, 3]
+    assert manifest["watermark"]["id"] == 3
+
+
+def test_watermark_of_an_older_export_is_still_read():
+    from services.columnar_export import _watermark
+
+    manifest = {"watermark": {"scraped_at": SCRAPED.isoformat(), "id": 4}}
+    assert _watermark(manifest) == (SCRAPED, 4)
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud
+from models.property import Property
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Property.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Property(
+        id=1, redfin_url="https://www.redfin.com/CA/San-Jose/1-Main-St-95112/home/1",
+        price="$1,249,000", scraped_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        modified_date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_touch_does_not_change_data_version(db):
+    version = crud.property.data_version(db)
+    assert crud.property.touch_many(db, ids=[1]) == 1
+    assert crud.property.data_version(db) == version
+    db.expire_all()
+    assert db.get(Property, 1).scraped_at.replace(tzinfo=None) > datetime(2026, 1, 1)
+
+
+def test_new_row_changes_data_version(db):
+    version = crud.property.data_version(db)
+    db.add(Property(id=2, redfin_url="u", scraped_at=datetime.now(timezone.utc)))
+    db.commit()
+    assert crud.property.data_version(db) != version
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from core.config import settings
+from services.extractor import (
+    SOURCE_DOM,
+    SOURCE_INLINE_JSON,
+    SOURCE_JSON_LD,
+    SOURCE_MIXED,
+    IncrementalExtractor,
+    extract_with_source,
+)
+
+DETAILS = {"price": "$1,249,000", "beds": "3", "baths": "2.5", "sqft": "1,820 sq ft"}
+
+
+def _json_ld(*fields):
+    data = {
+        "offers": {"price": 1249000},
+        "numberOfBedrooms": 3,
+        "numberOfBathroomsTotal": 2.5,
+        "floorSize": {"value": 1820},
+    }
+    keys = {"price": "offers", "beds": "numberOfBedrooms", "baths": "numberOfBathroomsTotal", "sqft": "floorSize"}
+    data = {keys[field]: data[keys[field]] for field in fields}
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def _inline(*fields):
+    state = {"priceInfo": {"amount": 1249000}, "beds": 3, "baths": 2.5, "sqFt": {"value": 1820}}
+    keys = {"price": "priceInfo", "beds": "beds", "baths": "baths", "sqft": "sqFt"}
+    state = {keys[field]: state[keys[field]] for field in fields}
+    return f'<script>window.__state = {{"addressSectionInfo": {json.dumps(state)}}};</script>'
+
+
+def _dom(*fields):
+    blocks = {
+        "price": '<div data-rf-test-id="abp-price"><div class="statsValue">$1,249,000</div></div>',
+        "beds": '<div data-rf-test-id="abp-beds"><div class="statsValue">3</div></div>',
+        "baths": '<div data-rf-test-id="abp-baths"><div class="statsValue">2.5</div></div>',
+        "sqft": '<div data-rf-test-id="abp-sqFt">1,820 sq ft</div>',
+    }
+    return "".join(blocks[field] for field in fields)
+
+
+def _page(head="", body=""):
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+
+ALL = ("price", "beds", "baths", "sqft")
+
+
+@pytest.fixture(autouse=True)
+def structured_on(monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTOR_STRUCTURED", True)
+
+
+@pytest.mark.parametrize(
+    "page, source",
+    [
+        (_page(_json_ld(*ALL)), SOURCE_JSON_LD),
+        (_page(_inline(*ALL)), SOURCE_INLINE_JSON),
+        (_page(_json_ld("price", "beds") + _inline("baths", "sqft")), SOURCE_MIXED),
+        (_page(_json_ld("price"), _dom("beds", "baths", "sqft")), SOURCE_MIXED),
+        (_page(body=_dom(*ALL)), SOURCE_DOM),
+        # Structured data only repeats what the DOM already has
+        (_page(_json_ld("price"), _dom(*ALL)), SOURCE_DOM),
+    ],
+)
+def test_source_names_every_path_that_served_fields(page, source):
+    assert extract_with_source(page) == (DETAILS, source)
+
+
+@pytest.mark.parametrize(
+    "page, source",
+    [
+        (_page(_json_ld(*ALL)), SOURCE_JSON_LD),
+        (_page(_json_ld("price"), _dom("beds", "baths", "sqft")), SOURCE_MIXED),
+        (_page(body=_dom(*ALL)), SOURCE_DOM),
+    ],
+)
+def test_streamed_source(page, source):
+    extractor = IncrementalExtractor()
+    extractor.feed(page.encode())
+    assert (extractor.close(), extractor.source) == (DETAILS, source)
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from services import hedging
+from services.hedging import Hedger
+from services.scheduler import ScrapeScheduler
+
+URL = "https://www.redfin.com/stingray/do/location-autocomplete"
+HOST = "www.redfin.com"
+
+
+@pytest.fixture(autouse=True)
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "HEDGE_MAX_RATIO", 1.0)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "SCRAPE_HOST_LIMITS", {HOST: 2})
+    monkeypatch.setattr(hedging, "scheduler", ScrapeScheduler())
+
+
+def _hedger():
+    hedger = Hedger()
+    hedger.tracker(URL).record(0.001)
+    return hedger
+
+
+def _slow_then_fast():
+    calls = []
+
+    async def fn():
+        calls.append(hedging.scheduler.stats()[HOST]["in_flight"])
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return len(calls)
+
+    return fn, calls
+
+
+def test_hedge_takes_and_returns_a_free_slot():
+    hedger = _hedger()
+    fn, calls = _slow_then_fast()
+
+    async def run():
+        async with hedging.scheduler.slot(URL):
+            return await hedger.run(URL, fn)
+
+    assert asyncio.run(run()) == 2
+    # The hedge ran holding a second slot, and both were released
+    assert calls == [1, 2]
+    assert hedging.scheduler.stats()[HOST]["in_flight"] == 0
+    assert hedger.tracker(URL).hedge_wins == 1
+
+
+def test_no_hedge_while_requests_wait_for_the_host():
+    hedger = _hedger()
+    fn, calls = _slow_then_fast()
+
+    async def run():
+        async with hedging.scheduler.slot(URL), hedging.scheduler.slot(URL):
+            waiter = asyncio.create_task(hedging.scheduler.acquire(HOST))
+            await asyncio.sleep(0)
+            result = await hedger.run(URL, fn)
+            waiter.cancel()
+            return result
+
+    assert asyncio.run(run()) == 1
+    assert len(calls) == 1
+    assert hedger.tracker(URL).busy == 1
+
+
+def test_fetch_latency_excludes_time_queued_for_a_slot(monkeypatch):
+    from core.http_client import UpstreamResponse
+    from util import user_util
+
+    monkeypatch.setattr(user_util, "scheduler", hedging.scheduler)
+    monkeypatch.setattr(user_util, "hedger", Hedger())
+
+    async def get(url, headers=None):
+        return UpstreamResponse(url, 200, {}, b"ok")
+
+    monkeypatch.setattr(user_util.upstream, "get", get)
+
+    async def scenario():
+        async with hedging.scheduler.slot(URL), hedging.scheduler.slot(URL):
+            pending = asyncio.create_task(user_util.fetch_with_retry(URL, {}))
+            await asyncio.sleep(0.2)
+        return await pending
+
+    assert asyncio.run(scenario()) == "ok"
+    assert user_util.hedger.tracker(URL)._samples[0] < 0.1
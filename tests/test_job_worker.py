@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from models.scrape_job import DONE, FAILED, URL
+from services import job_worker
+from services.job_worker import JobWorker, retry_reason
+
+ERROR_DETAILS = {"price": "Error", "beds": "Error", "baths": "Error", "sqft": "Error"}
+DETAILS = {"price": "$1,249,000", "beds": "3", "baths": "2.5", "sqft": "1,820 sq ft"}
+
+
+class RecordingWorker(JobWorker):
+    """JobWorker with the database calls replaced by a log of them."""
+
+    def __init__(self, result):
+        super().__init__(name="test")
+        self.result = result
+        self.calls = []
+
+    async def _scrape(self, item):
+        return self.result
+
+    def _finish(self, item_id, state, result=None, error=None):
+        self.calls.append(("finish", item_id, state, error))
+
+    def _retry(self, item_id, error, delay):
+        self.calls.append(("retry", item_id, error, delay))
+
+
+def _item(attempts):
+    return {"id": 7, "job_id": 1, "kind": URL, "input": {"redfin_url": "u"}, "attempts": attempts}
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 3)
+
+
+def test_retry_reason():
+    assert retry_reason(DETAILS) is None
+    assert retry_reason({"price": "Not Found"}) is None
+    assert retry_reason(ERROR_DETAILS) == "Scrape returned Error"
+    assert retry_reason({"redfin_url": "Timeout"}) == "Scrape returned Timeout"
+    assert retry_reason({"status": "timeout", "price": None}) == "Scrape returned timeout"
+
+
+def test_error_result_is_requeued_while_attempts_remain():
+    worker = RecordingWorker(ERROR_DETAILS)
+    asyncio.run(worker._run_item(_item(attempts=1)))
+    assert worker.calls == [("retry", 7, "Scrape returned Error", 0)]
+    assert worker.retried == 1 and worker.processed == 0
+
+
+def test_error_result_fails_on_last_attempt():
+    worker = RecordingWorker(ERROR_DETAILS)
+    asyncio.run(worker._run_item(_item(attempts=3)))
+    assert worker.calls == [("finish", 7, FAILED, "Scrape returned Error")]
+
+
+def test_good_result_is_done():
+    worker = RecordingWorker(DETAILS)
+    asyncio.run(worker._run_item(_item(attempts=1)))
+    assert worker.calls == [("finish", 7, DONE, None)]
+    assert worker.processed == 1
+
+
+def test_retry_waits_longer_each_attempt_without_holding_a_slot(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_DELAY_SECONDS", 1.5)
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(job_worker.asyncio, "sleep", fake_sleep)
+    worker = RecordingWorker(ERROR_DETAILS)
+    asyncio.run(worker._run_item(_item(attempts=2)))
+    assert worker.calls == [("retry", 7, "Scrape returned Error", 3.0)]
+    assert slept == []
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from schemas.property import PropertyStatus
+from services.normalize import PropertyRecord, pack_details, unpack_details
+from services.property_cache import DETAILS, PropertyCache
+
+SCRAPED = [
+    {"price": "$1,249,000", "beds": "3", "baths": "2.5", "sqft": "1,820 sq ft"},
+    {"price": "$1.25M", "beds": "Studio", "baths": "1", "sqft": "1,820"},
+    {"price": "$640,000", "beds": "—", "baths": "Not Available", "sqft": "980 sq ft"},
+    {"price": "Error", "beds": "Error", "baths": "Error", "sqft": "Error"},
+    {"price": "Not Found", "beds": "Not Found", "baths": "Not Found", "sqft": "Not Found"},
+]
+
+
+@pytest.mark.parametrize("details", SCRAPED)
+def test_pack_round_trip_keeps_display_strings(details):
+    assert unpack_details(pack_details(details)) == details
+
+
+def test_pack_is_compact_when_strings_rebuild_exactly():
+    assert pack_details(SCRAPED[0]) == [1249000, 3.0, 2.5, 1820, "ok"]
+
+
+def test_record_numbers_and_status():
+    record = PropertyRecord.from_details(SCRAPED[1])
+    assert (record.price, record.beds, record.baths, record.sqft) == (1250000, None, 1.0, 1820)
+    assert record.status is PropertyStatus.PARTIAL
+    assert PropertyRecord.from_details(SCRAPED[4]).status is PropertyStatus.NOT_FOUND
+
+
+def test_dict_entries_cached_before_packing_still_read():
+    assert unpack_details(SCRAPED[0]) == SCRAPED[0]
+
+
+@pytest.mark.parametrize("details", SCRAPED[:3])
+def test_cache_round_trip_through_both_tiers(details, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L2_PATH", str(tmp_path / "cache.sqlite3"))
+
+    async def run():
+        writer = PropertyCache()
+        await writer.set(DETAILS, "home/1", details)
+        from_l1 = await writer.get(DETAILS, "home/1")
+        # A fresh cache has an empty L1, so this read comes from SQLite
+        from_l2 = await PropertyCache().get(DETAILS, "home/1")
+        return from_l1, from_l2
+
+    assert asyncio.run(run()) == (details, details)
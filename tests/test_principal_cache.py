@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud
+from crud import crud_user
+from middlewares import auth_middleware
+from models.user import User
+from services.principal_cache import PrincipalCache
+from services.user_service import create_access_token
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache()
+    monkeypatch.setattr(auth_middleware, "principal_cache", cache)
+    monkeypatch.setattr(crud_user, "principal_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    User.__table__.create(engine)
+    session_local = sessionmaker(bind=engine)
+    monkeypatch.setattr(auth_middleware, "SessionLocal", session_local)
+    session = session_local()
+    yield session
+    session.close()
+
+
+def _add_user(db, email="a@example.com", first_name="Ada"):
+    user = User(
+        first_name=first_name, last_name="L", password="-", email=email,
+        expiry_date=datetime.now() + timedelta(days=1), status=1,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _whoami(user_id):
+    app = FastAPI()
+    app.add_middleware(auth_middleware.AuthMiddleWare)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return {"first_name": request.state.current_user.first_name}
+
+    headers = {"Authorization": "Bearer " + create_access_token({"email": "a@example.com", "id": user_id})}
+
+    async def get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/whoami", headers=headers)
+        return response.status_code, response.json()
+
+    return asyncio.run(get())
+
+
+def test_repeat_requests_hit_the_cache(cache, db):
+    user = _add_user(db)
+    assert _whoami(user.id) == (200, {"first_name": "Ada"})
+    assert _whoami(user.id) == (200, {"first_name": "Ada"})
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_update_evicts_the_user(cache, db):
+    user = _add_user(db)
+    _whoami(user.id)
+    crud.user.update(db, db_obj=user, obj_in={"first_name": "Grace"})
+    assert cache.evicted == 1
+    assert _whoami(user.id) == (200, {"first_name": "Grace"})
+
+
+def test_remove_evicts_the_user(cache, db):
+    user = _add_user(db)
+    _whoami(user.id)
+    crud.user.remove(db, id=user.id)
+    assert _whoami(user.id)[0] == 404
+
+
+def test_read_that_raced_an_eviction_is_not_cached():
+    cache = PrincipalCache()
+    version = cache.version()
+    cache.evict(7)
+    cache.put(7, "old row", version)
+    assert cache.get(7) is None
+    cache.put(7, "new row", cache.version())
+    assert cache.get(7) == "new row"
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from core.config import settings
+from services import refresher as refresher_module
+from services.refresher import Refresher
+
+URL = "https://www.redfin.com/CA/San-Jose/1-Main-St-95112/home/101"
+
+
+@pytest.fixture(autouse=True)
+def refresh_settings(monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_ENABLED", True)
+    monkeypatch.setattr(settings, "REFRESH_MIN_HITS", 0.5)
+    monkeypatch.setattr(settings, "REFRESH_RETRY_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "REFRESH_QUIET_HOURS", "0-23")
+
+
+class ScriptedRefresher(Refresher):
+    """Refresher whose scrapes return the next scripted outcome."""
+
+    def __init__(self, outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.urls = []
+
+    async def _refresh(self, url):
+        self.urls.append(url)
+        return self.outcomes.pop(0)
+
+
+def _expiring(refresher):
+    refresher.record(URL)
+    (access,) = refresher._keys.values()
+    access.refreshed_at = time.monotonic() - settings.CACHE_TTL_SECONDS
+    return access
+
+
+def test_failed_refresh_stays_due_after_backoff():
+    refresher = ScriptedRefresher([False])
+    access = _expiring(refresher)
+    stale_since = access.refreshed_at
+
+    assert asyncio.run(refresher.refresh_hot()) == 0
+    assert refresher.urls == [URL]
+    assert access.refreshed_at == stale_since
+    assert refresher.due() == []
+    assert refresher.due(now=access.retry_at) == [(refresher_module.canonical_redfin_url(URL), access)]
+
+
+def test_successful_refresh_moves_refreshed_at():
+    refresher = ScriptedRefresher([True])
+    access = _expiring(refresher)
+
+    assert asyncio.run(refresher.refresh_hot()) == 1
+    assert time.monotonic() - access.refreshed_at < 1
+    assert refresher.due(now=time.monotonic() + settings.REFRESH_RETRY_SECONDS) == []
+
+
+def test_sweep_cursor_stops_at_last_processed_row(monkeypatch):
+    refresher = ScriptedRefresher([True, True, True])
+    rows = [(11, URL), (12, URL), (13, URL)]
+    monkeypatch.setattr(settings, "PROPERTY_STORE_ENABLED", True)
+    monkeypatch.setattr(refresher, "_stale_rows", lambda: rows)
+    quiet = iter([True, True, False])
+    monkeypatch.setattr(refresher_module, "quiet_now", lambda spec: next(quiet))
+
+    assert asyncio.run(refresher.sweep_stale()) == 2
+    assert refresher._sweep_after == 12
+
+
+def test_sweep_skips_rows_that_keep_failing(monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_SWEEP_MAX_FAILURES", 2)
+    monkeypatch.setattr(settings, "PROPERTY_STORE_ENABLED", True)
+    refresher = ScriptedRefresher([False, True, False, True, True])
+    other = URL.replace("/home/101", "/home/102")
+    monkeypatch.setattr(refresher, "_stale_rows", lambda: [(11, URL), (12, other)])
+
+    for _ in range(3):
+        asyncio.run(refresher.sweep_stale())
+
+    # Row 11 failed twice and is no longer scraped; row 12 is each time
+    assert refresher.urls == [URL, other, URL, other, other]
+    assert dict(refresher._sweep_failures) == {11: 2}
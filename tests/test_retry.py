@@ -0,0 +1,36 @@
+import asyncio
+import gc
+import warnings
+
+import pytest
+
+from services import retry
+from services.retry import DeadlineExceeded, RetryPolicy
+
+
+def test_call_past_the_deadline_never_creates_a_dangling_coroutine():
+    called = []
+
+    async def fetch():
+        called.append(True)
+
+    async def run():
+        with retry.scope(-1):
+            await RetryPolicy(attempts=3).call(fetch)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run())
+        gc.collect()
+    assert called == []
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+
+
+def test_within_deadline_times_out_work_that_outlives_it():
+    async def run():
+        with retry.scope(0.05):
+            await retry.within_deadline(asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
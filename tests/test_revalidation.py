@@ -0,0 +1,42 @@
+import asyncio
+
+from core.http_client import UpstreamResponse
+from services import revalidation
+from services.revalidation import FETCHED, shared_fetch_page, shared_settle
+
+PAGE = b"<html><body>$1,250,000 3 beds 2 baths 1,820 sq ft</body></html>"
+DETAILS = {"price": "$1,250,000", "beds": "3", "baths": "2", "sqft": "1,820"}
+
+
+def test_concurrent_callers_share_one_fetch_and_one_parse(monkeypatch):
+    fetches, parses = [], []
+
+    async def no_validators(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(revalidation.property_cache, "get", no_validators)
+    monkeypatch.setattr(revalidation.property_cache, "set", no_validators)
+
+    async def get(headers):
+        fetches.append(headers)
+        await asyncio.sleep(0.05)
+        return UpstreamResponse("https://www.redfin.com/home/1", 200, {}, PAGE)
+
+    async def parse(content):
+        parses.append(content)
+        await asyncio.sleep(0.05)
+        return dict(DETAILS)
+
+    async def caller():
+        page = await shared_fetch_page("home/1", {}, get)
+        return await shared_settle("home/1", page, parse), page
+
+    async def run():
+        (first, page), (second, _) = await asyncio.gather(caller(), caller())
+        # A caller reaching the parse stage later reuses the parsed details
+        third = await shared_settle("home/1", page, parse)
+        return first, second, third
+
+    results = asyncio.run(run())
+    assert results == ((DETAILS, FETCHED),) * 3
+    assert len(fetches) == len(parses) == 1
@@ -0,0 +1,103 @@
+import asyncio
+from collections import deque
+
+import pytest
+
+from core.config import settings
+from services.scheduler import BULK, INTERACTIVE, ScrapeScheduler, _HostQueue
+
+
+@pytest.fixture(autouse=True)
+def lane_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_INTERACTIVE_RESERVED", 0.25)
+    monkeypatch.setattr(settings, "SCRAPE_LANE_WEIGHTS", {INTERACTIVE: 3, BULK: 1})
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def _wait(loop, queue, lane, batch="b"):
+    fut = loop.create_future()
+    queue.waiters[lane].setdefault(batch, deque()).append(fut)
+    return fut
+
+
+def test_interactive_reservation_caps_bulk():
+    queue = _HostQueue(8)
+    assert queue.reserved == 2
+    queue.in_flight[INTERACTIVE] = 1
+    queue.in_flight[BULK] = 5
+    assert queue.admissible(BULK)
+    queue.in_flight[BULK] = 6
+    assert not queue.admissible(BULK)
+    assert queue.admissible(INTERACTIVE)
+
+
+def test_bulk_borrows_reserved_slots_while_interactive_is_idle():
+    queue = _HostQueue(8)
+    queue.in_flight[BULK] = 7
+    assert queue.admissible(BULK)
+    queue.in_flight[BULK] = 8
+    assert not queue.admissible(BULK) and not queue.admissible(INTERACTIVE)
+
+
+def test_interactive_waiter_stops_bulk_borrowing(loop):
+    queue = _HostQueue(8)
+    queue.in_flight[BULK] = 6
+    _wait(loop, queue, INTERACTIVE)
+    assert not queue.admissible(BULK)
+
+
+def test_bulk_always_keeps_a_slot():
+    assert _HostQueue(1).reserved == 0
+    assert _HostQueue(2).reserved == 1
+
+
+def test_pick_lane_shares_slots_by_weight(loop):
+    queue = _HostQueue(100)
+    _wait(loop, queue, INTERACTIVE)
+    _wait(loop, queue, BULK)
+    picks = [queue.pick_lane() for _ in range(8)]
+    assert picks.count(INTERACTIVE) == 6 and picks.count(BULK) == 2
+    # Never two bulk picks in a row at 3:1
+    assert all(picks[i : i + 2] != [BULK, BULK] for i in range(len(picks) - 1))
+
+
+def test_pick_lane_skips_lanes_that_cannot_take_a_slot(loop):
+    queue = _HostQueue(4)
+    queue.in_flight[BULK] = 3
+    _wait(loop, queue, BULK)
+    # Interactive is idle, so bulk may borrow the reserved slot
+    assert queue.pick_lane() == BULK
+    _wait(loop, queue, INTERACTIVE)
+    assert [queue.pick_lane() for _ in range(4)] == [INTERACTIVE] * 4
+    queue.in_flight[INTERACTIVE] = 1
+    assert queue.pick_lane() is None
+
+
+def test_freed_slot_goes_to_interactive_before_bulk(monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_HOST_LIMITS", {"h": 1})
+    scheduler = ScrapeScheduler()
+    order = []
+
+    async def fetch(name, lane):
+        with scheduler.batch(name, lane=lane):
+            lane = await scheduler.acquire("h")
+            order.append(name)
+            scheduler.release("h", lane)
+
+    async def run():
+        held = await scheduler.acquire("h")
+        tasks = [asyncio.create_task(fetch("bulk", BULK))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(fetch("user", INTERACTIVE)))
+        await asyncio.sleep(0)
+        scheduler.release("h", held)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["user", "bulk"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from services import retry
+from services import singleflight as singleflight_module
+from services.scheduler import BULK, INTERACTIVE, ScrapeScheduler
+from services.singleflight import SingleFlight
+
+
+def test_each_caller_waits_under_its_own_deadline():
+    flight = SingleFlight()
+    seen = []
+
+    async def fetch():
+        seen.append((retry.current_deadline.get(), retry.current_budget.get()))
+        await asyncio.sleep(0.3)
+        return "ok"
+
+    async def call(timeout):
+        with retry.scope(timeout):
+            try:
+                return await flight.do("home/1", fetch)
+            except retry.DeadlineExceeded:
+                return retry.TIMEOUT
+
+    async def run():
+        return await asyncio.gather(call(0.1), call(30))
+
+    assert asyncio.run(run()) == [retry.TIMEOUT, "ok"]
+    assert seen == [(None, None)]
+    assert (flight.executed, flight.shared) == (1, 1)
+
+
+def test_expired_deadline_does_not_start_the_call():
+    flight = SingleFlight()
+    started = []
+
+    async def fetch():
+        started.append(True)
+
+    async def run():
+        with retry.scope(-1):
+            await flight.do("home/1", fetch)
+
+    with pytest.raises(retry.DeadlineExceeded):
+        asyncio.run(run())
+    assert started == []
+
+
+def test_interactive_caller_raises_a_queued_bulk_fetch(monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_HOST_LIMITS", {"h": 1})
+    scheduler = ScrapeScheduler()
+    monkeypatch.setattr(singleflight_module, "scheduler", scheduler)
+    flight = SingleFlight()
+    order = []
+
+    async def fetch(name):
+        lane = await scheduler.acquire("h")
+        order.append((name, lane))
+        scheduler.release("h", lane)
+
+    async def call(lane, batch):
+        with scheduler.batch(batch, lane=lane):
+            await flight.do("home/1", lambda: fetch("shared"))
+
+    async def other_bulk():
+        with scheduler.batch("import", lane=BULK):
+            await fetch("other")
+
+    async def run():
+        held = await scheduler.acquire("h")
+        waiting = [asyncio.create_task(other_bulk()), asyncio.create_task(call(BULK, "job"))]
+        await asyncio.sleep(0)
+        waiting.append(asyncio.create_task(call(INTERACTIVE, "user")))
+        await asyncio.sleep(0)
+        scheduler.release("h", held)
+        await asyncio.gather(*waiting)
+
+    asyncio.run(run())
+    assert order == [("shared", INTERACTIVE), ("other", BULK)]
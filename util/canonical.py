@@ -0,0 +1,81 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+# USPS-style abbreviations so "Street"/"St."/"ST" produce the same key
+_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "drive": "dr",
+    "road": "rd",
+    "court": "ct",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "place": "pl",
+    "terrace": "ter",
+    "circle": "cir",
+    "highway": "hwy",
+    "parkway": "pkwy",
+    "square": "sq",
+    "trail": "trl",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "northeast": "ne",
+    "northwest": "nw",
+    "southeast": "se",
+    "southwest": "sw",
+    "apartment": "apt",
+    "suite": "ste",
+    "unit": "unit",
+}
+
+_PUNCTUATION = re.compile(r"[.,;:'\"]")
+_ZIP_PLUS_FOUR = re.compile(r"^(\d{5})-\d{4}$")
+_HOME_ID = re.compile(r"/home/(\d+)")
+# "/CA/Irvine/1-Burke-92620/home/123" -> state, city, zip
+_LOCATION = re.compile(r"^/([A-Za-z]{2})/([^/]+)/[^/]*?(\d{5})/(?:unit-[^/]+/)?home/\d+")
+
+
+def canonical_address(full_address: str) -> str:
+    """
+    Stable lookup key for a free-form address: case, spacing, punctuation,
+    street-suffix spelling and ZIP+4 differences all map to the same key.
+    """
+    text = _PUNCTUATION.sub(" ", full_address.lower()).replace("#", " apt ")
+    tokens = []
+    for token in text.split():
+        zip_match = _ZIP_PLUS_FOUR.match(token)
+        if zip_match:
+            token = zip_match.group(1)
+        tokens.append(_ABBREVIATIONS.get(token, token))
+    return " ".join(tokens)
+
+
+def canonical_redfin_url(url: str) -> str:
+    """
+    Key a Redfin detail URL by its home id ("home/<id>"). URLs without a
+    home id fall back to the lower-cased host and path.
+    """
+    match = _HOME_ID.search(url)
+    if match:
+        return f"home/{match.group(1)}"
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def redfin_home_id(url: str) -> Optional[int]:
+    """Numeric Redfin home id of a detail URL, if it has one."""
+    match = _HOME_ID.search(url)
+    return int(match.group(1)) if match else None
+
+
+def redfin_location(url: str) -> Optional[Tuple[str, str, str]]:
+    """State, city and zip encoded in the path of a Redfin detail URL."""
+    match = _LOCATION.match(urlsplit(url.strip()).path)
+    if match is None:
+        return None
+    state, city, zip_code = match.groups()
+    return state.upper(), city.replace("-", " "), zip_code
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Awaitable, Iterable, List
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """Streaming is chosen with `?stream=true` or an NDJSON Accept header."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def iter_ndjson(tasks: List[asyncio.Task]):
+    """
+    Yield one JSON line per task in completion order; unfinished tasks are
+    cancelled if the client goes away.
+    """
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            yield result.model_dump_json() + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def ndjson_response(jobs: Iterable[Awaitable[BaseModel]]) -> StreamingResponse:
+    """
+    Start every job now, so the tasks inherit the caller's context (e.g.
+    the scheduler batch), and stream their results as NDJSON.
+    """
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    return StreamingResponse(iter_ndjson(tasks), media_type=NDJSON_MEDIA_TYPE)
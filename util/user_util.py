@@ -6,12 +6,24 @@ from typing import List, Dict
 import asyncio
 from bs4 import BeautifulSoup
 import logging
-from cachetools import LRUCache
 import httpx
-from tenacity import retry, wait_exponential, stop_after_attempt
 import json
 from fastapi.security.api_key import APIKeyHeader
-cache = {} 
+from core.config import settings
+from core.http_client import upstream, UpstreamError, UpstreamResponse
+from services.scheduler import scheduler
+from services.circuit_breaker import CircuitOpenError, circuits
+from services.hedging import hedger
+from services.parse_executor import parse_executor
+from services.property_cache import AUTOCOMPLETE, DETAILS, VALIDATORS, property_cache
+from services.property_store import property_store
+from services.refresher import refresher
+from services.extractor import streaming_enabled
+from services.retry import TIMEOUT, DeadlineExceeded, retry_policy, timeout_details
+from services.revalidation import CACHED, STORED, changed, shared_fetch_page, shared_settle, verified
+from services.stream_extract import extract_streaming
+from services.singleflight import singleflight
+from util.canonical import canonical_address, canonical_redfin_url
 
 def get_current_user(request: Request):
     return request.state.current_user
@@ -21,15 +33,94 @@ def get_current_user_permission(request: Request) -> List[str]:
     return request.state.permissions
 
 
-@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
 async def fetch_with_retry(url: str, headers: Dict) -> str:
-    """Fetch data from a URL with retry logic."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+    """
+    Fetch data from a URL under the shared retry policy. The upstream call
+    of each attempt is hedged when HEDGE_ENABLED; only use this for small
+    idempotent lookups.
+    """
+
+    async def get():
+        response = await upstream.get(url, headers=headers)
+        _check_page_status(response)
+        return response
+
+    async def request():
+        async with circuits.guard(url):
+            async with scheduler.slot(url):
+                response = await hedger.run(url, get)
         return response.text
+
+    return await retry_policy.call(request)
+
+
+def _check_page_status(response: UpstreamResponse) -> None:
+    # 304 answers a conditional request; 202 means Redfin is still
+    # building the page, which is worth another try
+    if response.status == 202:
+        raise UpstreamError(response.url, 202, f"Page not ready (202) at {response.url}")
+    if response.status != 304:
+        response.raise_for_status()
+
+
+async def fetch_page_with_retry(url: str, headers: Dict) -> UpstreamResponse:
+    """Fetch a page under the shared retry policy; 304 Not Modified counts as success."""
+
+    async def attempt():
+        async with circuits.guard(url):
+            async with scheduler.slot(url):
+                response = await upstream.get(url, headers=headers)
+            _check_page_status(response)
+        return response
+
+    return await retry_policy.call(attempt)
+
+
+async def stream_page_with_retry(url: str, headers: Dict):
+    """
+    Fetch a detail page and extract its details while the body streams in,
+    closing the connection once every field is found. Returns
+    (response, details); details is None for a 304.
+    """
+
+    async def attempt():
+        async with circuits.guard(url), scheduler.slot(url):
+            async with upstream.stream(
+                url, headers=headers, chunk_size=settings.EXTRACTOR_CHUNK_BYTES
+            ) as response:
+                _check_page_status(response)
+                if response.status == 304:
+                    return response, None
+                return response, await extract_streaming(response)
+
+    return await retry_policy.call(attempt)
+
+
+def detail_page_getter(url: str):
+    """Fetch function for a detail page, streamed when EXTRACTOR_STREAMING is on."""
+    if streaming_enabled():
+        return lambda headers: stream_page_with_retry(url, headers)
+    return lambda headers: fetch_page_with_retry(url, headers)
     
     
+ERROR_DETAILS = {
+    "price": "Error",
+    "beds": "Error",
+    "baths": "Error",
+    "sqft": "Error",
+}
+
+DETAIL_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.5735.199 Safari/537.36"
+}
+
+
+def is_data_available(details):
+    """Check if critical data is missing or invalid."""
+    invalid_values = ["Not Available", "Error", "", None]
+    return not any(value in invalid_values for value in details.values())
+
+
 async def fetch_property_details(url: str, invalidate_cache: bool = False) -> Dict:
     """
     Fetch property details from the given URL.
@@ -39,87 +130,92 @@ async def fetch_property_details(url: str, invalidate_cache: bool = False) -> Di
     Returns:
         Dict: Property details or error details.
     """
+    key = canonical_redfin_url(url)
     # Clear cache if invalidate_cache is True
-    if invalidate_cache and url in cache:
+    if invalidate_cache:
         logging.info(f"Invalidating cache for {url}")
-        del cache[url]
+        await property_cache.invalidate(DETAILS, key)
+        await property_cache.invalidate(VALIDATORS, key)
+
+    # Concurrent requests for the same home share one fetch
+    try:
+        details = await singleflight.do(
+            f"{DETAILS}:{key}", lambda: _fetch_property_details(url, key)
+        )
+    except DeadlineExceeded:
+        logging.warning(f"Deadline passed while fetching {url}")
+        return timeout_details()
+    refresher.record(url, details.get("freshness"))
+    return dict(details)
 
+
+async def refresh_property_details(url: str) -> Dict:
+    """
+    Scrape `url` again ahead of its cache expiry. The cache and property
+    table are skipped, but the page is still revalidated, so an unchanged
+    page usually costs a 304.
+    """
+    key = canonical_redfin_url(url)
+    details = await singleflight.do(
+        f"{DETAILS}:{key}", lambda: _fetch_property_details(url, key, use_cache=False)
+    )
+    return dict(details)
+
+
+async def _fetch_property_details(url: str, key: str, use_cache: bool = True) -> Dict:
     # Return cached data if available
-    if url in cache:
+    cached = await property_cache.get(DETAILS, key) if use_cache else None
+    if cached is not None:
         logging.info(f"Returning cached data for {url}")
-        return cache[url]
+        return {**cached, "freshness": CACHED}
+    stored = await property_store.get_fresh_one(url) if use_cache else None
+    if stored is not None:
+        await property_cache.set(DETAILS, key, stored)
+        return {**stored, "freshness": STORED}
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.5735.199 Safari/537.36"
-    }
+    try:
+        # Conditional request; an unchanged page is not parsed again. Retries
+        # happen once, in the page fetch, under the shared retry policy
+        page = await shared_fetch_page(key, DETAIL_HEADERS, detail_page_getter(url))
+        details, freshness = await shared_settle(key, page, parse_executor.parse)
+    except DeadlineExceeded:
+        logging.warning(f"Deadline passed while fetching {url}")
+        return timeout_details()
+    except UpstreamError as e:
+        logging.error(f"HTTP request error for {url}: {e}")
+        return dict(ERROR_DETAILS)
+    except Exception as e:
+        logging.error(f"Unexpected error for {url}: {e}")
+        return dict(ERROR_DETAILS)
+
+    # Check if all required data is available; stale details are not re-cached
+    if not verified(freshness):
+        logging.warning(f"Circuit open, serving stale details for {url}")
+    elif is_data_available(details):
+        await property_cache.set(DETAILS, key, details)  # Cache the result
+        if changed(freshness):
+            property_store.add(url, details)
+        else:
+            property_store.touch(url)
+    else:
+        logging.warning(f"Incomplete data fetched for {url}: {details}")
+    return {**details, "freshness": freshness}
 
-    def is_data_available(details):
-        """Check if critical data is missing or invalid."""
-        invalid_values = ["Not Available", "Error", "", None]
-        return not any(value in invalid_values for value in details.values())
-
-    retries = 3  # Number of retries
-    while retries > 0:
-        try:
-            html = await fetch_with_retry(url, headers)
-            soup = BeautifulSoup(html, "html.parser")
-            details = {}
-
-            # Parse property details
-            details["price"] = (
-                soup.find("div", {"data-rf-test-id": "abp-price"})
-                .find("div", {"class": "statsValue"}).text.strip()
-                if soup.find("div", {"data-rf-test-id": "abp-price"})
-                else "Not Available"
-            )
-            details["beds"] = (
-                soup.find("div", {"data-rf-test-id": "abp-beds"})
-                .find("div", {"class": "statsValue"}).text.strip()
-                if soup.find("div", {"data-rf-test-id": "abp-beds"})
-                else "Not Available"
-            )
-            details["baths"] = (
-                soup.find("div", {"data-rf-test-id": "abp-baths"})
-                .find("div", {"class": "statsValue"}).text.strip()
-                if soup.find("div", {"data-rf-test-id": "abp-baths"})
-                else "Not Available"
-            )
-            details["sqft"] = (
-                soup.find("div", {"data-rf-test-id": "abp-sqFt"}).text.strip()
-                if soup.find("div", {"data-rf-test-id": "abp-sqFt"})
-                else "Not Available"
-            )
-
-            # Check if all required data is available
-            if is_data_available(details):
-                cache[url] = details  # Cache the result
-                return details
-            else:
-                logging.warning(f"Incomplete data fetched for {url}: {details}")
-
-        except httpx.RequestError as e:
-            logging.error(f"HTTP request error for {url}: {e}")
-        except Exception as e:
-            logging.error(f"Unexpected error for {url}: {e}")
-
-        # Retry logic
-        retries -= 1
-        if retries > 0:
-            logging.warning(f"Retrying fetch for URL: {url} (remaining retries: {retries})")
-            await asyncio.sleep(3)  # Wait before retrying
-
-    # Return error if all retries fail
-    logging.error(f"Failed to fetch property details for {url} after retries.")
-    return {
-        "price": "Error",
-        "beds": "Error",
-        "baths": "Error",
-        "sqft": "Error",
-    }
 
 async def search_redfin_property(full_address: str) -> str:
+    key = canonical_address(full_address)
+    return await singleflight.do(
+        f"{AUTOCOMPLETE}:{key}", lambda: _search_redfin_property(full_address, key)
+    )
+
+
+async def _search_redfin_property(full_address: str, key: str) -> str:
+    cached = await property_cache.get(AUTOCOMPLETE, key)
+    if cached is not None:
+        return cached
+
     formatted_address = full_address.replace(" ", "%20")
-    search_url = f"https://www.redfin.com/stingray/do/location-autocomplete?location={formatted_address}&v=2"
+    search_url = f"{settings.REDFIN_BASE_URL}/stingray/do/location-autocomplete?location={formatted_address}&v=2"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.121 Safari/537.36"
     }
@@ -135,8 +231,13 @@ async def search_redfin_property(full_address: str) -> str:
             for section in data["payload"]["sections"]:
                 for item in section["rows"]:
                     if "url" in item:
-                        return f"https://www.redfin.com{item['url']}"
+                        redfin_url = f"{settings.REDFIN_BASE_URL}{item['url']}"
+                        await property_cache.set(AUTOCOMPLETE, key, redfin_url)
+                        return redfin_url
+        await property_cache.set(AUTOCOMPLETE, key, "Not Found", negative=True)
         return "Not Found"
+    except (DeadlineExceeded, CircuitOpenError):
+        raise
     except Exception as e:
         logging.error(f"Error searching property: {e}")
         return "Not Found"
@@ -144,12 +245,15 @@ async def search_redfin_property(full_address: str) -> str:
 
 # Process address in batches
 async def process_in_batches(addresses):
-    results = []
-    for i in range(0, len(addresses), 50):
-        batch = addresses[i : i + 50]
-        tasks = [process_address(address) for address in batch]
-        results.extend(await asyncio.gather(*tasks))
-    return results
+    """
+    Run addresses through the staged lookup/fetch/parse pipeline. Results
+    keep the input order; no fixed group waits for its slowest member.
+    """
+    from services.pipeline import address_pipeline
+
+    with scheduler.batch():
+        tasks = [address_pipeline.process(address) for address in addresses]
+        return await asyncio.gather(*tasks)
 
 
 # Process a single address
@@ -176,6 +280,9 @@ async def process_address(address):
             "redfin_url": redfin_url,
             **details,
         }
+    except DeadlineExceeded:
+        logging.warning(f"Deadline passed while processing address {address.id}")
+        return {"id": address.id, "redfin_url": TIMEOUT, **timeout_details()}
     except Exception as e:
         logging.error(f"Error processing address : {e}")
         return {